@@ -1,75 +1,3389 @@
+import time
+_MODULE_LOAD_START = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, font as tkfont, simpledialog
-import time
+import math
 import datetime
 import threading
-import pygame
-from plyer import notification
+import importlib
 import os
 import sys
-from PIL import Image # Requires Pillow
-import pystray # Requires pystray
 import json
 import uuid
-import pytz # Requires pytz
-from tkcalendar import Calendar, DateEntry # Requires tkcalendar
-from collections import defaultdict
+import copy
+import queue
+import bisect
+import csv
+import heapq
+import contextlib
+import abc
+import functools
+import wave
+import hashlib
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from collections import defaultdict, OrderedDict
+from types import MappingProxyType
+try:
+    from inotify_simple import INotify, flags as inotify_flags # Optional, Linux only
+except ImportError:
+    INotify = None
+
+# --- Startup Profiling & Deferred Imports ---
+STARTUP_TARGET_MS = 400 # Time-to-first-frame budget tracked by --profile-startup
+
+class StartupProfiler:
+    """Collects per-import and per-phase timings up to the first frame and beyond.
+
+    Timings are always recorded (they are cheap); the report is only printed
+    when enabled via --profile-startup or ALARM_CLOCK_PROFILE_STARTUP=1.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.entries = []
+        self.first_frame_ms = None
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, elapsed_ms):
+        thread_name = threading.current_thread().name
+        with self._lock:
+            self.entries.append((kind, name, elapsed_ms, thread_name))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record('phase', name, (time.perf_counter() - start) * 1000)
+
+    def mark_first_frame(self):
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - _MODULE_LOAD_START) * 1000
+
+    def report(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = list(self.entries)
+        verdict = "n/a" if self.first_frame_ms is None else ("OK" if self.first_frame_ms <= STARTUP_TARGET_MS else "OVER BUDGET")
+        ttff = "?" if self.first_frame_ms is None else f"{self.first_frame_ms:.0f}"
+        print(f"Startup profile: time-to-first-frame {ttff} ms (target {STARTUP_TARGET_MS} ms: {verdict})")
+        for kind, name, elapsed_ms, thread_name in entries:
+            where = "" if thread_name == "MainThread" else f" [{thread_name}]"
+            print(f"  {kind:<6} {name:<28} {elapsed_ms:8.1f} ms{where}")
+
+STARTUP_PROFILER = StartupProfiler(enabled="--profile-startup" in sys.argv or os.environ.get("ALARM_CLOCK_PROFILE_STARTUP") == "1")
+STARTUP_PROFILER.record('import', 'tkinter + stdlib', (time.perf_counter() - _MODULE_LOAD_START) * 1000)
+
+class _LazyModule:
+    """Stands in for a module (or a module attribute) and imports it on first attribute access."""
+    def __init__(self, module_name, attribute=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    start = time.perf_counter()
+                    target = importlib.import_module(self._module_name)
+                    if self._attribute:
+                        target = getattr(target, self._attribute)
+                    STARTUP_PROFILER.record('import', self._module_name, (time.perf_counter() - start) * 1000)
+                    self._target = target
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+# Heavy third-party modules stay off the path to the first frame.
+pygame = _LazyModule("pygame") # Requires pygame
+notification = _LazyModule("plyer", "notification") # Requires plyer
+Image = _LazyModule("PIL.Image") # Requires Pillow
+pystray = _LazyModule("pystray") # Requires pystray
+pytz = _LazyModule("pytz") # Requires pytz
+tkcalendar = _LazyModule("tkcalendar") # Requires tkcalendar
+DEFERRED_MODULES = (tkcalendar, pytz, Image, pystray, notification, pygame)
+
+# --- Constants ---
+# Light Theme Colors (Default)
+L_COLOR_BACKGROUND = "#F5F5F5"; L_COLOR_FRAME_BG = "#FFFFFF"; L_COLOR_TEXT = "#333333"
+L_COLOR_TEXT_SECONDARY = "#666666"; L_COLOR_ACCENT = "#0078D4"; L_COLOR_ACCENT_FG = "#FFFFFF"
+L_COLOR_SUCCESS = "#107C10"; L_COLOR_ERROR = "#D83B01"; L_COLOR_DISABLED = "#BDBDBD"
+L_COLOR_HIGHLIGHT = "#E0E0E0"; L_CAL_BG = "#DDEBF7"; L_CAL_FG = L_COLOR_TEXT
+
+# Dark Theme Colors
+D_COLOR_BACKGROUND = "#2D2D30"; D_COLOR_FRAME_BG = "#1E1E1E"; D_COLOR_TEXT = "#F1F1F1"
+D_COLOR_TEXT_SECONDARY = "#A0A0A0"; D_COLOR_ACCENT = "#007ACC"; D_COLOR_ACCENT_FG = "#FFFFFF"
+D_COLOR_SUCCESS = "#4CAF50"; D_COLOR_ERROR = "#F44336"; D_COLOR_DISABLED = "#6E6E6E"
+D_COLOR_HIGHLIGHT = "#4A4A4A"; D_CAL_BG = "#3C3C3C"; D_CAL_FG = D_COLOR_TEXT
+
+# Font Constants
+FONT_FAMILY_UI = "Segoe UI"; FONT_SIZE_BASE = 10; FONT_SIZE_LARGE = 12
+FONT_SIZE_XLARGE = 16; FONT_SIZE_CLOCK = 36
+FONT_SIZE_CLOCK_COMPACT = 28
+
+# Functionality Constants
+SETTINGS_FILE = "settings.json"; ALARMS_FILE = "alarms.json"; WORLD_CLOCKS_FILE = "world_clocks.json"
+RECURRENCE_ONCE = "Once"; RECURRENCE_DAILY = "Daily"; RECURRENCE_WEEKDAYS = "Weekdays (Mon-Fri)"
+RECURRENCE_WEEKENDS = "Weekends (Sat-Sun)"; RECURRENCE_SPECIFIC_DATE = "Specific Date"; RECURRENCE_CUSTOM = "Custom"
+FREQ_ONCE = "once"; FREQ_DAILY = "daily"; FREQ_WEEKLY = "weekly"; FREQ_MONTHLY = "monthly"; FREQ_NEVER = "never"
+ORDINAL_NAMES = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th", 5: "5th", -1: "last"}
+RULE_EPOCH = datetime.date(1970, 1, 5); RECURRENCE_MAX_PERIOD_SKIPS = 64; RECURRENCE_RULE_CACHE_SIZE = 1024
+EXCLUSION_CALENDARS_DIR = "calendars"
+WEEKDAYS = [0, 1, 2, 3, 4]; WEEKENDS = [5, 6]; DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DEFAULT_WORLD_CLOCK = "Asia/Manila"; DEFAULT_VOLUME = 0.7; DEFAULT_SNOOZE_MINUTES = 9
+FADE_IN_DURATION_MS = 5000; DEFAULT_FADE_OUT_MS = 0; ESCALATE_DURATION_MS = 60000; AUDIO_TICK_MS = 25
+DEFAULT_SOUNDS_DIR = "sounds"; FALLBACK_SOUND = "builtin:classic.wav"
+DEFAULT_STREAMING_THRESHOLD_MB = 8; STREAM_CHUNK_SECONDS = 1.0
+INITIAL_MIXER_CHANNELS = 16; DEFAULT_MAX_MIXER_CHANNELS = 64
+MIXER_FORMAT = (44100, -16, 2); MIXER_BUFFER = 512; DEFAULT_AUDIO_IDLE_SECONDS = 300
+PRIORITY_LOW = 0; PRIORITY_NORMAL = 1; PRIORITY_HIGH = 2; PRIORITY_NAMES = {PRIORITY_LOW: "Low", PRIORITY_NORMAL: "Normal", PRIORITY_HIGH: "High"}
+NORMALIZED_SOUNDS_DIR = "sound_cache"; NORMALIZED_INDEX_FILE = "index.json"
+USER_SOUNDS_DIR = "user_sounds"; SOUND_FILE_EXTENSIONS = (".wav", ".ogg", ".mp3")
+MAX_IMPORT_WORKERS = 4; MIN_SOUND_DURATION_S = 0.05; SILENCE_PEAK_LEVEL = 0.001
+CALENDAR_EVENT_TAG = "alarm_event"
+PERSISTENCE_SLOW_WRITE_MS = 250; PERSISTENCE_FLUSH_TIMEOUT_S = 5.0
+FILE_WATCH_POLL_SECONDS = 2.0; FILE_WATCH_SETTLE_SECONDS = 0.2
+DEFAULT_SOUND_CACHE_MB = 64; DEFAULT_SOUND_PRELOAD_SECONDS = 120; PRELOAD_SCAN_INTERVAL_S = 15
+ALARM_STORE_SLOW_LOCK_MS = 5; ALARM_CHANGESET_FULL_REFRESH = 50; BULK_SHIFT_MINUTES = 15; GROUP_IID_PREFIX = "group:"
+NEXT_FIRE_SEARCH_OCCURRENCES = 366; TRAY_UPCOMING_ALARMS = 5
+TIMER_WHEEL_TICK_MS = 5; TIMER_WHEEL_SLOT_BITS = 8; TIMER_WHEEL_LEVELS = 4
+TIMER_DISPLAY_REFRESH_MS = 100; TIMER_ID_PREFIX = "timer:"; MAX_TIMER_HOURS = 99
+DEFAULT_SIMULATION_DAYS = 365
+TIMEZONE_SEARCH_LIMIT = 60
+ALARM_CSV_FIELDS = ("time", "label", "recurrence", "days", "date", "sound", "enabled", "priority", "rrule", "exdates", "calendars")
+OCCURRENCE_CSV_FIELDS = ("datetime", "time", "label", "alarm_id"); MAX_IMPORT_ERRORS_SHOWN = 20
+DEFAULT_EXPORT_DAYS = 30
+THEME_BENCHMARK_ROUNDS = 20; THEME_BENCHMARK_WIDGETS = 2000
+NOTIFICATION_QUEUE_SIZE = 32; NOTIFICATION_COALESCE_SECONDS = 1.0; NOTIFICATION_APP_NAME = "Enhanced Alarm Clock"
+
+# --- Theme Style Sets ---
+THEME_PALETTES = {
+    'light': {
+        'bg': L_COLOR_BACKGROUND, 'frame_bg': L_COLOR_FRAME_BG, 'text': L_COLOR_TEXT, 'text_secondary': L_COLOR_TEXT_SECONDARY,
+        'accent': L_COLOR_ACCENT, 'accent_fg': D_COLOR_ACCENT_FG, 'success': L_COLOR_SUCCESS, 'error': L_COLOR_ERROR,
+        'disabled': L_COLOR_DISABLED, 'highlight': L_COLOR_HIGHLIGHT, 'cal_bg': L_CAL_BG, 'cal_fg': L_CAL_FG,
+        'button_active': '#005A9E', 'secondary_active': '#505050',
+    },
+    'dark': {
+        'bg': D_COLOR_BACKGROUND, 'frame_bg': D_COLOR_FRAME_BG, 'text': D_COLOR_TEXT, 'text_secondary': D_COLOR_TEXT_SECONDARY,
+        'accent': D_COLOR_ACCENT, 'accent_fg': D_COLOR_ACCENT_FG, 'success': D_COLOR_SUCCESS, 'error': D_COLOR_ERROR,
+        'disabled': D_COLOR_DISABLED, 'highlight': D_COLOR_HIGHLIGHT, 'cal_bg': D_CAL_BG, 'cal_fg': D_CAL_FG,
+        'button_active': '#1F8DCD', 'secondary_active': '#7A7A7A',
+    },
+}
+
+def theme_palette(mode):
+    return THEME_PALETTES.get(mode, THEME_PALETTES['light'])
+
+# Fonts, padding and relief do not depend on the theme, so they are applied once.
+BASE_STYLE_OPS = (
+    ('configure', '.', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE)}),
+    ('configure', 'TNotebook', {'borderwidth': 0, 'tabmargins': [2, 5, 2, 0]}),
+    ('configure', 'TNotebook.Tab', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), 'padding': [10, 5], 'borderwidth': 0}),
+    ('configure', 'TButton', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), 'padding': (10, 6), 'relief': tk.FLAT, 'borderwidth': 0}),
+    ('configure', 'TSpinbox', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE), 'padding': (5, 5), 'relief': tk.FLAT, 'borderwidth': 1}),
+    ('configure', 'TEntry', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE), 'padding': (5, 5), 'relief': tk.FLAT, 'borderwidth': 1}),
+    ('configure', 'Treeview', {'rowheight': 25, 'relief': tk.FLAT, 'borderwidth': 0}),
+    ('configure', 'Treeview.Heading', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), 'relief': tk.FLAT}),
+    ('configure', 'Clock.TLabel', {'font': (FONT_FAMILY_UI, FONT_SIZE_CLOCK, 'bold')}),
+    ('configure', 'Status.TLabel', {'font': (FONT_FAMILY_UI, FONT_SIZE_LARGE)}),
+    ('configure', 'WorldClockTime.TLabel', {'font': (FONT_FAMILY_UI, FONT_SIZE_XLARGE)}),
+    ('configure', 'WorldClockZone.TLabel', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE)}),
+    ('configure', 'CalendarDate.TLabel', {'font': (FONT_FAMILY_UI, FONT_SIZE_BASE)}),
+)
+
+def compile_theme_style_set(palette):
+    """Resolve every colour-dependent style option for one palette into a list of (method, style, options)."""
+    p = palette
+    return [
+        ('configure', '.', {'background': p['bg'], 'foreground': p['text'], 'fieldbackground': p['frame_bg']}),
+        ('configure', 'TFrame', {'background': p['bg']}),
+        ('configure', 'TLabel', {'background': p['bg'], 'foreground': p['text']}),
+        ('configure', 'TLabelframe', {'background': p['bg']}),
+        ('configure', 'TLabelframe.Label', {'background': p['bg'], 'foreground': p['text']}),
+        ('configure', 'TRadiobutton', {'background': p['bg'], 'foreground': p['text'], 'indicatorcolor': p['frame_bg']}),
+        ('map', 'TRadiobutton', {'background': [('active', p['frame_bg'])]}),
+        ('configure', 'TCheckbutton', {'background': p['bg'], 'foreground': p['text'], 'indicatorcolor': p['frame_bg']}),
+        ('map', 'TCheckbutton', {'background': [('active', p['frame_bg'])]}),
+        ('configure', 'TNotebook', {'background': p['bg']}),
+        ('configure', 'TNotebook.Tab', {'background': p['bg'], 'foreground': p['text_secondary']}),
+        ('map', 'TNotebook.Tab', {'background': [('selected', p['frame_bg'])], 'foreground': [('selected', p['accent'])]}),
+        ('configure', 'TButton', {'background': p['accent'], 'foreground': p['accent_fg']}),
+        ('map', 'TButton', {'background': [('active', p['button_active']), ('disabled', p['disabled'])], 'foreground': [('disabled', p['text_secondary'])]}),
+        ('configure', 'Secondary.TButton', {'background': p['text_secondary'], 'foreground': p['accent_fg']}),
+        ('map', 'Secondary.TButton', {'background': [('active', p['secondary_active']), ('disabled', p['disabled'])]}),
+        ('configure', 'TSpinbox', {'bordercolor': p['disabled'], 'fieldbackground': p['frame_bg'], 'foreground': p['text'], 'arrowcolor': p['text']}),
+        ('map', 'TSpinbox', {'bordercolor': [('focus', p['accent'])]}),
+        ('configure', 'TEntry', {'bordercolor': p['disabled'], 'fieldbackground': p['frame_bg'], 'foreground': p['text']}),
+        ('map', 'TEntry', {'bordercolor': [('focus', p['accent'])], 'fieldbackground': [('readonly', p['bg'])]}),
+        ('map', 'TCombobox', {'fieldbackground': [('readonly', p['frame_bg'])], 'selectbackground': [('readonly', p['frame_bg'])], 'selectforeground': [('readonly', p['text'])]}),
+        ('configure', 'Horizontal.TScale', {'background': p['bg'], 'troughcolor': p['frame_bg']}),
+        ('map', 'Horizontal.TScale', {'background': [('active', p['accent'])]}),
+        ('configure', 'Treeview', {'fieldbackground': p['frame_bg'], 'background': p['frame_bg'], 'foreground': p['text']}),
+        ('configure', 'Treeview.Heading', {'background': p['accent'], 'foreground': p['accent_fg']}),
+        ('map', 'Treeview.Heading', {'background': [('active', p['accent'])]}),
+        ('configure', 'ringing.Treeview', {'background': p['error'], 'foreground': 'white'}),
+        ('configure', 'disabled.Treeview', {'foreground': p['disabled']}),
+        ('configure', 'Clock.TLabel', {'foreground': p['text'], 'background': p['bg']}),
+        ('configure', 'Status.TLabel', {'background': p['bg'], 'foreground': p['text']}),
+        ('configure', 'WorldClockTime.TLabel', {'background': p['frame_bg'], 'foreground': p['text']}),
+        ('configure', 'WorldClockZone.TLabel', {'background': p['frame_bg'], 'foreground': p['text_secondary']}),
+        ('configure', 'CalendarDate.TLabel', {'background': p['bg'], 'foreground': p['text_secondary']}),
+    ]
+
+def calendar_theme_options(palette):
+    p = palette
+    return {
+        'background': p['accent'], 'foreground': p['accent_fg'],
+        'headersbackground': p['accent'], 'headersforeground': p['accent_fg'],
+        'normalbackground': p['frame_bg'], 'normalforeground': p['text'],
+        'weekendbackground': p['frame_bg'], 'weekendforeground': p['text'],
+        'othermonthbackground': p['disabled'], 'othermonthforeground': p['text_secondary'],
+        'othermonthwebackground': p['disabled'], 'othermonthweforeground': p['text_secondary'],
+        'selectbackground': p['accent'], 'selectforeground': p['accent_fg'],
+        'disabledbackground': p['bg'], 'bordercolor': p['bg'],
+        'markbackground': p['cal_bg'], 'markforeground': p['cal_fg'],
+    }
+
+def date_entry_theme_options(palette):
+    p = palette
+    return {
+        'background': p['accent'], 'foreground': p['accent_fg'],
+        'normalbackground': p['frame_bg'], 'normalforeground': p['text'],
+        'selectbackground': p['accent'], 'selectforeground': p['accent_fg'],
+    }
+
+class ThemeStyleSets:
+    """Theme style sets compiled once per palette and applied to the shared ttk.Style.
+
+    ttk styles are global to the Tk interpreter, so dialogs pick up the
+    active set automatically and must not configure styles of their own.
+    """
+    def __init__(self, style):
+        self.style = style
+        self._sets = {mode: compile_theme_style_set(palette) for mode, palette in THEME_PALETTES.items()}
+        self._base_applied = False
+        self.active = None
+        self.last_switch_ms = 0.0
+
+    def _apply_base(self):
+        try: 
+            self.style.theme_use('clam')
+        except tk.TclError:
+            try: 
+                self.style.theme_use('vista')
+            except tk.TclError: 
+                self.style.theme_use('default')
+        for method, name, options in BASE_STYLE_OPS:
+            getattr(self.style, method)(name, **options)
+        self._base_applied = True
+
+    def apply(self, mode):
+        start = time.perf_counter()
+        if not self._base_applied:
+            self._apply_base()
+        if mode not in self._sets:
+            mode = 'light'
+        if mode != self.active:
+            for method, name, options in self._sets[mode]:
+                getattr(self.style, method)(name, **options)
+            self.active = mode
+        self.last_switch_ms = (time.perf_counter() - start) * 1000
+        return self.last_switch_ms
+
+# --- Clocks ---
+class SystemClock:
+    """The wall clock. Time is read through CLOCK so a VirtualClock can stand in for it."""
+
+    def now(self):
+        return datetime.datetime.now()
+
+    def today(self):
+        return datetime.date.today()
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class VirtualClock(SystemClock):
+    """A clock that only moves when advanced. sleep() advances it instead of waiting."""
+
+    def __init__(self, start):
+        self._lock = threading.Lock()
+        self._now = start
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def today(self):
+        return self.now().date()
+
+    def time(self):
+        return self.now().timestamp()
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += datetime.timedelta(seconds=seconds)
+            return self._now
+
+    def set(self, when):
+        with self._lock:
+            if when < self._now:
+                raise ValueError("A virtual clock cannot go backwards")
+            self._now = when
+
+CLOCK = SystemClock()
+
+def set_clock(clock):
+    """Install clock as the module clock and return the previous one."""
+    global CLOCK
+    previous, CLOCK = CLOCK, clock
+    return previous
+
+# --- Helper Functions ---
+def resource_path(relative_path):
+    try: base_path = sys._MEIPASS
+    except AttributeError: base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def format_alarm_time(hour, minute, time_format):
+    dt = datetime.time(hour, minute)
+    if time_format == "12h": return dt.strftime("%I:%M %p")
+    else: return dt.strftime("%H:%M")
+
+def get_recurrence_display(alarm_data):
+    return alarm_rule(alarm_data).describe()
+
+def alarm_occurs_on(alarm_data, date_obj, group=None):
+    """Whether the alarm fires on date_obj. A one-off that already fired that day does not fire again,
+    and nothing fires on a date in one of the alarm's exclusion calendars."""
+    rule = alarm_rule(alarm_data)
+    if rule.is_single and alarm_data.get('last_triggered_day') == date_obj.strftime("%Y-%m-%d"):
+        return False
+    return rule.occurs_on(date_obj) and not alarm_excluded_on(alarm_data, date_obj, group)
+
+def upcoming_fire_time(alarm_data, now, window, group=None):
+    """Return when alarm_data next fires if that is within window (a timedelta) of now, else None."""
+    if not alarm_data.get('enabled'):
+        return None
+    snooze_until_ts = alarm_data.get('snooze_until')
+    if snooze_until_ts:
+        snooze_until = datetime.datetime.fromtimestamp(snooze_until_ts)
+        # A snooze that has already run out no longer decides the next ring.
+        if snooze_until > now:
+            return snooze_until if snooze_until - now <= window else None
+    fire = now.replace(hour=alarm_data.get('hour', 0), minute=alarm_data.get('minute', 0), second=0, microsecond=0)
+    if fire < now:
+        fire += datetime.timedelta(days=1)
+    if fire - now <= window and alarm_occurs_on(alarm_data, fire.date(), group):
+        return fire
+    return None
+
+def next_fire_time(alarm_data, now, group=None):
+    """When alarm_data next rings after now, or None if it never will.
+    Occurrences are taken from the alarm's rule, so days excluded by calendars or the group schedule are stepped over, not scanned."""
+    if not alarm_data.get('enabled'):
+        return None
+    snooze_until_ts = alarm_data.get('snooze_until')
+    if snooze_until_ts:
+        snooze_until = datetime.datetime.fromtimestamp(snooze_until_ts)
+        if snooze_until > now:
+            return snooze_until
+    rule = alarm_rule(alarm_data)
+    at = datetime.time(alarm_data.get('hour', 0), alarm_data.get('minute', 0))
+    day = now.date()
+    if datetime.datetime.combine(day, at) <= now:
+        day += datetime.timedelta(days=1)
+    for _ in range(NEXT_FIRE_SEARCH_OCCURRENCES):
+        day = rule.next_on_or_after(day)
+        if day is None:
+            return None
+        if alarm_occurs_on(alarm_data, day, group):
+            return datetime.datetime.combine(day, at)
+        if day == datetime.date.max:
+            return None
+        day += datetime.timedelta(days=1)
+    return None
+
+def format_countdown(delta):
+    minutes = max(0, math.ceil(delta.total_seconds() / 60))
+    if minutes < 60:
+        return f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m" if minutes else f"{hours}h"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h" if hours else f"{days}d"
+
+def parse_duration(text):
+    """Seconds in a timer duration: "90s", "5m", "1h 30m", "1:30" (m:ss), "1:02:03", or a plain number of minutes."""
+    text = text.strip().lower()
+    if not text:
+        raise ValueError("Enter a duration")
+    try:
+        if ":" in text:
+            seconds = 0.0
+            for part in text.split(":"):
+                seconds = seconds * 60 + float(part)
+        elif text[-1].isdigit() or text[-1] == ".":
+            seconds = float(text) * 60
+        else:
+            seconds, number = 0.0, ""
+            units = {'h': 3600, 'm': 60, 's': 1}
+            for char in text.replace(" ", ""):
+                if char in units and number:
+                    seconds += float(number) * units[char]
+                    number = ""
+                elif char.isdigit() or char == ".":
+                    number += char
+                else:
+                    raise ValueError
+            if number:
+                raise ValueError
+    except ValueError:
+        raise ValueError(f"Not a duration: {text!r} (try 90s, 5m, 1h 30m or 1:30)")
+    if not 0 < seconds <= MAX_TIMER_HOURS * 3600:
+        raise ValueError(f"Durations run from 1 second to {MAX_TIMER_HOURS} hours")
+    return seconds
+
+def format_duration(seconds, hundredths=False):
+    if hundredths:
+        whole, fraction = divmod(max(0.0, seconds), 1)
+        minutes, secs = divmod(int(whole), 60)
+        hours, minutes = divmod(minutes, 60)
+        text = f"{minutes:02d}:{secs:02d}.{int(fraction * 100):02d}"
+        return f"{hours}:{text}" if hours else text
+    minutes, secs = divmod(max(0, math.ceil(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+def _shift_date_text(text, days):
+    return (datetime.datetime.strptime(text, "%Y-%m-%d").date() + datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+
+def shift_alarm_time(alarm_data, minutes):
+    """Return a copy of alarm_data moved by minutes; crossing midnight moves its date or days with it."""
+    total = alarm_data.get('hour', 0) * 60 + alarm_data.get('minute', 0) + minutes
+    day_shift, total = divmod(total, 24 * 60)
+    changes = {'hour': total // 60, 'minute': total % 60, 'snooze_until': None, 'last_triggered_day': None}
+    if day_shift:
+        rec_type = alarm_data.get('recurrence_type', RECURRENCE_ONCE)
+        days = {RECURRENCE_WEEKDAYS: WEEKDAYS, RECURRENCE_WEEKENDS: WEEKENDS, "Specific Days": alarm_data.get('recurrence_days', [])}.get(rec_type)
+        spec = dict(alarm_data.get('recurrence') or {})
+        try:
+            if rec_type == RECURRENCE_SPECIFIC_DATE and alarm_data.get('specific_date'):
+                changes['specific_date'] = _shift_date_text(alarm_data['specific_date'], day_shift)
+            elif days:
+                changes['recurrence_type'] = "Specific Days"
+                changes['recurrence_days'] = sorted((d + day_shift) % 7 for d in days)
+            if spec:
+                # Dated limits and skipped days move with the alarm; weekly days rotate with it.
+                for key in ('start', 'until'):
+                    if spec.get(key):
+                        spec[key] = _shift_date_text(spec[key], day_shift)
+                spec['exdates'] = [_shift_date_text(d, day_shift) for d in spec.get('exdates', ())]
+                if spec.get('weekdays'):
+                    spec['weekdays'] = sorted((d + day_shift) % 7 for d in spec['weekdays'])
+                changes['recurrence'] = spec
+        except ValueError:
+            pass
+    return with_alarm_fields(alarm_data, changes)
+
+# --- Recurrence Rules ---
+def _days_in_month(year, month):
+    return (datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)).day
+
+def _rule_date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date() if text else None
+
+class RecurrenceRule:
+    """An RRULE-style set of dates: once, every N days, every N weeks on given weekdays,
+    or every N months on a day of the month or an nth weekday, limited by until/count
+    and minus exclusion dates. The time of day stays on the alarm.
+
+    Occurrences are computed arithmetically from the anchor date, so next_on_or_after()
+    costs the same for next week as for ten years out, and between() steps from one
+    occurrence to the next rather than day by day. Exclusion dates are found by bisect.
+    """
+    __slots__ = ('freq', 'start', 'interval', 'weekdays', 'monthday', 'nth', 'until', 'count', 'exdates', 'label', '_last')
+
+    def __init__(self, freq, start=None, interval=1, weekdays=(), monthday=None, nth=None, until=None, count=None, exdates=(), label=None):
+        self.freq = freq
+        self.start = start
+        self.interval = max(1, int(interval or 1))
+        self.weekdays = tuple(sorted(set(weekdays)))
+        self.monthday = monthday
+        self.nth = tuple(nth) if nth else None
+        self.until = until
+        # COUNT is only meaningful from a fixed anchor date.
+        if count and start is None:
+            raise ValueError("a count needs a start date")
+        self.count = int(count) if count else None
+        self.exdates = tuple(sorted(set(exdates)))
+        self.label = label
+        self._last = self._last_occurrence()
+
+    @classmethod
+    def never(cls, label):
+        return cls(FREQ_NEVER, label=label)
+
+    @property
+    def is_single(self):
+        return self.freq == FREQ_ONCE
+
+    @property
+    def floating(self):
+        """A plain "Once" alarm: not tied to a date, it fires at the next matching time."""
+        return self.freq == FREQ_ONCE and self.start is None
+
+    def _month_day(self, index):
+        year, month = divmod(index, 12)
+        month += 1
+        if not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+            return None
+        last_day = _days_in_month(year, month)
+        if self.nth:
+            n, weekday = self.nth
+            if n > 0:
+                day = 1 + (weekday - datetime.date(year, month, 1).weekday()) % 7 + 7 * (n - 1)
+            else:
+                day = last_day - (datetime.date(year, month, last_day).weekday() - weekday) % 7 + 7 * (n + 1)
+        else:
+            day = self.monthday or (self.start or RULE_EPOCH).day
+            if day < 0:
+                day = last_day + 1 + day
+        return datetime.date(year, month, day) if 1 <= day <= last_day else None
+
+    def _raw_next(self, day):
+        """First occurrence on or after day, ignoring until, count and exclusions."""
+        if self.freq == FREQ_NEVER:
+            return None
+        if self.freq == FREQ_ONCE:
+            if self.start is None:
+                return day
+            return self.start if day <= self.start else None
+        anchor = self.start or RULE_EPOCH
+        day = max(day, anchor)
+        if self.freq == FREQ_DAILY:
+            periods = -(-(day - anchor).days // self.interval)
+            return anchor + datetime.timedelta(days=periods * self.interval)
+        if self.freq == FREQ_WEEKLY:
+            if not self.weekdays:
+                return None
+            week0 = anchor - datetime.timedelta(days=anchor.weekday())
+            week = (day - week0).days // 7
+            if week % self.interval == 0:
+                later = [d for d in self.weekdays if d >= day.weekday()]
+                if later:
+                    return week0 + datetime.timedelta(weeks=week, days=later[0])
+                week += self.interval
+            else:
+                week += self.interval - week % self.interval
+            return week0 + datetime.timedelta(weeks=week, days=self.weekdays[0])
+        base = anchor.year * 12 + anchor.month - 1
+        month = day.year * 12 + day.month - 1 - base
+        month += -month % self.interval
+        # Only months too short for the day (e.g. the 31st) are skipped, so this stays bounded.
+        for _ in range(RECURRENCE_MAX_PERIOD_SKIPS):
+            candidate = self._month_day(base + month)
+            if candidate is not None and candidate >= day:
+                return candidate
+            month += self.interval
+        return None
+
+    def _nth_raw(self, n):
+        """The nth (1-based) occurrence counted from start, ignoring exclusions."""
+        if self.freq == FREQ_ONCE:
+            return self.start
+        if self.freq == FREQ_DAILY:
+            return self.start + datetime.timedelta(days=(n - 1) * self.interval)
+        if self.freq == FREQ_WEEKLY:
+            if not self.weekdays:
+                return None
+            week0 = self.start - datetime.timedelta(days=self.start.weekday())
+            first_week = [d for d in self.weekdays if d >= self.start.weekday()]
+            if n <= len(first_week):
+                return week0 + datetime.timedelta(days=first_week[n - 1])
+            periods, pos = divmod(n - len(first_week) - 1, len(self.weekdays))
+            return week0 + datetime.timedelta(weeks=(periods + 1) * self.interval, days=self.weekdays[pos])
+        first = self._raw_next(self.start)
+        if first is None:
+            return None
+        month0 = first.year * 12 + first.month - 1
+        cycle = self._month_cycle()
+        if cycle is None:
+            return self._month_day(month0 + (n - 1) * self.interval)
+        # Which months have the day repeats every cycle months, so count whole cycles then step within one.
+        steps = cycle // math.gcd(self.interval, cycle)
+        valid = [j for j in range(steps) if self._month_day(month0 + j * self.interval) is not None]
+        periods, pos = divmod(n - 1, len(valid))
+        return self._month_day(month0 + (periods * steps + valid[pos]) * self.interval)
+
+    def _month_cycle(self):
+        """Months after which the set of months having this rule's day repeats, or None if every month has it."""
+        if self.nth:
+            return None if abs(self.nth[0]) <= 4 else 4800
+        day = self.monthday or (self.start or RULE_EPOCH).day
+        if -28 <= day <= 28:
+            return None
+        # The 30th, 31st and 31st-from-last depend only on the month; the rest also on leap years (400 years).
+        return 12 if day in (30, 31, -31) else 4800
+
+    def _last_occurrence(self):
+        last = self.until
+        if self.count:
+            try:
+                nth = self._nth_raw(self.count)
+            except OverflowError:
+                nth = None
+            if nth is not None and (last is None or nth < last):
+                last = nth
+        return last
+
+    def next_on_or_after(self, day):
+        """The first occurrence on or after day, or None if the rule has ended."""
+        try:
+            while True:
+                found = self._raw_next(day)
+                if found is None or (self._last is not None and found > self._last):
+                    return None
+                i = bisect.bisect_left(self.exdates, found)
+                if i == len(self.exdates) or self.exdates[i] != found:
+                    return found
+                day = found + datetime.timedelta(days=1)
+        except OverflowError:
+            return None
+
+    def occurs_on(self, day):
+        return self.next_on_or_after(day) == day
+
+    def between(self, start_date, end_date):
+        """Yield occurrence dates from start_date to end_date inclusive."""
+        day = self.next_on_or_after(start_date)
+        while day is not None and day <= end_date:
+            yield day
+            if day == datetime.date.max:
+                return
+            day = self.next_on_or_after(day + datetime.timedelta(days=1))
+
+    def describe(self):
+        if self.freq == FREQ_NEVER:
+            return self.label
+        if self.freq == FREQ_ONCE:
+            return self.start.strftime("%a, %b %d, %Y") if self.start else "Once"
+        if self.freq == FREQ_DAILY:
+            text = "Daily" if self.interval == 1 else f"Every {self.interval} days"
+        elif self.freq == FREQ_WEEKLY:
+            if not self.weekdays:
+                return "Once"
+            names = {tuple(WEEKDAYS): "Weekdays", tuple(WEEKENDS): "Weekends", tuple(range(7)): "Daily"}.get(self.weekdays) or ", ".join(DAY_NAMES[d] for d in self.weekdays)
+            text = names if self.interval == 1 else f"Every {self.interval} weeks on {names}"
+        else:
+            if self.nth:
+                on = f"the {ORDINAL_NAMES.get(self.nth[0], self.nth[0])} {DAY_NAMES[self.nth[1]]}"
+            else:
+                day = self.monthday or (self.start or RULE_EPOCH).day
+                on = "the last day" if day == -1 else f"day {day}"
+            text = f"Monthly on {on}" if self.interval == 1 else f"Every {self.interval} months on {on}"
+        if self.until:
+            text += f" until {self.until.strftime('%b %d, %Y')}"
+        if self.count:
+            text += f", {self.count} times"
+        if self.exdates:
+            text += f" (skips {len(self.exdates)})"
+        return text
+
+    def to_rrule(self):
+        """The iCalendar RRULE value for this rule, or None for single dates."""
+        if self.freq not in (FREQ_DAILY, FREQ_WEEKLY, FREQ_MONTHLY) or (self.freq == FREQ_WEEKLY and not self.weekdays):
+            return None
+        parts = [f"FREQ={self.freq.upper()}"]
+        if self.interval > 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.freq == FREQ_WEEKLY:
+            parts.append("BYDAY=" + ",".join(ICS_WEEKDAYS[d] for d in self.weekdays))
+        elif self.freq == FREQ_MONTHLY:
+            if self.nth:
+                parts.append(f"BYDAY={self.nth[0]}{ICS_WEEKDAYS[self.nth[1]]}")
+            else:
+                parts.append(f"BYMONTHDAY={self.monthday or (self.start or RULE_EPOCH).day}")
+        if self.until:
+            parts.append(f"UNTIL={self.until.strftime('%Y%m%d')}")
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        return ";".join(parts)
+
+@functools.lru_cache(maxsize=RECURRENCE_RULE_CACHE_SIZE)
+def _compile_rule(rec_type, days, specific_date, spec_items):
+    try:
+        return _build_rule(rec_type, days, specific_date, dict(spec_items))
+    except (TypeError, ValueError):
+        return RecurrenceRule.never("Invalid Rule")
+
+def _build_rule(rec_type, days, specific_date, spec):
+    common = {
+        'start': _rule_date(spec.get('start')),
+        'interval': int(spec.get('interval') or 1),
+        'until': _rule_date(spec.get('until')),
+        'count': int(spec.get('count') or 0),
+        'exdates': [_rule_date(d) for d in spec.get('exdates', ())],
+    }
+    if rec_type == RECURRENCE_CUSTOM:
+        freq = spec.get('freq')
+        if freq not in (FREQ_DAILY, FREQ_WEEKLY, FREQ_MONTHLY):
+            return RecurrenceRule.never("Invalid Rule")
+        weekdays = spec.get('weekdays') or ((common['start'] or RULE_EPOCH).weekday(),)
+        return RecurrenceRule(freq, weekdays=weekdays, monthday=spec.get('monthday'), nth=spec.get('nth'), **common)
+    if rec_type == RECURRENCE_SPECIFIC_DATE:
+        if not specific_date:
+            return RecurrenceRule.never("Specific Date (Not Set)")
+        try:
+            common['start'] = _rule_date(specific_date)
+        except ValueError:
+            return RecurrenceRule.never("Invalid Date")
+        return RecurrenceRule(FREQ_ONCE, **common)
+    if rec_type == RECURRENCE_DAILY:
+        return RecurrenceRule(FREQ_DAILY, **common)
+    weekly_days = {RECURRENCE_WEEKDAYS: WEEKDAYS, RECURRENCE_WEEKENDS: WEEKENDS, "Specific Days": days}.get(rec_type)
+    if weekly_days is not None:
+        return RecurrenceRule(FREQ_WEEKLY, weekdays=weekly_days, **common)
+    common['start'] = None
+    return RecurrenceRule(FREQ_ONCE, **common)
+
+def _recurrence_key(alarm_data):
+    """The alarm's recurrence fields as a hashable tuple; equal keys mean the same rule."""
+    spec = alarm_data.get('recurrence') or {}
+    spec_items = tuple(sorted((k, tuple(tuple(x) if isinstance(x, (list, tuple)) else x for x in v) if isinstance(v, (list, tuple)) else v) for k, v in spec.items()))
+    return alarm_data.get('recurrence_type', RECURRENCE_ONCE), tuple(alarm_data.get('recurrence_days') or ()), alarm_data.get('specific_date'), spec_items
+
+def alarm_rule(alarm_data):
+    """The RecurrenceRule for an alarm. Rules are compiled once per distinct set of recurrence fields."""
+    return _compile_rule(*_recurrence_key(alarm_data))
+
+# --- Exclusion Calendars ---
+class ExclusionCalendar:
+    """A named set of dates to skip, such as public holidays or team off-days.
+
+    Fixed date ranges and yearly-repeating ones are kept as parsed. The first
+    lookup in a year compiles them into one bitset for that year (bit n set means
+    day n of the year is excluded), so every later is_excluded() is an index and
+    a shift.
+    """
+    def __init__(self, name, ranges=(), yearly=()):
+        self.name = name
+        self.ranges = tuple(ranges)
+        self.yearly = tuple(yearly)
+        self._years = {}
+        self._lock = threading.Lock()
+
+    def _compile_year(self, year):
+        year_start = datetime.date(year, 1, 1)
+        bits = 0
+        def mark(first, last):
+            nonlocal bits
+            first = max(first, year_start)
+            last = min(last, datetime.date(year, 12, 31))
+            if first <= last:
+                bits |= ((1 << ((last - first).days + 1)) - 1) << (first - year_start).days
+        for first, last in self.ranges:
+            mark(first, last)
+        for (month, day), length in self.yearly:
+            for y in (year - 1, year):
+                try:
+                    first = datetime.date(y, month, day)
+                except ValueError:
+                    continue
+                mark(first, first + datetime.timedelta(days=length - 1))
+        return year_start.toordinal(), bits
+
+    def is_excluded(self, date_obj):
+        compiled = self._years.get(date_obj.year)
+        if compiled is None:
+            with self._lock:
+                compiled = self._years.get(date_obj.year)
+                if compiled is None:
+                    compiled = self._years[date_obj.year] = self._compile_year(date_obj.year)
+        return (compiled[1] >> (date_obj.toordinal() - compiled[0])) & 1 == 1
+
+    def __len__(self):
+        return len(self.ranges) + len(self.yearly)
+
+def _calendar_date(text):
+    """Parse YYYY-MM-DD, or *-MM-DD for a date that repeats every year. Returns (date, yearly)."""
+    text = text.strip()
+    if text.startswith("*-"):
+        return datetime.datetime.strptime("2000" + text[1:], "%Y-%m-%d").date(), True
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date(), False
+
+def _add_calendar_range(first, last, yearly, ranges, yearly_ranges):
+    last = max(first, last)
+    if yearly:
+        yearly_ranges.append(((first.month, first.day), min((last - first).days + 1, 366)))
+    else:
+        ranges.append((first, last))
+
+def load_exclusion_calendar(path):
+    """Read a .ics (all-day or timed VEVENTs, RRULE FREQ=YEARLY) or .csv (date[,end][,name]) calendar file."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    ranges, yearly = [], []
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".ics"):
+            for line_number, event in iter_ics_records(f):
+                try:
+                    first = _parse_ics_datetime(event["DTSTART"][1], "DTSTART").date()
+                    last = first
+                    if "DTEND" in event:
+                        end_value = event["DTEND"][1].strip()
+                        end = _parse_ics_datetime(end_value, "DTEND")
+                        # All-day DTEND is exclusive; so is a timed end exactly at midnight.
+                        last = end.date() - datetime.timedelta(days=1) if len(end_value) == 8 or end.time() == datetime.time(0) else end.date()
+                    rrule = event.get("RRULE", ("", ""))[1].upper()
+                    _add_calendar_range(first, last, "FREQ=YEARLY" in rrule, ranges, yearly)
+                except (KeyError, AlarmImportError) as e:
+                    print(f"Skipping event at {name}:{line_number}: {e}")
+        else:
+            for line_number, row in enumerate(csv.reader(f), 1):
+                if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                    continue
+                try:
+                    first, is_yearly = _calendar_date(row[0])
+                    last = first
+                    if len(row) > 1 and row[1].strip() and row[1].strip()[0] in "*0123456789":
+                        last = _calendar_date(row[1])[0]
+                        if is_yearly:
+                            # A yearly range may run over New Year, e.g. *-12-31 to *-01-02.
+                            last = last.replace(year=first.year if (last.month, last.day) >= (first.month, first.day) else first.year + 1)
+                except ValueError:
+                    if line_number > 1:
+                        print(f"Skipping row {name}:{line_number}: invalid date '{row[0]}'")
+                    continue
+                _add_calendar_range(first, last, is_yearly, ranges, yearly)
+    return ExclusionCalendar(name, ranges, yearly)
+
+class ExclusionCalendars:
+    """The exclusion calendars found in a directory, keyed by file name without extension.
+
+    refresh() re-reads only files whose (mtime, size) changed and swaps the
+    name -> calendar map in as a whole, so lookups never take a lock.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self._refresh_lock = threading.Lock()
+        self._files = {}
+        self._calendars = {}
+
+    def refresh(self):
+        """Re-read changed calendar files. Returns True if any calendar was added, changed or removed."""
+        with self._refresh_lock:
+            found = {}
+            try:
+                if os.path.isdir(self.directory):
+                    with os.scandir(self.directory) as it:
+                        for entry in it:
+                            if entry.is_file() and entry.name.lower().endswith((".ics", ".csv")):
+                                found[entry.path] = _file_signature(entry.path)
+            except OSError as e:
+                print(f"Exclusion calendar scan error: {e}")
+            changed = set(found) != set(self._files)
+            files = {}
+            for path, signature in found.items():
+                previous = self._files.get(path)
+                if previous and previous[0] == signature:
+                    files[path] = previous
+                    continue
+                try:
+                    files[path] = (signature, load_exclusion_calendar(path))
+                    print(f"Loaded exclusion calendar '{files[path][1].name}' ({len(files[path][1])} entries)")
+                except (OSError, UnicodeDecodeError, csv.Error, AlarmImportError) as e:
+                    print(f"Err loading exclusion calendar {path}: {e}")
+                    continue
+                changed = True
+            self._files = files
+            self._calendars = {calendar.name: calendar for _, calendar in files.values()}
+            return changed
+
+    def paths(self):
+        return list(self._files)
+
+    def names(self):
+        return sorted(self._calendars)
+
+    def get(self, name):
+        return self._calendars.get(name)
+
+    def excludes(self, names, date_obj):
+        """True if date_obj is in any of the named calendars; unknown names are ignored."""
+        calendars = self._calendars
+        for name in names:
+            calendar = calendars.get(name)
+            if calendar is not None and calendar.is_excluded(date_obj):
+                return True
+        return False
+
+EXCLUSION_CALENDARS = ExclusionCalendars(EXCLUSION_CALENDARS_DIR)
+
+def alarm_excluded_on(alarm_data, date_obj, group=None):
+    """Whether date_obj is off for the alarm: outside its group's weekday schedule, or in one of the exclusion calendars it opted into."""
+    if group is not None and group.get('weekdays') and date_obj.weekday() not in group['weekdays']:
+        return True
+    names = alarm_data.get('exclusion_calendars')
+    return bool(names) and EXCLUSION_CALENDARS.excludes(names, date_obj)
+
+# --- Alarm Store ---
+def _freeze_value(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    if isinstance(value, dict) and not isinstance(value, FrozenAlarm):
+        return FrozenAlarm(value)
+    return value
+
+def _thaw_value(value):
+    if isinstance(value, tuple):
+        return [_thaw_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _thaw_value(v) for k, v in value.items()}
+    return value
+
+class FrozenAlarm(dict):
+    """A read-only alarm. Lists are stored as tuples; copy() returns a plain, mutable dict."""
+    __slots__ = ()
+
+    def __init__(self, data=()):
+        dict.__init__(self, ((k, _freeze_value(v)) for k, v in dict(data).items()))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Alarm snapshots are read-only; change alarms through AlarmStore")
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+    def copy(self):
+        return _thaw_value(self)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __reduce__(self):
+        return (FrozenAlarm, (dict(self),))
+
+    def replace(self, changes):
+        data = dict(self)
+        data.update(changes)
+        return FrozenAlarm(data)
+
+def with_alarm_fields(alarm, changes):
+    """A copy of alarm (frozen or plain) with changes applied."""
+    return alarm.replace(changes) if isinstance(alarm, FrozenAlarm) else dict(alarm, **changes)
+
+class AlarmSnapshot:
+    """One immutable, consistent version of the alarm list and its groups.
+
+    by_group maps each group id to the ids of its member alarms, so group
+    operations visit only the members instead of scanning every alarm.
+    """
+    __slots__ = ('alarms', 'by_id', 'positions', 'version', 'groups', 'groups_by_id', 'by_group')
+
+    def __init__(self, alarms, version, groups=()):
+        self.alarms = tuple(alarms)
+        self.groups = tuple(groups)
+        self.groups_by_id = MappingProxyType({g.get('id'): g for g in self.groups})
+        by_id, positions, by_group = {}, {}, defaultdict(list)
+        for i, alarm in enumerate(self.alarms):
+            by_id[alarm.get('id')] = alarm
+            positions[alarm.get('id')] = i
+            if alarm.get('group') in self.groups_by_id:
+                by_group[alarm['group']].append(alarm.get('id'))
+        self.by_id = MappingProxyType(by_id)
+        self.positions = MappingProxyType(positions)
+        self.by_group = MappingProxyType({gid: tuple(ids) for gid, ids in by_group.items()})
+        self.version = version
+
+    def group_of(self, alarm):
+        return self.groups_by_id.get(alarm.get('group'))
+
+    def members(self, group_id):
+        return self.by_group.get(group_id, ())
+
+    def __iter__(self):
+        return iter(self.alarms)
+
+    def __len__(self):
+        return len(self.alarms)
+
+    def get(self, alarm_id):
+        return self.by_id.get(alarm_id)
+
+class AlarmChangeSet:
+    """What one store transaction did: alarm ids added, removed and changed, whether the groups changed, and the resulting snapshot."""
+    __slots__ = ('added', 'removed', 'changed', 'groups_changed', 'snapshot', 'source')
+
+    def __init__(self, added, removed, changed, snapshot, source, groups_changed=False):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.groups_changed = groups_changed
+        self.snapshot = snapshot
+        self.source = source
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.groups_changed)
+
+    def ids(self):
+        return self.added + self.changed + self.removed
+
+class AlarmStore:
+    """Publishes the alarm list as copy-on-write snapshots.
+
+    Readers call snapshot() and get a consistent view without taking any lock;
+    the reference swap on publish is atomic. Writers are serialized by a single
+    lock that is held only while the new list is built, and the hold time of
+    every write is measured.
+
+    Groups are published in the same snapshot and changed with modify_groups().
+    Mutations made inside ``with store.batch():`` are applied to a working copy
+    and published together when the block exits (or discarded if it raises).
+    Each published transaction sets the change event once and is passed to
+    every subscriber as one AlarmChangeSet, on the writer's thread. source is a
+    free-form tag ("load", "scheduler", "external", ...) that subscribers can
+    use to decide what to refresh; scheduler writes do not set the change event.
+    """
+    def __init__(self, alarms=(), groups=()):
+        self._write_lock = threading.RLock()
+        self._snapshot = AlarmSnapshot((FrozenAlarm(a) for a in alarms), 0, (FrozenAlarm(g) for g in groups))
+        self._working = None
+        self._working_groups = None
+        self._listeners = []
+        self._changed = threading.Event()
+        self._writes = 0
+        self._last_hold_ms = 0.0
+        self._max_hold_ms = 0.0
+        self._total_hold_ms = 0.0
+
+    def snapshot(self):
+        return self._snapshot
+
+    def get(self, alarm_id):
+        return self._snapshot.get(alarm_id)
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def wait_for_change(self, timeout):
+        """Block until a transaction is published or timeout passes. Returns True if woken by a change."""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    @contextlib.contextmanager
+    def batch(self, source=None):
+        with self._write_lock:
+            if self._working is not None:
+                # Nested batch: fold into the enclosing transaction.
+                yield self
+                return
+            start = time.perf_counter()
+            base = self._snapshot
+            self._working = list(base.alarms)
+            self._working_groups = list(base.groups)
+            try:
+                yield self
+            finally:
+                alarms, self._working = self._working, None
+                groups, self._working_groups = self._working_groups, None
+            changes = self._publish(base, alarms, groups, source)
+            held_ms = (time.perf_counter() - start) * 1000
+            self._writes += 1
+            self._last_hold_ms = held_ms
+            self._max_hold_ms = max(self._max_hold_ms, held_ms)
+            self._total_hold_ms += held_ms
+        if held_ms > ALARM_STORE_SLOW_LOCK_MS:
+            print(f"Slow alarm store write: lock held {held_ms:.1f} ms")
+        if changes:
+            if source != "scheduler":
+                self._changed.set()
+            for callback in self._listeners:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    print(f"Alarm store listener error: {e}")
+
+    @staticmethod
+    def _same(items, previous):
+        return len(items) == len(previous) and all(a is b for a, b in zip(items, previous))
+
+    def _publish(self, base, alarms, groups, source):
+        groups_changed = not self._same(groups, base.groups)
+        if not groups_changed and self._same(alarms, base.alarms):
+            return AlarmChangeSet([], [], [], base, source)
+        frozen = [a if isinstance(a, FrozenAlarm) else FrozenAlarm(a) for a in alarms]
+        frozen_groups = [g if isinstance(g, FrozenAlarm) else FrozenAlarm(g) for g in groups]
+        snapshot = AlarmSnapshot(frozen, base.version + 1, frozen_groups)
+        added = [aid for aid in snapshot.by_id if aid not in base.by_id]
+        removed = [aid for aid in base.by_id if aid not in snapshot.by_id]
+        changed = [aid for aid, alarm in snapshot.by_id.items() if aid in base.by_id and base.by_id[aid] is not alarm]
+        self._snapshot = snapshot
+        return AlarmChangeSet(added, removed, changed, snapshot, source, groups_changed)
+
+    def modify(self, fn, source=None):
+        """Run fn(alarms) on the working list of the current (or a new) transaction.
+
+        fn may replace, append or remove entries (plain dicts are frozen on
+        publish). Its return value is passed back to the caller.
+        """
+        with self.batch(source):
+            return fn(self._working)
+
+    def modify_groups(self, fn, source=None):
+        """Like modify(), for the list of groups."""
+        with self.batch(source):
+            return fn(self._working_groups)
+
+    def replace_all(self, alarms, source=None, groups=None):
+        with self.batch(source):
+            self._working[:] = alarms
+            if groups is not None:
+                self._working_groups[:] = groups
+
+    def add(self, alarm, source=None):
+        self.modify(lambda current: current.append(alarm), source)
+
+    def remove(self, alarm_ids, source=None):
+        """Remove one id or an iterable of ids. Returns the number removed."""
+        ids = {alarm_ids} if isinstance(alarm_ids, str) else set(alarm_ids)
+        def _remove(alarms):
+            kept = [a for a in alarms if a.get('id') not in ids]
+            removed = len(alarms) - len(kept)
+            alarms[:] = kept
+            return removed
+        return self.modify(_remove, source)
+
+    def update_alarms(self, alarm_ids, fn, source=None):
+        """Replace each listed alarm with fn(alarm), visiting only those entries.
+
+        fn may return None (or the same alarm) to leave it unchanged. Unknown ids
+        are skipped. Returns the ids that changed.
+        """
+        with self.batch(source):
+            working = self._working
+            positions = self._snapshot.positions
+            fallback = None
+            updated = []
+            for alarm_id in alarm_ids:
+                i = positions.get(alarm_id)
+                if i is None or i >= len(working) or working[i].get('id') != alarm_id:
+                    # Earlier steps of this transaction moved entries; index the working list once.
+                    if fallback is None:
+                        fallback = {a.get('id'): n for n, a in enumerate(working)}
+                    i = fallback.get(alarm_id)
+                    if i is None:
+                        continue
+                new_alarm = fn(working[i])
+                if new_alarm is not None and new_alarm is not working[i]:
+                    working[i] = new_alarm
+                    updated.append(alarm_id)
+            return updated
+
+    def update_fields(self, changes_by_id, source=None):
+        """Apply {alarm_id: {field: value}} in one write; unknown ids are skipped."""
+        return self.update_alarms(list(changes_by_id), lambda alarm: with_alarm_fields(alarm, changes_by_id[alarm.get('id')]) if changes_by_id[alarm.get('id')] else None, source)
+
+    def stats(self):
+        with self._write_lock:
+            return {
+                'alarms': len(self._snapshot),
+                'groups': len(self._snapshot.groups),
+                'version': self._snapshot.version,
+                'writes': self._writes,
+                'last_hold_ms': self._last_hold_ms,
+                'avg_hold_ms': self._total_hold_ms / self._writes if self._writes else 0.0,
+                'max_hold_ms': self._max_hold_ms,
+            }
+
+def split_alarms_document(data):
+    """alarms.json holds a plain list of alarms or {"alarms": [...], "groups": [...]}. Returns (alarms, groups), or None if it is neither."""
+    if isinstance(data, list):
+        return [a for a in data if isinstance(a, dict)], []
+    if isinstance(data, dict) and isinstance(data.get('alarms', []), list) and isinstance(data.get('groups', []), list):
+        return [a for a in data.get('alarms', []) if isinstance(a, dict)], [g for g in data.get('groups', []) if isinstance(g, dict) and g.get('id')]
+    return None
+
+def alarms_document(snapshot):
+    """What gets saved: a plain list while there are no groups, so older versions can still read the file."""
+    if not snapshot.groups:
+        return list(snapshot)
+    return {'alarms': list(snapshot), 'groups': list(snapshot.groups)}
+
+# --- Next-Fire Index ---
+class NextFireIndex:
+    """A min-heap of (fire time, alarm id) over the alarm store, kept current from its change-sets.
+
+    A changed alarm pushes a fresh entry and its old one is dropped when it reaches the top,
+    so an edit costs O(log n). The first few entries are cached until the head changes, which
+    lets the window and the tray read the next alarms without walking the list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._fires = {}
+        self._snapshot = AlarmSnapshot((), 0)
+        self._upcoming = None
+        self._upcoming_limit = 0
+
+    def rebuild(self, snapshot, now):
+        with self._lock:
+            self._snapshot = snapshot
+            self._fires = {}
+            for alarm in snapshot:
+                fire = next_fire_time(alarm, now, snapshot.group_of(alarm))
+                if fire is not None:
+                    self._fires[alarm.get('id')] = fire
+            self._heap = [(fire, alarm_id) for alarm_id, fire in self._fires.items()]
+            heapq.heapify(self._heap)
+            self._upcoming = None
+
+    def apply(self, changes, now, limit=TRAY_UPCOMING_ALARMS):
+        """Fold a store change-set into the index. Returns True if the first limit entries changed."""
+        before = self.upcoming(now, limit)
+        if changes.groups_changed or len(changes.ids()) > ALARM_CHANGESET_FULL_REFRESH:
+            self.rebuild(changes.snapshot, now)
+        else:
+            with self._lock:
+                self._snapshot = changes.snapshot
+                for alarm_id in changes.removed:
+                    self._fires.pop(alarm_id, None)
+                for alarm_id in changes.added + changes.changed:
+                    self._update(alarm_id, now)
+                self._upcoming = None
+        return self.upcoming(now, limit) != before
+
+    def _update(self, alarm_id, now):
+        alarm = self._snapshot.get(alarm_id)
+        fire = next_fire_time(alarm, now, self._snapshot.group_of(alarm)) if alarm else None
+        if fire is None:
+            self._fires.pop(alarm_id, None)
+        elif self._fires.get(alarm_id) != fire:
+            self._fires[alarm_id] = fire
+            heapq.heappush(self._heap, (fire, alarm_id))
+            if len(self._heap) > 2 * len(self._fires) + ALARM_CHANGESET_FULL_REFRESH:
+                self._heap = [(f, aid) for aid, f in self._fires.items()]
+                heapq.heapify(self._heap)
+
+    def upcoming(self, now, limit=TRAY_UPCOMING_ALARMS):
+        """The next limit (fire time, alarm id) pairs, soonest first."""
+        with self._lock:
+            cached = self._upcoming is not None and self._upcoming_limit >= limit
+            if cached and (not self._upcoming or self._upcoming[0][0] > now):
+                return self._upcoming[:limit]
+            found = []
+            while self._heap and len(found) < limit:
+                fire, alarm_id = heapq.heappop(self._heap)
+                if self._fires.get(alarm_id) != fire:
+                    continue
+                if fire <= now:
+                    # Its time passed without a store write (e.g. it was already ringing); look again from now.
+                    del self._fires[alarm_id]
+                    self._update(alarm_id, now)
+                    continue
+                found.append((fire, alarm_id))
+            for entry in found:
+                heapq.heappush(self._heap, entry)
+            self._upcoming, self._upcoming_limit = found, limit
+            return found
+
+    def head(self, now):
+        upcoming = self.upcoming(now, 1)
+        return upcoming[0] if upcoming else None
+
+    def due(self, now):
+        """Ids of the alarms whose next fire time is at or before now."""
+        with self._lock:
+            found = []
+            while self._heap and self._heap[0][0] <= now:
+                fire, alarm_id = heapq.heappop(self._heap)
+                if self._fires.get(alarm_id) == fire:
+                    found.append((fire, alarm_id))
+            for entry in found:
+                heapq.heappush(self._heap, entry)
+            return [alarm_id for _, alarm_id in found]
+
+    def stats(self):
+        with self._lock:
+            return {'scheduled': len(self._fires), 'heap': len(self._heap)}
+
+# --- Scheduler ---
+def scheduler_pass(alarms, now, group_of=None, ringing=()):
+    """One scheduler decision at now: (ids to trigger, ids whose snooze ended, {id: field changes}).
+    Shared by the live scheduler and FiringSimulator, so a simulated run makes the same decisions."""
+    today = now.date()
+    current_date_str = now.strftime("%Y-%m-%d")
+    alarms_to_trigger, alarms_to_unsnooze = [], []
+    state_changes = defaultdict(dict)
+    for alarm in alarms:
+        alarm_id = alarm.get('id')
+        snooze_until_ts = alarm.get('snooze_until')
+        
+        if not alarm.get('enabled') or alarm_id in ringing: 
+            continue
+            
+        if snooze_until_ts and now < datetime.datetime.fromtimestamp(snooze_until_ts): 
+            continue
+        elif snooze_until_ts: 
+            alarms_to_unsnooze.append(alarm_id)
+            state_changes[alarm_id]['snooze_until'] = None
+            
+        alarm_hour, alarm_minute = alarm.get('hour', -1), alarm.get('minute', -1)
+        if now.hour != alarm_hour or now.minute != alarm_minute or now.second != 0: 
+            continue
+            
+        if alarm_occurs_on(alarm, today, group_of(alarm) if group_of else None): 
+            alarms_to_trigger.append(alarm_id)
+            state_changes[alarm_id]['last_triggered_day'] = current_date_str
+    return alarms_to_trigger, alarms_to_unsnooze, state_changes
+
+def dismissal_changes(alarm):
+    """Field changes for dismissing a ringing alarm: its snooze ends and a one-off is switched off."""
+    changes = {'snooze_until': None}
+    if alarm_rule(alarm).is_single:
+        changes['enabled'] = False
+    return changes
+
+class FiringSimulator:
+    """Replays the scheduler against a VirtualClock.
+
+    Rather than polling every half second, the clock jumps straight to the head of a
+    NextFireIndex and scheduler_pass() decides which of the alarms due then fire; its state
+    changes go back through an AlarmStore exactly as in the app. A year of alarms runs in
+    seconds and, for the same alarms and start time, always gives the same log. Alarms are
+    dismissed as soon as they ring, with the same dismissal_changes() as the Stop button.
+    """
+
+    def __init__(self, alarms, groups=(), start=None):
+        start = (start or CLOCK.now()).replace(microsecond=0)
+        self.clock = VirtualClock(start)
+        self.store = AlarmStore(alarms, groups)
+        self.index = NextFireIndex()
+        self.index.rebuild(self.store.snapshot(), start)
+        self.store.subscribe(lambda changes: self.index.apply(changes, self.clock.now()))
+        self.passes = 0
+
+    def run(self, end):
+        """Yield (time, event, alarm) for every trigger and snooze expiry up to end, in order."""
+        while True:
+            head = self.index.head(self.clock.now())
+            if head is None or head[0] > end:
+                return
+            self.clock.set(head[0])
+            now = self.clock.now()
+            snapshot = self.store.snapshot()
+            due = sorted((snapshot.positions[alarm_id], snapshot.get(alarm_id)) for alarm_id in self.index.due(now))
+            triggered, unsnoozed, state_changes = scheduler_pass([alarm for _, alarm in due], now, snapshot.group_of)
+            self.passes += 1
+            for _, alarm in due:
+                if alarm.get('id') in triggered or alarm.get('id') in unsnoozed:
+                    state_changes[alarm.get('id')].update(dismissal_changes(alarm))
+            if state_changes:
+                self.store.update_fields(state_changes, source='scheduler')
+            for _, alarm in due:
+                alarm_id = alarm.get('id')
+                if alarm_id in triggered:
+                    yield now, 'trigger', alarm
+                elif alarm_id in unsnoozed:
+                    yield now, 'unsnooze', alarm
+            if not state_changes:
+                # Nothing the scheduler does at this instant; look again from the next second.
+                self.clock.advance(1)
+
+def write_firing_log(events, fileobj):
+    """Write simulator events as tab-separated lines; returns the number written."""
+    count = 0
+    for when, event, alarm in events:
+        fileobj.write(f"{when:%Y-%m-%d %H:%M:%S}\t{event}\t{alarm.get('id')}\t{alarm.get('label', '')}\n")
+        count += 1
+    return count
+
+def run_simulation(argv):
+    """--simulate [--alarms PATH] [--start YYYY-MM-DD[THH:MM]] [--days N] [--output PATH]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="alarm_clock.py --simulate", description="Replay the alarm scheduler against a virtual clock.")
+    parser.add_argument("--simulate", action="store_true")
+    parser.add_argument("--alarms", default=ALARMS_FILE)
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat, default=None)
+    parser.add_argument("--days", type=int, default=DEFAULT_SIMULATION_DAYS)
+    parser.add_argument("--output", default=None)
+    args, _ = parser.parse_known_args(argv)
+    with open(args.alarms, 'r') as f:
+        document = split_alarms_document(json.load(f))
+    if document is None:
+        print(f"Err: Invalid {args.alarms}", file=sys.stderr)
+        return 1
+    EXCLUSION_CALENDARS.refresh()
+    simulator = FiringSimulator(document[0], document[1], args.start)
+    start = simulator.clock.now()
+    end = start + datetime.timedelta(days=args.days)
+    started = time.perf_counter()
+    # Diagnostics and timing go to stderr so the log itself can be diffed between versions.
+    with (open(args.output, 'w', encoding='utf-8') if args.output else contextlib.nullcontext(sys.stdout)) as out:
+        with contextlib.redirect_stdout(sys.stderr):
+            count = write_firing_log(simulator.run(end), out)
+    print(f"Simulated {args.days} days from {start:%Y-%m-%d %H:%M}: {count} events, {simulator.passes} scheduler passes "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+# --- Timing Wheel ---
+class WheelTimer:
+    """A handle returned by TimingWheel.schedule(); pass it to cancel()."""
+    __slots__ = ('deadline', 'callback', 'tick', 'slot')
+
+    def __init__(self, deadline, callback):
+        self.deadline = deadline
+        self.callback = callback
+        self.tick = None
+        self.slot = None
+
+class TimingWheel:
+    """A hierarchical timing wheel on a monotonic clock.
+
+    Level 0 has one slot per tick; each slot of level n spans a whole turn of level n-1.
+    A timer goes into the lowest level whose turn contains its tick, so schedule() and
+    cancel() are a dict insert and delete however many timers are pending. When level 0
+    wraps, the next slot of the level above is redistributed downwards, so each timer moves
+    at most once per level before it fires. Not thread-safe; TimerEngine serializes access.
+    """
+
+    def __init__(self, tick_s=TIMER_WHEEL_TICK_MS / 1000, slot_bits=TIMER_WHEEL_SLOT_BITS, levels=TIMER_WHEEL_LEVELS, clock=time.monotonic):
+        self.tick_s = tick_s
+        self.clock = clock
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._origin = clock()
+        self._current = 0  # the next tick to expire
+        self._wheels = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._level_counts = [0] * levels
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _tick_at(self, when):
+        # Rounded up, so a timer never fires before its deadline.
+        return math.ceil(round((when - self._origin) / self.tick_s, 6))
+
+    def _place(self, timer):
+        tick = max(timer.tick, self._current)
+        top = len(self._wheels) - 1
+        for level in range(top + 1):
+            shift = self._bits * (level + 1)
+            if level == top or tick >> shift == self._current >> shift:
+                break
+        span = 1 << (self._bits * (top + 1))
+        if tick - self._current >= span:
+            # Beyond one turn of the top wheel: park in the furthest slot and re-place when that comes round.
+            tick = self._current + span - 1
+        slot = self._wheels[level][(tick >> (self._bits * level)) & self._mask]
+        slot[timer] = level
+        timer.slot = slot
+        self._level_counts[level] += 1
+
+    def schedule(self, deadline, callback):
+        timer = WheelTimer(deadline, callback)
+        timer.tick = self._tick_at(deadline)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer.slot is None:
+            return False
+        self._level_counts[timer.slot.pop(timer)] -= 1
+        timer.slot = None
+        self._count -= 1
+        return True
+
+    def _cascade(self):
+        for level in range(len(self._wheels) - 1, 0, -1):
+            if self._current & ((1 << (self._bits * level)) - 1) == 0:
+                slot = self._wheels[level][(self._current >> (self._bits * level)) & self._mask]
+                timers = list(slot)
+                slot.clear()
+                self._level_counts[level] -= len(timers)
+                for timer in timers:
+                    self._place(timer)
+
+    def advance(self, now=None):
+        """Expire every tick up to now and return the timers that fell due, in deadline order."""
+        target = math.floor(round(((self.clock() if now is None else now) - self._origin) / self.tick_s, 6))
+        due = []
+        while self._current <= target and self._count:
+            self._cascade()
+            if not self._level_counts[0]:
+                # Nothing in level 0: jump to the next cascade that has timers instead of stepping empty slots.
+                self._current = min(target + 1, self._next_event_tick())
+                continue
+            slot = self._wheels[0][self._current & self._mask]
+            if slot:
+                self._level_counts[0] -= len(slot)
+                self._count -= len(slot)
+                for timer in slot:
+                    timer.slot = None
+                    due.append(timer)
+                slot.clear()
+            self._current += 1
+        if not self._count:
+            self._current = max(self._current, target + 1)
+        due.sort(key=lambda timer: timer.deadline)
+        return due
+
+    def _next_event_tick(self):
+        """The first tick from current with a level-0 slot to expire or a non-empty slot to cascade.
+        Assumes any cascade due at current itself has already run."""
+        if self._level_counts[0]:
+            for tick in range(self._current, (self._current | self._mask) + 1):
+                if self._wheels[0][tick & self._mask]:
+                    return tick
+        for level in range(1, len(self._wheels)):
+            if not self._level_counts[level]:
+                continue
+            # The lowest non-empty level cascades first; its slots are all ahead of current
+            # (for the top level, possibly in the next turn).
+            shift = self._bits * level
+            digit = (self._current >> shift) & self._mask
+            base = (self._current >> (shift + self._bits)) << (shift + self._bits)
+            for offset in range(1, self._mask + 2):
+                if self._wheels[level][(digit + offset) & self._mask]:
+                    return base + ((digit + offset) << shift)
+        return (self._current | self._mask) + 1
+
+    def next_deadline(self):
+        """When advance() next has work to do (a level-0 slot or a cascade with timers), or None when empty."""
+        if not self._count:
+            return None
+        if not self._current & self._mask:
+            # advance() stopped on a turn of level 0 and has not cascaded it yet.
+            return self._origin + self._current * self.tick_s
+        return self._origin + self._next_event_tick() * self.tick_s
+
+class TimerEngine:
+    """Runs a TimingWheel on a background thread and calls each timer's callback when it is due.
+
+    The thread sleeps until the wheel's next deadline, so it is idle when no timer is near.
+    Callbacks run on the engine thread and must hand UI work to Tk themselves.
+    """
+
+    def __init__(self, wheel=None):
+        self._wheel = wheel or TimingWheel()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._fired = 0
+        self._max_late_ms = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="TimerEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def schedule(self, delay_s, callback):
+        with self._cond:
+            timer = self._wheel.schedule(self._wheel.clock() + delay_s, callback)
+            self._cond.notify()
+        return timer
+
+    def cancel(self, timer):
+        with self._cond:
+            return self._wheel.cancel(timer)
+
+    def stats(self):
+        with self._cond:
+            return {'pending': len(self._wheel), 'fired': self._fired, 'max_late_ms': round(self._max_late_ms, 2)}
+
+    def _run(self):
+        clock = self._wheel.clock
+        while True:
+            with self._cond:
+                while self._running:
+                    deadline = self._wheel.next_deadline()
+                    if deadline is not None and deadline <= clock():
+                        break
+                    self._cond.wait(None if deadline is None else deadline - clock())
+                if not self._running:
+                    return
+                now = clock()
+                due = self._wheel.advance(now)
+                self._fired += len(due)
+                for timer in due:
+                    self._max_late_ms = max(self._max_late_ms, (now - timer.deadline) * 1000)
+            for timer in due:
+                try:
+                    timer.callback()
+                except Exception as e:
+                    print(f"Timer callback error: {e}")
+
+# --- Alarm Import/Export ---
+ICS_WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+RECURRENCE_ALIASES = {
+    "once": RECURRENCE_ONCE, "": RECURRENCE_ONCE, "daily": RECURRENCE_DAILY,
+    "weekdays": RECURRENCE_WEEKDAYS, "weekends": RECURRENCE_WEEKENDS,
+    "days": "Specific Days", "specific days": "Specific Days",
+    "date": RECURRENCE_SPECIFIC_DATE, "specific date": RECURRENCE_SPECIFIC_DATE,
+    "custom": RECURRENCE_CUSTOM,
+}
+PRIORITY_BY_NAME = {name.lower(): level for level, name in PRIORITY_NAMES.items()}
+
+class AlarmImportError(ValueError):
+    pass
+
+def _parse_days(text):
+    days = set()
+    for part in text.replace(';', ',').replace(' ', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if part.isdigit() and int(part) in range(7):
+            days.add(int(part))
+        elif part[:3].title() in DAY_NAMES:
+            days.add(DAY_NAMES.index(part[:3].title()))
+        elif part[:2].upper() in ICS_WEEKDAYS:
+            days.add(ICS_WEEKDAYS.index(part[:2].upper()))
+        else:
+            raise AlarmImportError(f"unknown day '{part}'")
+    return sorted(days)
+
+def parse_weekdays(text):
+    """Parse day lists such as "Mon-Fri", "Sat, Sun" or "0;2;4" into sorted weekday numbers."""
+    days = set()
+    for part in text.replace(';', ',').split(','):
+        if '-' in part:
+            ends = [_parse_days(end) for end in part.split('-', 1)]
+            if not all(len(end) == 1 for end in ends):
+                raise AlarmImportError(f"invalid day range '{part.strip()}'")
+            first, last = ends[0][0], ends[1][0]
+            days.update((first + k) % 7 for k in range((last - first) % 7 + 1))
+        else:
+            days.update(_parse_days(part))
+    return sorted(days)
+
+def _parse_date(text):
+    try:
+        return datetime.datetime.strptime(text.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise AlarmImportError(f"invalid date '{text}' (expected YYYY-MM-DD)")
+
+def _parse_bool(text, default=True):
+    text = (text or "").strip().lower()
+    if not text:
+        return default
+    if text in ("1", "true", "yes", "y", "on"):
+        return True
+    if text in ("0", "false", "no", "n", "off"):
+        return False
+    raise AlarmImportError(f"invalid enabled value '{text}'")
+
+def parse_csv_alarm(row):
+    """Turn one CSV row (a dict keyed by ALARM_CSV_FIELDS) into alarm data, raising AlarmImportError."""
+    time_text = (row.get("time") or "").strip()
+    try:
+        parsed = datetime.datetime.strptime(time_text.upper(), "%I:%M %p" if time_text.upper().endswith(("AM", "PM")) else "%H:%M")
+    except ValueError:
+        raise AlarmImportError(f"invalid time '{time_text}'")
+    recurrence_text = (row.get("recurrence") or "").strip()
+    recurrence_type = RECURRENCE_ALIASES.get(recurrence_text.lower(), recurrence_text)
+    if recurrence_type not in RECURRENCE_ALIASES.values():
+        raise AlarmImportError(f"unknown recurrence '{recurrence_text}'")
+    alarm = {
+        'hour': parsed.hour,
+        'minute': parsed.minute,
+        'label': (row.get("label") or "").strip(),
+        'recurrence_type': recurrence_type,
+        'recurrence_days': [],
+        'specific_date': None,
+        'sound_file': (row.get("sound") or "").strip() or None,
+        'enabled': _parse_bool(row.get("enabled")),
+        'priority': PRIORITY_NORMAL,
+    }
+    if recurrence_type == "Specific Days":
+        alarm['recurrence_days'] = _parse_days(row.get("days") or "")
+        if not alarm['recurrence_days']:
+            raise AlarmImportError("recurrence 'days' needs at least one day")
+    if recurrence_type == RECURRENCE_SPECIFIC_DATE:
+        alarm['specific_date'] = _parse_date(row.get("date") or "")
+    spec = {}
+    rrule_text = (row.get("rrule") or "").strip()
+    if rrule_text:
+        # An RRULE overrides the simple columns; "date" is then its first day.
+        date_text = (row.get("date") or "").strip()
+        start_date = datetime.datetime.strptime(_parse_date(date_text), "%Y-%m-%d").date() if date_text else CLOCK.today()
+        alarm['recurrence_type'], alarm['recurrence_days'], spec = recurrence_spec_from_rrule(rrule_text, start_date)
+        alarm['specific_date'] = None
+    elif recurrence_type == RECURRENCE_CUSTOM:
+        raise AlarmImportError("recurrence 'custom' needs an rrule")
+    exdates = [_parse_date(d) for d in (row.get("exdates") or "").replace(",", ";").split(";") if d.strip()]
+    if exdates:
+        spec['exdates'] = exdates
+    if spec:
+        alarm['recurrence'] = spec
+    calendars = [name.strip() for name in (row.get("calendars") or "").split(";") if name.strip()]
+    if calendars:
+        alarm['exclusion_calendars'] = calendars
+    priority_text = (row.get("priority") or "").strip().lower()
+    if priority_text:
+        if priority_text not in PRIORITY_BY_NAME:
+            raise AlarmImportError(f"unknown priority '{priority_text}'")
+        alarm['priority'] = PRIORITY_BY_NAME[priority_text]
+    return alarm
+
+def iter_csv_records(fileobj):
+    """Yield (row_number, row) pairs without reading the whole file."""
+    reader = csv.DictReader(fileobj)
+    if reader.fieldnames is None or "time" not in [f.strip().lower() for f in reader.fieldnames]:
+        raise AlarmImportError("CSV header must include a 'time' column")
+    for row in reader:
+        yield reader.line_num, {(k or "").strip().lower(): v for k, v in row.items()}
+
+def _iter_ics_lines(fileobj):
+    """Yield (line_number, unfolded_line); continuation lines start with a space or tab."""
+    pending, pending_no = None, 0
+    for number, raw in enumerate(fileobj, 1):
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending_no, pending
+        pending, pending_no = line, number
+    if pending is not None:
+        yield pending_no, pending
+
+def iter_ics_records(fileobj):
+    """Yield (line_number, event) for each VEVENT, where event maps property names to (params, value)."""
+    event, in_alarm, start_no = None, False, 0
+    for number, line in _iter_ics_lines(fileobj):
+        name, _, value = line.partition(":")
+        name, _, params = name.partition(";")
+        name = name.upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event, start_no = {}, number
+        elif event is None:
+            continue
+        elif name == "BEGIN" and value.upper() == "VALARM":
+            in_alarm = True
+        elif name == "END" and value.upper() == "VALARM":
+            in_alarm = False
+        elif name == "END" and value.upper() == "VEVENT":
+            yield start_no, event
+            event = None
+        elif in_alarm:
+            if name == "TRIGGER":
+                event.setdefault("VALARM-TRIGGER", (params, value))
+        elif name == "EXDATE" and name in event:
+            event[name] = (params, event[name][1] + "," + value)
+        else:
+            event.setdefault(name, (params, value))
+
+def _parse_ics_datetime(value, name):
+    value = value.strip()
+    is_utc = value.endswith("Z")
+    for fmt in ("%Y%m%dT%H%M%S", "%Y%m%dT%H%M", "%Y%m%d"):
+        try:
+            parsed = datetime.datetime.strptime(value.rstrip("Z"), fmt)
+        except ValueError:
+            continue
+        # UTC times are converted to local wall-clock time; TZID and floating times are taken as local.
+        return parsed.replace(tzinfo=datetime.timezone.utc).astimezone().replace(tzinfo=None) if is_utc else parsed
+    raise AlarmImportError(f"invalid {name} '{value}'")
+
+def _parse_ics_duration(value):
+    """Parse the TRIGGER durations we support: [+-]P[nD][T[nH][nM][nS]] or [+-]PnW."""
+    text = value.strip().upper()
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("+-")
+    if not text.startswith("P"):
+        raise AlarmImportError(f"unsupported TRIGGER '{value}'")
+    total, number, in_time = datetime.timedelta(), "", False
+    units = {"W": datetime.timedelta(weeks=1), "D": datetime.timedelta(days=1)}
+    time_units = {"H": datetime.timedelta(hours=1), "M": datetime.timedelta(minutes=1), "S": datetime.timedelta(seconds=1)}
+    for ch in text[1:]:
+        if ch == "T":
+            in_time = True
+        elif ch.isdigit():
+            number += ch
+        elif number and ch in (time_units if in_time else units):
+            total += int(number) * (time_units if in_time else units)[ch]
+            number = ""
+        else:
+            raise AlarmImportError(f"unsupported TRIGGER '{value}'")
+    return sign * total
+
+def parse_ics_alarm(event):
+    """Turn one VEVENT into alarm data. Supports DTSTART, SUMMARY, a relative VALARM TRIGGER, EXDATE and
+    RRULE FREQ=DAILY/WEEKLY/MONTHLY with INTERVAL, BYDAY, BYMONTHDAY, UNTIL and COUNT."""
+    if "DTSTART" not in event:
+        raise AlarmImportError("VEVENT has no DTSTART")
+    params, value = event["DTSTART"]
+    if "VALUE=DATE" in params.upper() or len(value.strip()) == 8:
+        raise AlarmImportError("all-day events have no alarm time")
+    start = _parse_ics_datetime(value, "DTSTART")
+    if "VALARM-TRIGGER" in event:
+        trigger_params, trigger = event["VALARM-TRIGGER"]
+        if "VALUE=DATE-TIME" in trigger_params.upper():
+            start = _parse_ics_datetime(trigger, "TRIGGER")
+        else:
+            start += _parse_ics_duration(trigger)
+    alarm = {
+        'hour': start.hour,
+        'minute': start.minute,
+        'label': event.get("SUMMARY", ("", ""))[1].replace("\\,", ",").replace("\\n", " ").strip(),
+        'recurrence_type': RECURRENCE_SPECIFIC_DATE,
+        'recurrence_days': [],
+        'specific_date': start.strftime("%Y-%m-%d"),
+        'sound_file': None,
+        'enabled': True,
+        'priority': PRIORITY_NORMAL,
+    }
+    if "RRULE" in event:
+        alarm['recurrence_type'], alarm['recurrence_days'], spec = recurrence_spec_from_rrule(event["RRULE"][1], start.date())
+        alarm['specific_date'] = None
+        if "EXDATE" in event:
+            spec['exdates'] = sorted({_parse_ics_datetime(d, "EXDATE").strftime("%Y-%m-%d") for d in event["EXDATE"][1].split(",") if d.strip()})
+        if spec:
+            alarm['recurrence'] = spec
+    return alarm
+
+def recurrence_spec_from_rrule(rrule, start_date):
+    """Turn an RRULE value into (recurrence_type, recurrence_days, recurrence spec) for an alarm starting on start_date."""
+    rule = dict(part.split("=", 1) for part in rrule.upper().split(";") if "=" in part)
+    freq = rule.get("FREQ", "").lower()
+    if freq not in (FREQ_DAILY, FREQ_WEEKLY, FREQ_MONTHLY):
+        raise AlarmImportError(f"unsupported RRULE FREQ '{rule.get('FREQ')}'")
+    spec = {'freq': freq, 'start': start_date.strftime("%Y-%m-%d")}
+    try:
+        if int(rule.get("INTERVAL") or 1) > 1:
+            spec['interval'] = int(rule["INTERVAL"])
+        if rule.get("COUNT"):
+            spec['count'] = int(rule["COUNT"])
+    except ValueError:
+        raise AlarmImportError(f"invalid RRULE '{rrule}'")
+    if rule.get("UNTIL"):
+        spec['until'] = _parse_ics_datetime(rule["UNTIL"], "RRULE UNTIL").strftime("%Y-%m-%d")
+    byday = rule.get("BYDAY", "")
+    if freq == FREQ_MONTHLY:
+        if byday:
+            ordinal, weekday = byday[:-2], byday[-2:]
+            if "," in byday or weekday not in ICS_WEEKDAYS or not ordinal.lstrip("+-").isdigit():
+                raise AlarmImportError(f"unsupported monthly BYDAY '{byday}'")
+            spec['nth'] = [int(ordinal), ICS_WEEKDAYS.index(weekday)]
+        else:
+            try:
+                spec['monthday'] = int(rule.get("BYMONTHDAY", start_date.day))
+            except ValueError:
+                raise AlarmImportError(f"invalid RRULE '{rrule}'")
+    elif byday or freq == FREQ_WEEKLY:
+        spec['weekdays'] = _parse_days(byday or ICS_WEEKDAYS[start_date.weekday()])
+        if freq == FREQ_DAILY:
+            spec['freq'] = FREQ_WEEKLY
+    # The plain types have no start date, so they only fit rules that have already begun.
+    if start_date > CLOCK.today():
+        return RECURRENCE_CUSTOM, [], spec
+    if spec['freq'] == FREQ_DAILY and len(spec) == 2:
+        return RECURRENCE_DAILY, [], {}
+    if spec['freq'] == FREQ_WEEKLY and len(spec) == 3:
+        days = spec['weekdays']
+        rec_type = {tuple(WEEKDAYS): RECURRENCE_WEEKDAYS, tuple(WEEKENDS): RECURRENCE_WEEKENDS, tuple(range(7)): RECURRENCE_DAILY}.get(tuple(days), "Specific Days")
+        return rec_type, days if rec_type == "Specific Days" else [], {}
+    return RECURRENCE_CUSTOM, [], spec
+
+def iter_alarm_imports(path):
+    """Stream (row_number, alarm, error) triples from a .csv or .ics file; exactly one of alarm and error is set."""
+    if path.lower().endswith(".ics"):
+        records, parse = iter_ics_records, parse_ics_alarm
+    else:
+        records, parse = iter_csv_records, parse_csv_alarm
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        for row_number, record in records(f):
+            try:
+                yield row_number, parse(record), None
+            except AlarmImportError as e:
+                yield row_number, None, str(e)
+
+def iter_alarm_occurrences(alarm, start_date, end_date, not_before=None, group=None):
+    """Yield the datetimes alarm fires between start_date and end_date inclusive, skipping any before not_before."""
+    if not alarm.get('enabled'):
+        return
+    fire_time = datetime.time(alarm.get('hour', 0), alarm.get('minute', 0))
+    rule = alarm_rule(alarm)
+    last_triggered = alarm.get('last_triggered_day')
+    for day in rule.between(start_date, end_date):
+        when = datetime.datetime.combine(day, fire_time)
+        if (rule.is_single and last_triggered == day.strftime("%Y-%m-%d")) or (not_before is not None and when < not_before) or alarm_excluded_on(alarm, day, group):
+            continue
+        yield when
+        if rule.is_single:
+            return
+
+def iter_occurrences(alarms, start_date, end_date, not_before=None, group_of=None):
+    """Merge every alarm's occurrences into one chronological stream of (datetime, alarm).
+
+    group_of(alarm) returns the alarm's group, whose schedule then applies."""
+    def tagged(index, alarm):
+        group = group_of(alarm) if group_of else None
+        for when in iter_alarm_occurrences(alarm, start_date, end_date, not_before, group):
+            yield when, index, alarm
+    for when, _, alarm in heapq.merge(*(tagged(i, alarm) for i, alarm in enumerate(alarms))):
+        yield when, alarm
+
+def _alarm_csv_row(alarm):
+    rec_type = alarm.get('recurrence_type', RECURRENCE_ONCE)
+    spec = alarm.get('recurrence') or {}
+    rule = alarm_rule(alarm)
+    return {
+        "time": f"{alarm.get('hour', 0):02}:{alarm.get('minute', 0):02}",
+        "label": alarm.get('label', ''),
+        "recurrence": next((alias for alias, value in RECURRENCE_ALIASES.items() if value == rec_type and alias), rec_type),
+        "days": ";".join(DAY_NAMES[d] for d in alarm.get('recurrence_days', []) if d in range(7)) if rec_type == "Specific Days" else "",
+        "date": (alarm.get('specific_date') or "") if rec_type == RECURRENCE_SPECIFIC_DATE else (spec.get('start') or "" if rec_type == RECURRENCE_CUSTOM else ""),
+        "sound": alarm.get('sound_file') or "",
+        "enabled": "yes" if alarm.get('enabled', True) else "no",
+        "priority": PRIORITY_NAMES.get(alarm.get('priority', PRIORITY_NORMAL), "Normal"),
+        "rrule": (rule.to_rrule() or "") if rec_type == RECURRENCE_CUSTOM else "",
+        "exdates": ";".join(spec.get('exdates', ())),
+        "calendars": ";".join(alarm.get('exclusion_calendars', ())),
+    }
+
+def _ics_text(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_event(uid, start, summary, rrule=None, exdates=()):
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
+             f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}", f"SUMMARY:{_ics_text(summary or 'Alarm')}"]
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    if exdates:
+        lines.append("EXDATE:" + ",".join(datetime.datetime.combine(d, start.time()).strftime('%Y%m%dT%H%M%S') for d in exdates))
+    lines += ["BEGIN:VALARM", "ACTION:DISPLAY", f"DESCRIPTION:{_ics_text(summary or 'Alarm')}", "TRIGGER:PT0S", "END:VALARM", "END:VEVENT"]
+    return "\r\n".join(lines) + "\r\n"
+
+def _alarm_ics_event(alarm, today):
+    rule = alarm_rule(alarm)
+    start = datetime.datetime.combine(rule.start or today, datetime.time(alarm.get('hour', 0), alarm.get('minute', 0)))
+    return _ics_event(f"{alarm.get('id') or uuid.uuid4()}@alarmclock", start, alarm.get('label'), rule.to_rrule(), rule.exdates)
+
+def write_alarms(alarms, fileobj, fmt):
+    """Stream alarm definitions to fileobj as 'csv' or 'ics'. Returns the number written."""
+    count = 0
+    if fmt == "ics":
+        fileobj.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Enhanced Alarm Clock//EN\r\n")
+        today = CLOCK.today()
+        for alarm in alarms:
+            fileobj.write(_alarm_ics_event(alarm, today))
+            count += 1
+        fileobj.write("END:VCALENDAR\r\n")
+    else:
+        writer = csv.DictWriter(fileobj, fieldnames=ALARM_CSV_FIELDS)
+        writer.writeheader()
+        for alarm in alarms:
+            writer.writerow(_alarm_csv_row(alarm))
+            count += 1
+    return count
+
+def write_occurrences(occurrences, fileobj, fmt):
+    """Stream (datetime, alarm) occurrences to fileobj as 'csv' or 'ics'. Returns the number written."""
+    count = 0
+    if fmt == "ics":
+        fileobj.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Enhanced Alarm Clock//EN\r\n")
+        for when, alarm in occurrences:
+            fileobj.write(_ics_event(f"{alarm.get('id')}-{when.strftime('%Y%m%dT%H%M')}@alarmclock", when, alarm.get('label')))
+            count += 1
+        fileobj.write("END:VCALENDAR\r\n")
+    else:
+        writer = csv.writer(fileobj)
+        writer.writerow(OCCURRENCE_CSV_FIELDS)
+        for when, alarm in occurrences:
+            writer.writerow([when.strftime("%Y-%m-%d %H:%M"), when.strftime("%H:%M"), alarm.get('label', ''), alarm.get('id', '')])
+            count += 1
+    return count
+
+# --- Background Persistence ---
+class PersistenceWorker:
+    """Writes JSON snapshots to disk on a dedicated thread.
+
+    Callers hand over data with submit(); a deep copy is taken immediately so the
+    caller is free to keep mutating its own structures. Repeated submits for the
+    same path before it is written are coalesced into one write of the newest
+    snapshot. Failures are passed to error_callback on the worker thread, so the
+    callback must marshal any UI work itself (e.g. via root.after). write_guard,
+    if given, is a context manager factory wrapped around each file write.
+    """
+    def __init__(self, error_callback=None, write_guard=None):
+        self.error_callback = error_callback
+        self.write_guard = write_guard
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self._errors = 0
+        self._coalesced = 0
+        self._last_latency_ms = 0.0
+        self._max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="PersistenceWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, data):
+        snapshot = copy.deepcopy(data)
+        with self._pending_lock:
+            already_queued = path in self._pending
+            self._pending[path] = snapshot
+        if already_queued:
+            with self._stats_lock:
+                self._coalesced += 1
+        else:
+            self._queue.put(path)
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has been written. Returns False on timeout."""
+        if not self._thread.is_alive():
+            return not self._pending
+        barrier = threading.Event()
+        self._queue.put(barrier)
+        return barrier.wait(timeout)
+
+    def stop(self, timeout=PERSISTENCE_FLUSH_TIMEOUT_S):
+        flushed = self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        return flushed
+
+    def stats(self):
+        with self._stats_lock:
+            avg = self._total_latency_ms / self._writes if self._writes else 0.0
+            return {
+                'queue_depth': self._queue.qsize(),
+                'writes': self._writes,
+                'errors': self._errors,
+                'coalesced': self._coalesced,
+                'last_latency_ms': self._last_latency_ms,
+                'avg_latency_ms': avg,
+                'max_latency_ms': self._max_latency_ms,
+            }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            with self._pending_lock:
+                snapshot = self._pending.pop(item)
+            self._write(item, snapshot)
+
+    def _write(self, path, snapshot):
+        start = time.perf_counter()
+        tmp_path = f"{path}.tmp"
+        guard = self.write_guard(path) if self.write_guard else contextlib.nullcontext()
+        try:
+            with guard:
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+        except Exception as e:
+            with self._stats_lock:
+                self._errors += 1
+            print(f"Err writing {path}: {e}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except OSError:
+                pass
+            if self.error_callback:
+                try:
+                    self.error_callback(path, e)
+                except Exception as cb_err:
+                    print(f"Persistence error callback failed: {cb_err}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._writes += 1
+            self._last_latency_ms = elapsed_ms
+            self._max_latency_ms = max(self._max_latency_ms, elapsed_ms)
+            self._total_latency_ms += elapsed_ms
+        if elapsed_ms > PERSISTENCE_SLOW_WRITE_MS:
+            print(f"Slow write: {path} took {elapsed_ms:.0f} ms")
+        else:
+            print(f"Saved {path} ({elapsed_ms:.1f} ms)")
+
+# --- Desktop Notifications ---
+class NotificationBackend(abc.ABC):
+    """Delivers a single desktop notification."""
+    @abc.abstractmethod
+    def notify(self, title, message, timeout):
+        """Show one notification; may block, since it runs on the dispatcher thread."""
+
+class PlyerNotificationBackend(NotificationBackend):
+    def __init__(self, app_name=NOTIFICATION_APP_NAME, app_icon=None):
+        self.app_name = app_name
+        self.app_icon = app_icon
+
+    def notify(self, title, message, timeout):
+        notification.notify(title=title, message=message, app_name=self.app_name, app_icon=self.app_icon, timeout=timeout)
+
+class StubNotificationBackend(NotificationBackend):
+    """Records notifications instead of showing them; delay_s simulates a slow backend."""
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.sent = []
+
+    def notify(self, title, message, timeout):
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        self.sent.append((title, message, timeout))
+
+class NotificationDispatcher:
+    """Sends notifications from a dedicated thread so a slow backend never blocks the caller.
+
+    At most max_queue notifications wait undelivered, including those held for
+    coalescing; beyond that new ones are dropped and counted rather than
+    blocking. Notifications submitted with the same coalesce_key within
+    NOTIFICATION_COALESCE_SECONDS of the first are merged into one summary
+    notification built by summarize(items); each key waits out its own window.
+    """
+    def __init__(self, backend, max_queue=NOTIFICATION_QUEUE_SIZE, coalesce_seconds=NOTIFICATION_COALESCE_SECONDS):
+        self.backend = backend
+        self.coalesce_seconds = coalesce_seconds
+        self.max_queue = max_queue
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._sent = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._max_latency_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="NotificationDispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, title, message, timeout=5, coalesce_key=None, summarize=None):
+        item = {'title': title, 'message': message, 'timeout': timeout,
+                'key': coalesce_key, 'summarize': summarize, 'queued_at': time.monotonic()}
+        with self._stats_lock:
+            # Counted until delivered, so items waiting to be coalesced still take up room.
+            accepted = self._pending < self.max_queue
+            if accepted:
+                self._pending += 1
+            else:
+                self._dropped += 1
+        if accepted:
+            self._queue.put_nowait(item)
+            return True
+        print(f"Notification queue full, dropped: {title}")
+        return False
+
+    def stop(self, timeout=1.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._pending,
+                'sent': self._sent,
+                'dropped': self._dropped,
+                'coalesced': self._coalesced,
+                'errors': self._errors,
+                'max_latency_ms': self._max_latency_ms,
+            }
+
+    def _run(self):
+        # Batches waiting out their coalescing window, by key, each due coalesce_seconds after its first item.
+        pending = {}
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(batch[0]['queued_at'] for batch in pending.values()) + self.coalesce_seconds - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                for key in list(pending):
+                    self._deliver(pending.pop(key))
+                break
+            if item:
+                if item['key'] is None:
+                    self._deliver([item])
+                else:
+                    pending.setdefault(item['key'], []).append(item)
+            now = time.monotonic()
+            for key in [key for key, batch in pending.items() if batch[0]['queued_at'] + self.coalesce_seconds <= now]:
+                self._deliver(pending.pop(key))
+
+    def _deliver(self, batch):
+        with self._stats_lock:
+            self._pending -= len(batch)
+        first = batch[0]
+        title, message = first['title'], first['message']
+        if len(batch) > 1:
+            if first['summarize']:
+                title, message = first['summarize'](batch)
+            else:
+                message = "\n".join(item['message'] for item in batch)
+        try:
+            self.backend.notify(title, message, max(item['timeout'] for item in batch))
+        except Exception as e:
+            with self._stats_lock:
+                self._errors += 1
+            print(f"Notify error: {e}")
+            return
+        latency_ms = (time.monotonic() - first['queued_at']) * 1000
+        with self._stats_lock:
+            self._sent += 1
+            self._coalesced += len(batch) - 1
+            self._max_latency_ms = max(self._max_latency_ms, latency_ms)
+
+# --- External File Watching ---
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+class FileWatcher:
+    """Detects external modifications to watched files.
+
+    Changes are detected by comparing (mtime, size) signatures on a polling
+    interval; when inotify_simple is installed the parent directories are also
+    watched so edits are picked up immediately instead of on the next poll.
+    Callbacks run on the watcher thread. Writes made by this process should be
+    wrapped in suppressed() so they are not reported back as external edits.
+    """
+    def __init__(self, poll_interval=FILE_WATCH_POLL_SECONDS):
+        self.poll_interval = poll_interval
+        self._watches = {}
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._watched_dirs = set()
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+            except OSError as e:
+                print(f"inotify unavailable, polling only: {e}")
+
+    def watch(self, path, callback):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._watches[path] = {'callback': callback, 'signature': _file_signature(path)}
+        directory = os.path.dirname(path)
+        if self._inotify and directory not in self._watched_dirs:
+            try:
+                mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+                self._inotify.add_watch(directory, mask)
+                self._watched_dirs.add(directory)
+            except OSError as e:
+                print(f"inotify watch failed for {directory}: {e}")
+
+    @contextlib.contextmanager
+    def suppressed(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._busy.add(path)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy.discard(path)
+                if path in self._watches:
+                    self._watches[path]['signature'] = _file_signature(path)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="FileWatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(self.poll_interval + 1)
+        if self._inotify:
+            try:
+                self._inotify.close()
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self._inotify:
+                try:
+                    if self._inotify.read(timeout=int(self.poll_interval * 1000)):
+                        # Editors often write in several steps; let the file settle.
+                        self._stop_event.wait(FILE_WATCH_SETTLE_SECONDS)
+                except OSError as e:
+                    print(f"inotify read error, falling back to polling: {e}")
+                    self._inotify = None
+            else:
+                self._stop_event.wait(self.poll_interval)
+            if not self._stop_event.is_set():
+                self._check()
+
+    def _check(self):
+        changed = []
+        with self._lock:
+            for path, watch in self._watches.items():
+                if path in self._busy:
+                    continue
+                signature = _file_signature(path)
+                if signature is not None and signature != watch['signature']:
+                    watch['signature'] = signature
+                    changed.append((path, watch['callback']))
+        for path, callback in changed:
+            print(f"External change detected: {path}")
+            try:
+                callback(path)
+            except Exception as e:
+                print(f"Watch callback error {path}: {e}")
+
+# --- Normalized Sound Store ---
+def _hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def mixer_format_tag(mixer_format):
+    if not mixer_format:
+        return None
+    frequency, sample_format, channels = mixer_format
+    return f"{frequency}-{sample_format}-{channels}"
+
+def normalized_pcm_path(directory, content_hash, mixer_tag):
+    return os.path.join(directory, f"{content_hash}-{mixer_tag}.pcm")
+
+def write_normalized_pcm(pcm_path, raw):
+    os.makedirs(os.path.dirname(pcm_path) or ".", exist_ok=True)
+    tmp_path = f"{pcm_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp_path, pcm_path)
+
+class NormalizedSoundStore:
+    """On-disk cache of sounds transcoded once to the mixer's PCM format.
+
+    PCM files are named by source content hash plus mixer format, so identical
+    files share one entry. The index maps each source path to the (mtime, size)
+    it was hashed at; a changed source is re-hashed and re-transcoded, and a
+    mixer running at a different format simply misses.
+    """
+    def __init__(self, directory=NORMALIZED_SOUNDS_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, NORMALIZED_INDEX_FILE)
+        self._lock = threading.Lock()
+        self._index = {}
+        try:
+            with open(self.index_path, 'r') as f:
+                self._index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Err loading normalized sound index: {e}")
+
+    def _mixer_tag(self):
+        return mixer_format_tag(pygame.mixer.get_init())
+
+    def _pcm_path(self, content_hash, mixer_tag):
+        return normalized_pcm_path(self.directory, content_hash, mixer_tag)
+
+    def _lookup(self, real_path, mixer_tag):
+        signature = _file_signature(real_path)
+        with self._lock:
+            entry = self._index.get(real_path)
+        if not entry or signature is None or list(signature) != entry.get('signature'):
+            return None
+        pcm_path = self._pcm_path(entry['hash'], mixer_tag)
+        return pcm_path if os.path.exists(pcm_path) else None
+
+    def pcm_path_for(self, path):
+        """The normalized PCM file for path at the current mixer format, or None on a miss."""
+        mixer_tag = self._mixer_tag()
+        return self._lookup(os.path.realpath(path), mixer_tag) if mixer_tag else None
+
+    def load(self, path):
+        """Return a Sound built from the normalized PCM for path, or None on a miss."""
+        mixer_tag = self._mixer_tag()
+        if not mixer_tag:
+            return None
+        pcm_path = self._lookup(os.path.realpath(path), mixer_tag)
+        if not pcm_path:
+            return None
+        try:
+            with open(pcm_path, 'rb') as f:
+                return pygame.mixer.Sound(buffer=f.read())
+        except Exception as e:
+            print(f"Err reading normalized sound {pcm_path}: {e}")
+            return None
+
+    def normalize(self, path):
+        """Transcode path to the mixer format if not already cached. Returns the PCM file path."""
+        mixer_tag = self._mixer_tag()
+        if not mixer_tag:
+            return None
+        real_path = os.path.realpath(path)
+        pcm_path = self._lookup(real_path, mixer_tag)
+        if pcm_path:
+            return pcm_path
+            
+        signature = _file_signature(real_path)
+        content_hash = _hash_file(real_path)
+        pcm_path = self._pcm_path(content_hash, mixer_tag)
+        if not os.path.exists(pcm_path):
+            start = time.perf_counter()
+            write_normalized_pcm(pcm_path, pygame.mixer.Sound(real_path).get_raw())
+            print(f"Normalized {os.path.basename(real_path)} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        self.record(real_path, signature, content_hash)
+        return pcm_path
+
+    def record(self, real_path, signature, content_hash):
+        """Register a PCM file written elsewhere (e.g. by an import worker) for real_path."""
+        with self._lock:
+            old = self._index.get(real_path)
+            self._index[real_path] = {'signature': list(signature) if signature else None, 'hash': content_hash}
+            if old and old.get('hash') != content_hash:
+                self._discard_unreferenced(old['hash'])
+            index_snapshot = dict(self._index)
+        self._save_index(index_snapshot)
+
+    def _discard_unreferenced(self, content_hash):
+        if any(entry.get('hash') == content_hash for entry in self._index.values()):
+            return
+        try:
+            for fname in os.listdir(self.directory):
+                if fname.startswith(f"{content_hash}-"):
+                    os.remove(os.path.join(self.directory, fname))
+        except OSError as e:
+            print(f"Err removing stale normalized sound: {e}")
+
+    def _save_index(self, index_snapshot):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(index_snapshot, f, indent=4)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Err saving normalized sound index: {e}")
+
+# --- Sound Import ---
+def import_sound_file(path, mixer_format, cache_dir, copy_to=None, normalize=True):
+    """Process-pool worker: decode, validate, measure and normalize one sound file.
+
+    Runs in a separate process with its own (silent) mixer, so a slow or broken
+    file never blocks the UI. Returns a plain dict the parent can act on.
+    """
+    result = {'path': path, 'ok': False, 'error': None, 'duration': 0.0, 'peak': None,
+              'hash': None, 'signature': None, 'imported_path': None}
+    try:
+        if not pygame.mixer.get_init():
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+            frequency, sample_format, channels = mixer_format
+            pygame.mixer.init(frequency=frequency, size=sample_format, channels=channels)
+        source_path = os.path.realpath(path)
+        sound = pygame.mixer.Sound(source_path)
+        raw = sound.get_raw()
+        result['duration'] = sound.get_length()
+        if mixer_format[1] == -16 and raw:
+            samples = array('h', raw[:len(raw) - len(raw) % 2])
+            result['peak'] = max(max(samples), -min(samples)) / 32768
+        if result['duration'] < MIN_SOUND_DURATION_S:
+            raise ValueError("Sound is empty or too short.")
+        if result['peak'] is not None and result['peak'] < SILENCE_PEAK_LEVEL:
+            raise ValueError("Sound is silent.")
+            
+        if copy_to:
+            os.makedirs(copy_to, exist_ok=True)
+            target_path = os.path.join(copy_to, os.path.basename(source_path))
+            if os.path.realpath(target_path) != source_path:
+                shutil.copy2(source_path, target_path)
+            source_path = os.path.realpath(target_path)
+            result['imported_path'] = source_path
+        if normalize:
+            result['signature'] = list(_file_signature(source_path))
+            result['hash'] = _hash_file(source_path)
+            pcm_path = normalized_pcm_path(cache_dir, result['hash'], mixer_format_tag(mixer_format))
+            if not os.path.exists(pcm_path):
+                write_normalized_pcm(pcm_path, raw)
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    return result
+
+class SoundImporter:
+    """Runs import_sound_file over a process pool and reports results on the Tk loop."""
+    def __init__(self, root, normalized_store, streaming_threshold_bytes):
+        self.root = root
+        self.normalized_store = normalized_store
+        self.streaming_threshold_bytes = streaming_threshold_bytes
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = max(1, min(MAX_IMPORT_WORKERS, os.cpu_count() or 1))
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def import_files(self, paths, on_result, copy_to=None):
+        """Import paths in parallel; on_result(result, done, total) is called on the Tk thread per file."""
+        mixer_format = pygame.mixer.get_init() or MIXER_FORMAT
+        total = len(paths)
+        done = [0]
+        
+        def deliver(result):
+            done[0] += 1
+            if result['ok'] and result['hash']:
+                registered_path = result['imported_path'] or os.path.realpath(result['path'])
+                self.normalized_store.record(registered_path, result['signature'], result['hash'])
+            on_result(result, done[0], total)
+            
+        def on_future_done(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'path': future_paths[future], 'ok': False, 'error': str(e)}
+            try:
+                self.root.after(0, lambda: deliver(result))
+            except (tk.TclError, RuntimeError):
+                pass
+                
+        future_paths = {}
+        executor = self._get_executor()
+        for path in paths:
+            try:
+                normalize = os.path.getsize(path) < self.streaming_threshold_bytes
+            except OSError:
+                normalize = False
+            future = executor.submit(import_sound_file, path, mixer_format, self.normalized_store.directory, copy_to, normalize)
+            future_paths[future] = path
+            future.add_done_callback(on_future_done)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# --- Sound Catalog ---
+def default_sound_sources(extra_dirs=()):
+    """(prefix, directory) pairs searched for alarm sounds. A None prefix means entries are identified by absolute path."""
+    sources = [("builtin:", resource_path(DEFAULT_SOUNDS_DIR)), ("user:", USER_SOUNDS_DIR)]
+    sources.extend((None, os.path.abspath(d)) for d in extra_dirs if d)
+    return sources
+
+class SoundEntry:
+    __slots__ = ('identifier', 'display_name', 'path', 'size', 'format', 'duration')
+
+    def __init__(self, identifier, display_name, path, size, sound_format, duration):
+        self.identifier = identifier
+        self.display_name = display_name
+        self.path = path
+        self.size = size
+        self.format = sound_format
+        self.duration = duration
+
+    def describe(self):
+        parts = [self.format.upper()]
+        if self.duration is not None:
+            minutes, seconds = divmod(int(round(self.duration)), 60)
+            parts.insert(0, f"{minutes}:{seconds:02}")
+        parts.append(f"{max(1, self.size // 1024)} KB")
+        return ", ".join(parts)
+
+class SoundCatalog:
+    """Index of the available alarm sounds, keyed by display name and by identifier.
+
+    Each source directory is listed once and only listed again when its mtime
+    changes, so lookups from the dialog and the trigger path never touch the
+    filesystem. refresh() may be called from any thread; the lookup tables are
+    rebuilt and swapped in as a whole, so readers never see a partial index.
+    """
+    def __init__(self, sources):
+        self._sources = list(sources)
+        self._refresh_lock = threading.Lock()
+        self._listings = {}
+        self._entries = ()
+        self._by_display = {}
+        self._by_identifier = {}
+
+    def set_sources(self, sources):
+        with self._refresh_lock:
+            self._sources = list(sources)
+        self.refresh()
+
+    def directories(self):
+        return [directory for _, directory in self._sources]
+
+    def refresh(self, force=False):
+        """Re-list directories whose mtime changed. Returns True if the catalog changed."""
+        with self._refresh_lock:
+            changed = False
+            for prefix, directory in self._sources:
+                signature = _file_signature(directory)
+                listing = self._listings.get(directory)
+                if not force and listing is not None and listing[0] == signature:
+                    continue
+                self._listings[directory] = (signature, self._scan(prefix, directory))
+                changed = True
+            stale = set(self._listings) - set(self.directories())
+            for directory in stale:
+                del self._listings[directory]
+            if changed or stale or force:
+                self._publish()
+            return changed or bool(stale)
+
+    def _scan(self, prefix, directory):
+        found = []
+        try:
+            if not os.path.isdir(directory):
+                return found
+            with os.scandir(directory) as it:
+                files = sorted((e for e in it if e.is_file() and e.name.lower().endswith(SOUND_FILE_EXTENSIONS)), key=lambda e: e.name)
+            for e in files:
+                identifier = f"{prefix}{e.name}" if prefix else os.path.abspath(e.path)
+                found.append((identifier, e.name, e.path, e.stat().st_size))
+        except OSError as ex:
+            print(f"Sound scan error: {ex}")
+        return found
+
+    @staticmethod
+    def _duration(path, sound_format):
+        if sound_format != "wav":
+            return None
+        try:
+            with wave.open(path, 'rb') as w:
+                return w.getnframes() / float(w.getframerate())
+        except (wave.Error, EOFError, OSError, ZeroDivisionError):
+            return None
+
+    def _publish(self):
+        previous = self._by_identifier
+        entries, by_display, by_identifier = [], {}, {}
+        for prefix, directory in self._sources:
+            for identifier, fname, path, size in self._listings.get(directory, (None, []))[1]:
+                display_name = fname.rsplit('.', 1)[0].replace('_', ' ')
+                if display_name in by_display:
+                    display_name = f"{display_name} ({os.path.basename(directory.rstrip(os.sep))})"
+                if display_name in by_display or identifier in by_identifier:
+                    continue
+                sound_format = fname.rsplit('.', 1)[-1].lower()
+                old = previous.get(identifier)
+                duration = old.duration if old and old.size == size else self._duration(path, sound_format)
+                entry = SoundEntry(identifier, display_name, path, size, sound_format, duration)
+                entries.append(entry)
+                by_display[display_name] = entry
+                by_identifier[identifier] = entry
+        self._entries, self._by_display, self._by_identifier = tuple(entries), by_display, by_identifier
+        print(f"Sound catalog: {len(entries)} sounds.")
+
+    def entries(self):
+        return self._entries
+
+    def display_names(self):
+        return [entry.display_name for entry in self._entries]
+
+    def get(self, identifier):
+        return self._by_identifier.get(identifier)
+
+    def lookup_display(self, display_name):
+        return self._by_display.get(display_name)
+
+    def resolve(self, identifier):
+        entry = self._by_identifier.get(identifier)
+        return entry.path if entry else None
+
+# --- Decoded Sound Cache ---
+class SoundCache:
+    """Shares decoded pygame Sounds across alarms, bounded by a byte budget.
+
+    Entries are keyed by (resolved path, mtime) so an edited file is decoded
+    afresh, and the least recently used entries are evicted once the decoded
+    PCM exceeds budget_bytes. Channels keep their own reference to a playing
+    Sound, so eviction never cuts off an alarm that is already ringing.
+    """
+    def __init__(self, budget_bytes=DEFAULT_SOUND_CACHE_MB * 1024 * 1024, normalized_store=None):
+        self.budget_bytes = budget_bytes
+        self.normalized_store = normalized_store
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, path):
+        """Return a decoded Sound for path, decoding it on a miss. Raises on unreadable files."""
+        real_path = os.path.realpath(path)
+        key = (real_path, os.stat(real_path).st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            
+        # Decode outside the lock so a slow file doesn't stall other lookups.
+        sound = self.normalized_store.load(real_path) if self.normalized_store else None
+        if sound is None:
+            sound = pygame.mixer.Sound(real_path)
+        nbytes = self._sound_nbytes(sound)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key][0]
+            stale_key = self._keys_by_path.get(real_path)
+            if stale_key is not None:
+                self._drop(stale_key)
+            if nbytes <= self.budget_bytes:
+                self._entries[key] = (sound, nbytes)
+                self._keys_by_path[real_path] = key
+                self._bytes += nbytes
+                self._evict_to_budget()
+            else:
+                print(f"Sound too large to cache ({nbytes // 1024} KiB): {real_path}")
+        return sound
+
+    def contains(self, path):
+        try:
+            real_path = os.path.realpath(path)
+            key = (real_path, os.stat(real_path).st_mtime_ns)
+        except OSError:
+            return False
+        with self._lock:
+            return key in self._entries
+
+    def set_budget(self, budget_bytes):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict_to_budget()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+            }
+
+    def _drop(self, key):
+        _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+        if self._keys_by_path.get(key[0]) == key:
+            del self._keys_by_path[key[0]]
+
+    def _evict_to_budget(self):
+        while self._bytes > self.budget_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self._evictions += 1
+            print(f"Evicted cached sound: {key[0]}")
+
+    @staticmethod
+    def _sound_nbytes(sound):
+        mixer_format = pygame.mixer.get_init()
+        if not mixer_format:
+            return 0
+        frequency, sample_format, channels = mixer_format
+        return int(sound.get_length() * frequency) * channels * (abs(sample_format) // 8)
+
+# --- Sound Pre-loading ---
+class SoundPreloader:
+    """Decodes sounds into a SoundCache on a background thread ahead of their fire time.
+
+    audio_lock, if given, is held around each decode so the mixer cannot be torn
+    down underneath it.
+    """
+    def __init__(self, sound_cache, resolve_path, audio_lock=None):
+        self.sound_cache = sound_cache
+        self.resolve_path = resolve_path
+        self.audio_lock = audio_lock or threading.RLock()
+        self._queue = queue.Queue()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._preloaded = 0
+        self._thread = threading.Thread(target=self._run, name="SoundPreloader", daemon=True)
+        self._thread.start()
+
+    def request(self, sound_identifier):
+        if not sound_identifier:
+            return
+        with self._lock:
+            if sound_identifier in self._in_flight:
+                return
+            self._in_flight.add(sound_identifier)
+        self._queue.put(sound_identifier)
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            sound_identifier = self._queue.get()
+            if sound_identifier is None:
+                break
+            try:
+                sound_path = self.resolve_path(sound_identifier)
+                with self.audio_lock:
+                    if sound_path and pygame.mixer.get_init() and not self.sound_cache.contains(sound_path):
+                        start = time.perf_counter()
+                        self.sound_cache.get(sound_path)
+                        self._preloaded += 1
+                        print(f"Pre-loaded {os.path.basename(sound_path)} in {(time.perf_counter() - start) * 1000:.0f} ms")
+            except Exception as e:
+                print(f"Pre-load error {sound_identifier}: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.discard(sound_identifier)
 
-# --- Constants ---
-# Light Theme Colors (Default)
-L_COLOR_BACKGROUND = "#F5F5F5"; L_COLOR_FRAME_BG = "#FFFFFF"; L_COLOR_TEXT = "#333333"
-L_COLOR_TEXT_SECONDARY = "#666666"; L_COLOR_ACCENT = "#0078D4"; L_COLOR_ACCENT_FG = "#FFFFFF"
-L_COLOR_SUCCESS = "#107C10"; L_COLOR_ERROR = "#D83B01"; L_COLOR_DISABLED = "#BDBDBD"
-L_COLOR_HIGHLIGHT = "#E0E0E0"; L_CAL_BG = "#DDEBF7"; L_CAL_FG = L_COLOR_TEXT
+# --- Streaming Playback ---
+class WavStream:
+    """Plays a long PCM WAV in fixed-size chunks queued on one mixer channel.
 
-# Dark Theme Colors
-D_COLOR_BACKGROUND = "#2D2D30"; D_COLOR_FRAME_BG = "#1E1E1E"; D_COLOR_TEXT = "#F1F1F1"
-D_COLOR_TEXT_SECONDARY = "#A0A0A0"; D_COLOR_ACCENT = "#007ACC"; D_COLOR_ACCENT_FG = "#FFFFFF"
-D_COLOR_SUCCESS = "#4CAF50"; D_COLOR_ERROR = "#F44336"; D_COLOR_DISABLED = "#6E6E6E"
-D_COLOR_HIGHLIGHT = "#4A4A4A"; D_CAL_BG = "#3C3C3C"; D_CAL_FG = D_COLOR_TEXT
+    Only two chunks are decoded at any time, so memory stays flat regardless of
+    file length. Exposes the subset of the Channel API the AudioController uses,
+    plus pump(), which the controller calls every tick to keep the queue fed.
+    """
+    def __init__(self, path, channel, loops=-1):
+        self.path = path
+        self.channel = channel
+        self.loops = loops
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._wav = self._open(path)
+        frequency, _, self._mixer_channels = pygame.mixer.get_init()
+        self._chunk_frames = int(frequency * STREAM_CHUNK_SECONDS)
+        self.channel.play(self._next_chunk())
+        self.pump()
 
-# Font Constants
-FONT_FAMILY_UI = "Segoe UI"; FONT_SIZE_BASE = 10; FONT_SIZE_LARGE = 12
-FONT_SIZE_XLARGE = 16; FONT_SIZE_CLOCK = 36
-FONT_SIZE_CLOCK_COMPACT = 28
+    @staticmethod
+    def _open(path):
+        return wave.open(path, 'rb')
 
-# Functionality Constants
-SETTINGS_FILE = "settings.json"; ALARMS_FILE = "alarms.json"; WORLD_CLOCKS_FILE = "world_clocks.json"
-RECURRENCE_ONCE = "Once"; RECURRENCE_DAILY = "Daily"; RECURRENCE_WEEKDAYS = "Weekdays (Mon-Fri)"
-RECURRENCE_WEEKENDS = "Weekends (Sat-Sun)"; RECURRENCE_SPECIFIC_DATE = "Specific Date"
-WEEKDAYS = [0, 1, 2, 3, 4]; WEEKENDS = [5, 6]; DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-DEFAULT_WORLD_CLOCK = "Asia/Manila"; DEFAULT_VOLUME = 0.7; DEFAULT_SNOOZE_MINUTES = 9
-FADE_IN_DURATION_MS = 5000; FADE_IN_STEPS = 20; DEFAULT_SOUNDS_DIR = "sounds"
-CALENDAR_EVENT_TAG = "alarm_event"
+    @staticmethod
+    def supports(path):
+        mixer_format = pygame.mixer.get_init()
+        if not mixer_format or mixer_format[1] != -16:
+            return False
+        try:
+            with wave.open(path, 'rb') as wav:
+                return (wav.getcomptype() == 'NONE' and wav.getsampwidth() == 2 and
+                        wav.getframerate() == mixer_format[0] and wav.getnchannels() in (1, mixer_format[2]))
+        except (wave.Error, EOFError, OSError):
+            return False
 
-# --- Helper Functions ---
-def resource_path(relative_path):
-    try: base_path = sys._MEIPASS
-    except AttributeError: base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+    def _next_chunk(self):
+        frames = self._wav.readframes(self._chunk_frames)
+        if not frames and self.loops != 0:
+            if self.loops > 0:
+                self.loops -= 1
+            self._wav.rewind()
+            frames = self._wav.readframes(self._chunk_frames)
+        if not frames:
+            return None
+        if self._wav.getnchannels() == 1 and self._mixer_channels == 2:
+            mono = array('h', frames)
+            stereo = array('h', bytes(len(frames) * 2))
+            stereo[0::2] = mono
+            stereo[1::2] = mono
+            frames = stereo.tobytes()
+        return pygame.mixer.Sound(buffer=frames)
 
-def format_alarm_time(hour, minute, time_format):
-    dt = datetime.time(hour, minute)
-    if time_format == "12h": return dt.strftime("%I:%M %p")
-    else: return dt.strftime("%H:%M")
+    def pump(self):
+        with self._lock:
+            if self._stopped or self.channel.get_queue() is not None:
+                return
+            chunk = self._next_chunk()
+            if chunk is not None:
+                self.channel.queue(chunk)
 
-def get_recurrence_display(alarm_data):
-    rec_type = alarm_data.get('recurrence_type', RECURRENCE_ONCE)
-    if rec_type == RECURRENCE_DAILY: return "Daily"
-    if rec_type == RECURRENCE_WEEKDAYS: return "Weekdays"
-    if rec_type == RECURRENCE_WEEKENDS: return "Weekends"
-    if rec_type == RECURRENCE_SPECIFIC_DATE:
-        date_str = alarm_data.get('specific_date')
-        if date_str:
-             try: return datetime.datetime.strptime(date_str, "%Y-%m-%d").strftime("%a, %b %d, %Y")
-             except ValueError: return "Invalid Date"
-        else: return "Specific Date (Not Set)"
-    if rec_type == "Specific Days":
-        days_idx = alarm_data.get('recurrence_days', [])
-        if not days_idx: return "Once"
-        selected_days = [DAY_NAMES[i] for i in sorted(days_idx)]
-        return ", ".join(selected_days)
-    return "Once"
+    def set_volume(self, volume):
+        self.channel.set_volume(volume)
+
+    def get_busy(self):
+        return not self._stopped and self.channel.get_busy()
+
+    def stop(self):
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self.channel.stop()
+            self._wav.close()
+
+class _RawPcmReader:
+    """The part of wave.Wave_read WavStream needs, over a headerless PCM file in the mixer format."""
+    def __init__(self, path):
+        _, sample_format, self._channels = pygame.mixer.get_init()
+        self._frame_bytes = self._channels * abs(sample_format) // 8
+        self._file = open(path, 'rb')
+
+    def getnchannels(self):
+        return self._channels
+
+    def readframes(self, frames):
+        return self._file.read(frames * self._frame_bytes)
+
+    def rewind(self):
+        self._file.seek(0)
+
+    def close(self):
+        self._file.close()
+
+class PcmStream(WavStream):
+    """Streams a normalized PCM file from the NormalizedSoundStore in chunks, like WavStream."""
+    _open = staticmethod(_RawPcmReader)
+
+class MusicStream:
+    """Streams any format SDL_mixer can decode through pygame.mixer.music.
+
+    The music stream is a single global slot, so only one alarm can use it at a
+    time; in_use tells callers to fall back to another playback path.
+    """
+    in_use = False
+
+    def __init__(self, path, loops=-1):
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.set_volume(0)
+        pygame.mixer.music.play(loops=loops)
+        MusicStream.in_use = True
+        self._stopped = False
+
+    def set_volume(self, volume):
+        if not self._stopped:
+            pygame.mixer.music.set_volume(volume)
+
+    def get_busy(self):
+        return not self._stopped and pygame.mixer.music.get_busy()
+
+    def stop(self):
+        if not self._stopped:
+            self._stopped = True
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+            MusicStream.in_use = False
+
+# --- Mixer Channel Allocation ---
+class ChannelManager:
+    """Hands out mixer channels to ringing alarms.
+
+    The pool starts at the mixer's current size and doubles on demand up to
+    limit. At the limit, an alarm whose sound is already playing joins that
+    channel instead of taking a new one, and otherwise may take over the
+    channel of a strictly lower-priority alarm. Each allocation is identified
+    by a voice key ("ch<index>") that the AudioController uses for its envelope.
+    """
+    def __init__(self, limit=DEFAULT_MAX_MIXER_CHANNELS):
+        self.limit = limit
+        self._owners = {}
+        self._index_by_alarm = {}
+        self._lock = threading.Lock()
+        self._peak_in_use = 0
+        self._grows = 0
+        self._shares = 0
+        self._steals = 0
+        self._failures = 0
+
+    def acquire(self, alarm_id, sound_key, priority=PRIORITY_NORMAL):
+        """Return (voice_key, channel, shared, evicted_voice) or None if nothing could be allocated.
+
+        When shared is True the sound is already playing on channel and the caller
+        must not start it again. evicted_voice names a voice whose channel was taken.
+        """
+        with self._lock:
+            index = self._find_free_index()
+            if index is None:
+                index = self._grow()
+            if index is None:
+                for owned_index, owner in self._owners.items():
+                    if owner['sound_key'] == sound_key:
+                        owner['alarms'].add(alarm_id)
+                        owner['priority'] = max(owner['priority'], priority)
+                        self._index_by_alarm[alarm_id] = owned_index
+                        self._shares += 1
+                        return self._voice_key(owned_index), owner['channel'], True, None
+                victim = min(self._owners.items(), key=lambda item: item[1]['priority'], default=None)
+                if victim is None or victim[1]['priority'] >= priority:
+                    self._failures += 1
+                    return None
+                index = victim[0]
+                for evicted_alarm in self._owners.pop(index)['alarms']:
+                    self._index_by_alarm.pop(evicted_alarm, None)
+                self._steals += 1
+                print(f"Channel {index} taken over by higher-priority alarm {alarm_id}")
+                evicted_voice = self._voice_key(index)
+            else:
+                evicted_voice = None
+            channel = pygame.mixer.Channel(index)
+            self._owners[index] = {'channel': channel, 'sound_key': sound_key, 'priority': priority, 'alarms': {alarm_id}}
+            self._index_by_alarm[alarm_id] = index
+            self._peak_in_use = max(self._peak_in_use, len(self._owners))
+            return self._voice_key(index), channel, False, evicted_voice
+
+    def release(self, alarm_id):
+        """Detach alarm_id from its channel. Returns the voice key to stop, or None if others still share it."""
+        with self._lock:
+            index = self._index_by_alarm.pop(alarm_id, None)
+            if index is None or index not in self._owners:
+                return None
+            owner = self._owners[index]
+            owner['alarms'].discard(alarm_id)
+            if owner['alarms']:
+                return None
+            del self._owners[index]
+            return self._voice_key(index)
+
+    def reset(self):
+        with self._lock:
+            self._owners.clear()
+            self._index_by_alarm.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': pygame.mixer.get_num_channels() if pygame.mixer.get_init() else 0,
+                'limit': self.limit,
+                'in_use': len(self._owners),
+                'peak_in_use': self._peak_in_use,
+                'alarms': len(self._index_by_alarm),
+                'grows': self._grows,
+                'shares': self._shares,
+                'steals': self._steals,
+                'failures': self._failures,
+            }
+
+    @staticmethod
+    def _voice_key(index):
+        return f"ch{index}"
+
+    def _find_free_index(self):
+        for index in range(pygame.mixer.get_num_channels()):
+            # A released channel may still be fading out, so check the mixer too.
+            if index not in self._owners and not pygame.mixer.Channel(index).get_busy():
+                return index
+        return None
+
+    def _grow(self):
+        size = pygame.mixer.get_num_channels()
+        if size >= self.limit:
+            return None
+        new_size = min(self.limit, max(size * 2, 1))
+        pygame.mixer.set_num_channels(new_size)
+        self._grows += 1
+        print(f"Mixer channels grown {size} -> {new_size}")
+        return self._find_free_index()
+
+# --- Audio Envelope Controller ---
+class AudioController:
+    """Drives the volume envelope of every ringing channel from one fixed-rate ticker.
+
+    Each voice gets a linear fade-in to its target volume, an optional escalation
+    towards full volume afterwards, and an optional fade-out when stopped. The
+    ticker runs on its own thread and never touches Tk, so envelopes keep moving
+    while the UI is busy. Voices are looked up by key or by channel in O(1).
+    """
+    def __init__(self, tick_ms=AUDIO_TICK_MS):
+        self.tick_s = tick_ms / 1000
+        self._voices = {}
+        self._key_by_channel = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="AudioController", daemon=True)
+        self._thread.start()
+
+    def start_voice(self, key, channel, target_volume, fade_in_ms=FADE_IN_DURATION_MS, escalate_ms=0):
+        channel.set_volume(0 if fade_in_ms > 0 else target_volume)
+        voice = {
+            'channel': channel,
+            'target': target_volume,
+            'started': time.monotonic(),
+            'fade_in_s': fade_in_ms / 1000,
+            'escalate_s': escalate_ms / 1000,
+            'fade_out_started': None,
+            'fade_out_s': 0.0,
+            'fade_out_from': 0.0,
+            'volume': 0.0,
+        }
+        with self._lock:
+            old = self._voices.pop(key, None)
+            if old:
+                self._key_by_channel.pop(old['channel'], None)
+            self._voices[key] = voice
+            self._key_by_channel[channel] = key
+        self._wake.set()
+
+    def stop_voice(self, key, fade_out_ms=0):
+        with self._lock:
+            voice = self._voices.get(key)
+            if voice is None:
+                return
+            if fade_out_ms > 0 and voice['channel'].get_busy():
+                if voice['fade_out_started'] is None:
+                    voice['fade_out_started'] = time.monotonic()
+                    voice['fade_out_s'] = fade_out_ms / 1000
+                    voice['fade_out_from'] = voice['volume']
+                self._wake.set()
+                return
+            self._remove(key)
+        self._stop_channel(voice['channel'])
+
+    def stop_all(self):
+        with self._lock:
+            voices = list(self._voices.values())
+            self._voices.clear()
+            self._key_by_channel.clear()
+        for voice in voices:
+            self._stop_channel(voice['channel'])
+
+    def set_target_volume(self, volume):
+        with self._lock:
+            for voice in self._voices.values():
+                voice['target'] = volume
+
+    def key_for_channel(self, channel):
+        with self._lock:
+            return self._key_by_channel.get(channel)
+
+    def active_count(self):
+        with self._lock:
+            return len(self._voices)
+
+    def shutdown(self):
+        self._running = False
+        self._wake.set()
+        self.stop_all()
+        self._thread.join(1.0)
+
+    def _remove(self, key):
+        voice = self._voices.pop(key)
+        self._key_by_channel.pop(voice['channel'], None)
+        return voice
+
+    @staticmethod
+    def _stop_channel(channel):
+        # Always stop, even when idle: streams release their file or the music slot in stop().
+        try:
+            channel.stop()
+        except Exception as e:
+            print(f"Error stopping channel: {e}")
+
+    def _envelope(self, voice, now):
+        if voice['fade_out_started'] is not None:
+            progress = (now - voice['fade_out_started']) / voice['fade_out_s']
+            return voice['fade_out_from'] * (1.0 - progress), progress >= 1.0
+        elapsed = now - voice['started']
+        if elapsed < voice['fade_in_s']:
+            return voice['target'] * elapsed / voice['fade_in_s'], False
+        if voice['escalate_s'] > 0:
+            progress = min(1.0, (elapsed - voice['fade_in_s']) / voice['escalate_s'])
+            return voice['target'] + (1.0 - voice['target']) * progress, False
+        return voice['target'], False
+
+    def _run(self):
+        while self._running:
+            with self._lock:
+                idle = not self._voices
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            self._tick(time.monotonic())
+            time.sleep(self.tick_s)
+
+    def _tick(self, now):
+        finished = []
+        with self._lock:
+            for key, voice in list(self._voices.items()):
+                channel = voice['channel']
+                try:
+                    if hasattr(channel, 'pump'):
+                        channel.pump()
+                    if not channel.get_busy():
+                        finished.append(self._remove(key))
+                        continue
+                    volume, done = self._envelope(voice, now)
+                    volume = max(0.0, min(1.0, volume))
+                    if done:
+                        finished.append(self._remove(key))
+                    elif abs(volume - voice['volume']) >= 0.001:
+                        channel.set_volume(volume)
+                        voice['volume'] = volume
+                except Exception as e:
+                    print(f"Audio tick error for {key}: {e}")
+                    finished.append(self._remove(key))
+        for voice in finished:
+            self._stop_channel(voice['channel'])
+
+# --- Timezone Search Index ---
+class TimezoneIndex:
+    """Search index over pytz's common time zones.
+
+    Every zone is indexed under its full name, city, region, country name and
+    code, and the abbreviations it uses in January and July (e.g. "PST"/"PDT").
+    Multi-word cities and countries are also indexed under their initials
+    ("ny", "uk"). Terms are kept in one sorted list so a prefix lookup is a
+    bisect; when the prefix matches are not enough a cheap subsequence match
+    fills the rest.
+    """
+    # Lower rank sorts first: a city match beats a country match beats a region match.
+    RANK_NAME, RANK_CITY, RANK_ABBREVIATION, RANK_COUNTRY, RANK_REGION = 0, 0, 1, 2, 3
+
+    def __init__(self):
+        start = time.perf_counter()
+        zones = sorted(pytz.common_timezones)
+        zone_set = set(zones)
+        countries = defaultdict(list)
+        for code, names in pytz.country_timezones.items():
+            for zone in names:
+                if zone in zone_set:
+                    countries[zone].append(code)
+        self.zones = zones
+        self.details = {}
+        entries, acronyms = [], []
+        for zone in zones:
+            parts = zone.split('/')
+            city = parts[-1].replace('_', ' ')
+            abbreviations = self._abbreviations(zone)
+            country_names = [pytz.country_names.get(code, code) for code in countries.get(zone, [])]
+            terms = [(zone.lower(), self.RANK_NAME), (city.lower(), self.RANK_CITY)]
+            terms.extend((word, self.RANK_CITY) for word in city.lower().split()[1:])
+            if len(parts) > 1:
+                terms.extend((region.replace('_', ' ').lower(), self.RANK_REGION) for region in parts[:-1])
+            for code, name in zip(countries.get(zone, []), country_names):
+                terms.append((name.lower(), self.RANK_COUNTRY))
+                terms.append((code.lower(), self.RANK_COUNTRY))
+            terms.extend((abbr.lower(), self.RANK_ABBREVIATION) for abbr in abbreviations)
+            entries.extend((term, rank, zone) for term, rank in set(terms))
+            for name, rank in [(city, self.RANK_CITY)] + [(name, self.RANK_COUNTRY) for name in country_names]:
+                words = name.replace('-', ' ').split()
+                if len(words) > 1:
+                    acronyms.append((''.join(word[0] for word in words).lower(), rank, zone))
+            self.details[zone] = ", ".join(country_names + sorted(abbreviations))
+        self._entries = sorted(entries + acronyms)
+        self._terms = [term for term, _, _ in self._entries]
+        self._zones_by_term = defaultdict(list)
+        # Initials are only for prefix lookup; they would match almost anything as subsequences.
+        for term, rank, zone in sorted(entries):
+            # Full "region/city" names are left to prefix search; they make fuzzy matching noisy.
+            if '/' not in term:
+                self._zones_by_term[term].append((rank, zone))
+        self.build_ms = (time.perf_counter() - start) * 1000
+        print(f"Timezone index: {len(zones)} zones, {len(self._entries)} terms in {self.build_ms:.0f} ms")
+
+    @staticmethod
+    def _abbreviations(zone):
+        tz = pytz.timezone(zone)
+        found = set()
+        for month in (1, 7):
+            try:
+                name = tz.localize(datetime.datetime(2024, month, 15, 12)).tzname()
+            except Exception:
+                continue
+            if name and name.isalpha() and name not in ("UTC", "GMT"):
+                found.add(name)
+        return found
+
+    def search(self, query, limit=TIMEZONE_SEARCH_LIMIT):
+        """Return up to limit zone names ranked by match quality."""
+        query = query.strip().lower()
+        if not query:
+            return self.zones[:limit] if limit else list(self.zones)
+        best = {}
+        
+        # Prefix matches: everything between query and query + highest code point.
+        lo = bisect.bisect_left(self._terms, query)
+        hi = bisect.bisect_right(self._terms, query + '\uffff')
+        for term, rank, zone in self._entries[lo:hi]:
+            score = (0 if term == query else 1, False, 0, rank, zone)
+            if zone not in best or score < best[zone]:
+                best[zone] = score
+                
+        # Fuzzy fill: terms containing the query's characters in order ("mnla" -> "manila"),
+        # ranked by how tightly they match and limited to reasonably tight spans.
+        if len(best) < limit and len(query) > 1:
+            max_span = len(query) * 2
+            for term, zones in self._zones_by_term.items():
+                start = term.find(query[0])
+                if start < 0:
+                    continue
+                pos = start + 1
+                for ch in query[1:]:
+                    pos = term.find(ch, pos) + 1
+                    if not pos:
+                        break
+                else:
+                    span = pos - start
+                    if span > max_span:
+                        continue
+                    # A match starting a word ("rio" in "la rioja") beats one starting mid-word.
+                    mid_word = start > 0 and term[start - 1] not in ' -'
+                    for rank, zone in zones:
+                        score = (2, mid_word, span, rank, zone)
+                        if zone not in best or score < best[zone]:
+                            best[zone] = score
+        return [zone for zone, _ in sorted(best.items(), key=lambda item: item[1])[:limit]]
+
+    def describe(self, zone):
+        detail = self.details.get(zone)
+        return f"{zone}  ({detail})" if detail else zone
+
+_timezone_index = None
+_timezone_index_lock = threading.Lock()
+
+def get_timezone_index():
+    """Build the timezone index on first use; later calls return the same instance."""
+    global _timezone_index
+    with _timezone_index_lock:
+        if _timezone_index is None:
+            _timezone_index = TimezoneIndex()
+        return _timezone_index
 
 # --- Main Application Class ---
 class AlarmClockApp:
@@ -77,14 +3391,18 @@ class AlarmClockApp:
         self.root = root
         self.root.title("Pro Alarm & World Clock")
         self.root.resizable(True, True)
-        self.alarms = []
-        self.alarm_lock = threading.Lock()
+        self.alarm_store = AlarmStore()
+        self.next_fires = NextFireIndex()
+        self.alarm_store.subscribe(self._on_alarms_changed)
         self.world_clocks = []
+        self.world_clocks_loaded = False
         self.world_clock_lock = threading.Lock()
         self.settings = {}
         self.running = True
         self.time_format = tk.StringVar(value="12h")
         self.current_time_var = tk.StringVar()
+        self.next_alarm_var = tk.StringVar(value="No upcoming alarms")
+        self._tray_upcoming = ()
         self.close_to_tray_var = tk.BooleanVar(value=True)
         self.ringing_alarms = {}
         self.currently_handled_ringing_id = None
@@ -95,145 +3413,180 @@ class AlarmClockApp:
         self.tray_icon = None
         self.tray_thread = None
         self.icon_path = resource_path("alarm_icon.ico")
+        self.file_watcher = FileWatcher()
+        self.persistence = PersistenceWorker(error_callback=self._on_persistence_error, write_guard=self.file_watcher.suppressed)
+        if os.environ.get("ALARM_CLOCK_NOTIFY_BACKEND") == "stub":
+            notification_backend = StubNotificationBackend()
+        else:
+            notification_backend = PlyerNotificationBackend(app_icon=self.icon_path)
+        self.notifications = NotificationDispatcher(notification_backend)
+        self._alarm_row_keys = {}
+        self._calendar_event_ids = defaultdict(list)
+        # Countdown timers run on a monotonic timing wheel, separate from the minute-granularity alarm scan.
+        self.timer_engine = TimerEngine()
+        self.timers = {}
+        self._stopwatch_started = None
+        self._stopwatch_elapsed = 0.0
+        self._stopwatch_laps = []
         
         try: 
             self.root.iconbitmap(self.icon_path)
         except Exception as e: 
             print(f"Warn: Icon load err: {e}")
             
-        try:
-            pygame.init()
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-            pygame.mixer.set_num_channels(16)
-            print(f"Pygame OK. Ch: {pygame.mixer.get_num_channels()}")
-        except pygame.error as e: 
-            messagebox.showerror("Audio Error", f"Pygame init fail: {e}\nSounds off.")
-            
-        self.load_settings()
+        # The mixer is opened lazily (see ensure_audio) and released again after an idle period.
+        self._audio_lock = threading.RLock()
+        self._audio_last_used = time.monotonic()
+        self._audio_error_reported = False
+            
+        with STARTUP_PROFILER.phase('load_settings'):
+            self.load_settings()
+        self.normalized_sounds = NormalizedSoundStore()
+        self.sound_catalog = SoundCatalog(default_sound_sources(self.settings.get('user_sound_dirs', [])))
+        self.sound_cache = SoundCache(int(self.settings.get('sound_cache_mb', DEFAULT_SOUND_CACHE_MB) * 1024 * 1024), self.normalized_sounds)
+        self.sound_preloader = SoundPreloader(self.sound_cache, self._resolve_sound_path, self._audio_lock)
+        self.sound_importer = SoundImporter(self.root, self.normalized_sounds, self.settings.get('streaming_threshold_mb', DEFAULT_STREAMING_THRESHOLD_MB) * 1024 * 1024)
+        self.audio = AudioController()
+        self.channel_manager = ChannelManager(self.settings.get('max_mixer_channels', DEFAULT_MAX_MIXER_CHANNELS))
+        self._last_preload_scan = 0.0
         self.root.configure(bg=self.BG_COLOR) # Load settings before styling/widgets
         self.style = ttk.Style()
-        self.setup_styles()
-        self.load_alarms()
-        self.load_world_clocks()
-        self.create_widgets()
+        self.theme_styles = ThemeStyleSets(self.style)
+        with STARTUP_PROFILER.phase('setup_styles'):
+            self.setup_styles()
+        with STARTUP_PROFILER.phase('load_alarms'):
+            self.load_alarms()
+        with STARTUP_PROFILER.phase('create_widgets'):
+            self.create_widgets()
         self.volume_var.trace_add("write", self.on_volume_change)
         self.snooze_duration_var.trace_add("write", self.on_snooze_change)
         self.theme_mode.trace_add("write", self.on_theme_change)
         self.compact_mode.trace_add("write", self.on_compact_mode_change)
         self.update_local_clock()
-        self.update_world_clocks_display()
+        self._next_alarm_tick()
         self.alarm_check_thread = threading.Thread(target=self.check_alarm_loop, daemon=True)
         self.alarm_check_thread.start()
-        self.setup_tray_icon()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.update_alarm_list_display()
-        self.update_calendar_events()
+        with STARTUP_PROFILER.phase('update_alarm_list_display'):
+            self.update_alarm_list_display()
         self.toggle_compact_mode(init=True) # Set initial size
+        self.file_watcher.watch(ALARMS_FILE, self._on_alarms_file_changed)
+        self.file_watcher.watch(WORLD_CLOCKS_FILE, self._on_world_clocks_file_changed)
+        for directory in self.sound_catalog.directories():
+            self.file_watcher.watch(directory, self._on_sound_dir_changed)
+        self.file_watcher.watch(EXCLUSION_CALENDARS_DIR, self._on_exclusion_calendars_changed)
+        self._watched_calendar_files = set()
+        self.file_watcher.start()
+        # Everything needing pytz, tkcalendar, pystray or PIL waits until the window is on screen.
+        self.root.bind('<Map>', self._on_first_map, add='+')
+
+    # --- Deferred Startup ---
+    def _on_first_map(self, event):
+        if event.widget is not self.root or STARTUP_PROFILER.first_frame_ms is not None:
+            return
+        STARTUP_PROFILER.mark_first_frame()
+        threading.Thread(target=self._warm_deferred_imports, name="ImportWarmup", daemon=True).start()
+
+    def _warm_deferred_imports(self):
+        self.sound_catalog.refresh()
+        self._on_exclusion_calendars_changed()
+        for module in DEFERRED_MODULES:
+            try:
+                module.load()
+            except Exception as e:
+                print(f"Deferred import failed: {e}")
+        try:
+            self.root.after(0, self._finish_deferred_startup)
+        except (tk.TclError, RuntimeError):
+            pass
+        try:
+            # Ready before the first "Add Timezone"; it is only built once per process.
+            get_timezone_index()
+        except Exception as e:
+            print(f"Timezone index failed: {e}")
+
+    def _finish_deferred_startup(self):
+        if not self.running:
+            return
+        if not self.world_clocks_loaded:
+            with STARTUP_PROFILER.phase('load_world_clocks'):
+                self.load_world_clocks()
+        with STARTUP_PROFILER.phase('create_alarm_date_picker'):
+            self.create_alarm_date_picker()
+        with STARTUP_PROFILER.phase('setup_tray_icon'):
+            self.setup_tray_icon()
+        STARTUP_PROFILER.report()
 
     # --- Theme Properties ---
+    # Colours come from the active palette; see THEME_PALETTES.
+    @property
+    def palette(self): 
+        return theme_palette(self.theme_mode.get())
+    
     @property
     def BG_COLOR(self): 
-        return D_COLOR_BACKGROUND if self.theme_mode.get() == 'dark' else L_COLOR_BACKGROUND
+        return self.palette['bg']
     
     @property
     def FRAME_BG(self): 
-        return D_COLOR_FRAME_BG if self.theme_mode.get() == 'dark' else L_COLOR_FRAME_BG
+        return self.palette['frame_bg']
     
     @property
     def TEXT_COLOR(self): 
-        return D_COLOR_TEXT if self.theme_mode.get() == 'dark' else L_COLOR_TEXT
+        return self.palette['text']
     
     @property
     def TEXT_SECONDARY(self): 
-        return D_COLOR_TEXT_SECONDARY if self.theme_mode.get() == 'dark' else L_COLOR_TEXT_SECONDARY
+        return self.palette['text_secondary']
     
     @property
     def ACCENT_COLOR(self): 
-        return D_COLOR_ACCENT if self.theme_mode.get() == 'dark' else L_COLOR_ACCENT
-    
-    @property
-    def ACCENT_FG(self): 
-        return D_COLOR_ACCENT_FG
+        return self.palette['accent']
     
     @property
     def DISABLED_COLOR(self): 
-        return D_COLOR_DISABLED if self.theme_mode.get() == 'dark' else L_COLOR_DISABLED
+        return self.palette['disabled']
     
     @property
     def ERROR_COLOR(self): 
-        return D_COLOR_ERROR if self.theme_mode.get() == 'dark' else L_COLOR_ERROR
+        return self.palette['error']
     
     @property
     def SUCCESS_COLOR(self): 
-        return D_COLOR_SUCCESS if self.theme_mode.get() == 'dark' else L_COLOR_SUCCESS
+        return self.palette['success']
     
     @property
     def CAL_BG(self): 
-        return D_CAL_BG if self.theme_mode.get() == 'dark' else L_CAL_BG
+        return self.palette['cal_bg']
     
     @property
     def CAL_FG(self): 
-        return D_CAL_FG if self.theme_mode.get() == 'dark' else L_CAL_FG
+        return self.palette['cal_fg']
+    
+    @property
+    def ACCENT_FG(self): 
+        return self.palette['accent_fg']
 
     def setup_styles(self):
-        mode = self.theme_mode.get()
-        try: 
-            self.style.theme_use('clam')
-        except tk.TclError:
-            try: 
-                self.style.theme_use('vista')
-            except tk.TclError: 
-                self.style.theme_use('default')
-                
-        self.style.configure('.', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('TFrame', background=self.BG_COLOR)
-        self.style.configure('TLabel', background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('TRadiobutton', background=self.BG_COLOR, foreground=self.TEXT_COLOR, indicatorcolor=self.FRAME_BG)
-        self.style.map('TRadiobutton', background=[('active', self.FRAME_BG)])
-        self.style.configure('TCheckbutton', background=self.BG_COLOR, foreground=self.TEXT_COLOR, indicatorcolor=self.FRAME_BG)
-        self.style.map('TCheckbutton', background=[('active', self.FRAME_BG)])
-        self.style.configure('TNotebook', background=self.BG_COLOR, borderwidth=0, tabmargins=[2, 5, 2, 0])
-        self.style.configure('TNotebook.Tab', font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), padding=[10, 5], background=self.BG_COLOR, foreground=self.TEXT_SECONDARY, borderwidth=0)
-        self.style.map('TNotebook.Tab', background=[('selected', self.FRAME_BG)], foreground=[('selected', self.ACCENT_COLOR)])
-        self.style.configure('TButton', font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), padding=(10, 6), relief=tk.FLAT, borderwidth=0, background=self.ACCENT_COLOR, foreground=self.ACCENT_FG)
-        self.style.map('TButton', background=[('active', '#005A9E' if mode == 'light' else '#1F8DCD'), ('disabled', self.DISABLED_COLOR)], foreground=[('disabled', self.TEXT_SECONDARY)])
-        self.style.configure('Secondary.TButton', background=self.TEXT_SECONDARY, foreground=self.ACCENT_FG)
-        self.style.map('Secondary.TButton', background=[('active', '#505050' if mode == 'light' else '#7A7A7A'), ('disabled', self.DISABLED_COLOR)])
-        self.style.configure('TSpinbox', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), padding=(5, 5), relief=tk.FLAT, borderwidth=1, bordercolor=self.DISABLED_COLOR, fieldbackground=self.FRAME_BG, foreground=self.TEXT_COLOR, arrowcolor=self.TEXT_COLOR)
-        self.style.map('TSpinbox', bordercolor=[('focus', self.ACCENT_COLOR)])
-        self.style.configure('TEntry', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), padding=(5, 5), relief=tk.FLAT, borderwidth=1, bordercolor=self.DISABLED_COLOR, fieldbackground=self.FRAME_BG, foreground=self.TEXT_COLOR)
-        self.style.map('TEntry', bordercolor=[('focus', self.ACCENT_COLOR)], fieldbackground=[('readonly', self.BG_COLOR)])
-        self.style.configure('Horizontal.TScale', background=self.BG_COLOR, troughcolor=self.FRAME_BG)
-        self.style.map('Horizontal.TScale', background=[('active', self.ACCENT_COLOR)])
-        self.style.configure("Treeview", rowheight=25, fieldbackground=self.FRAME_BG, background=self.FRAME_BG, foreground=self.TEXT_COLOR, relief=tk.FLAT, borderwidth=0)
-        self.style.configure("Treeview.Heading", font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), background=self.ACCENT_COLOR, foreground=self.ACCENT_FG, relief=tk.FLAT)
-        self.style.map("Treeview.Heading", background=[('active', self.ACCENT_COLOR)])
-        self.style.configure("ringing.Treeview", background=self.ERROR_COLOR, foreground='white')
-        self.style.configure("disabled.Treeview", foreground=self.DISABLED_COLOR)
-        clock_font_size = FONT_SIZE_CLOCK_COMPACT if self.compact_mode.get() else FONT_SIZE_CLOCK
-        self.style.configure('Clock.TLabel', font=(FONT_FAMILY_UI, clock_font_size, 'bold'), foreground=self.TEXT_COLOR, background=self.BG_COLOR)
-        self.style.configure('Status.TLabel', font=(FONT_FAMILY_UI, FONT_SIZE_LARGE), background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('WorldClockTime.TLabel', font=(FONT_FAMILY_UI, FONT_SIZE_XLARGE), background=self.FRAME_BG, foreground=self.TEXT_COLOR)
-        self.style.configure('WorldClockZone.TLabel', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), background=self.FRAME_BG, foreground=self.TEXT_SECONDARY)
-        self.style.configure('CalendarDate.TLabel', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), background=self.BG_COLOR, foreground=self.TEXT_SECONDARY)
-
-    def apply_theme_to_widgets(self, widget):
-        bg_color = self.BG_COLOR
-        fg_color = self.TEXT_COLOR
+        return self.theme_styles.apply(self.theme_mode.get())
+
+    def refresh_theme_colors(self):
+        """Recolour the few widgets that are not ttk-styled: the root window, tree tags and tkcalendar widgets."""
+        palette = self.palette
         try:
-             if isinstance(widget, (tk.Toplevel, tk.Frame, tk.LabelFrame, tk.Label, tk.Radiobutton, tk.Checkbutton)):
-                  widget.configure(background=bg_color)
-                  if not isinstance(widget, (tk.Toplevel, tk.Frame, tk.LabelFrame)):
-                      try: 
-                          widget.configure(foreground=fg_color)
-                      except tk.TclError: 
-                          pass
-             for child in widget.winfo_children(): 
-                 self.apply_theme_to_widgets(child)
+            self.root.configure(bg=palette['bg'])
+            self.ringing_status_label.configure(foreground=palette['error'])
+            self.alarm_tree.tag_configure("ringing", background=palette['error'])
+            self.alarm_tree.tag_configure("disabled", foreground=palette['disabled'])
+            if hasattr(self, 'wc_tree'):
+                self.wc_tree.tag_configure("WorldClock", background=palette['frame_bg'], foreground=palette['text'])
+            if hasattr(self, 'alarm_date_picker'):
+                self.alarm_date_picker.configure(**date_entry_theme_options(palette))
+            if hasattr(self, 'calendar'):
+                self.calendar.configure(**calendar_theme_options(palette))
+                self.calendar.tag_config(CALENDAR_EVENT_TAG, background=palette['cal_bg'], foreground=palette['cal_fg'])
         except tk.TclError: 
             pass
-        except Exception as e: 
-            print(f"Theme apply err {widget}: {e}")
 
     def create_widgets(self):
         self.top_frame = ttk.Frame(self.root)
@@ -241,6 +3594,7 @@ class AlarmClockApp:
         
         self.clock_label = ttk.Label(self.top_frame, textvariable=self.current_time_var, style='Clock.TLabel', anchor=tk.CENTER)
         self.clock_label.pack(pady=(0, 5))
+        ttk.Label(self.top_frame, textvariable=self.next_alarm_var, style='Status.TLabel', anchor=tk.CENTER).pack(pady=(0, 5))
         
         self.format_frame = ttk.Frame(self.top_frame)
         self.format_frame.pack()
@@ -253,18 +3607,21 @@ class AlarmClockApp:
         self.alarm_tab_frame = ttk.Frame(self.notebook, padding="10")
         self.world_clock_tab_frame = ttk.Frame(self.notebook, padding="10")
         self.calendar_tab_frame = ttk.Frame(self.notebook, padding="10")
+        self.timers_tab_frame = ttk.Frame(self.notebook, padding="10")
         
         self.alarm_tab_frame.pack(fill=tk.BOTH, expand=True)
         self.world_clock_tab_frame.pack(fill=tk.BOTH, expand=True)
         self.calendar_tab_frame.pack(fill=tk.BOTH, expand=True)
+        self.timers_tab_frame.pack(fill=tk.BOTH, expand=True)
         
         self.notebook.add(self.alarm_tab_frame, text=' Alarms ')
         self.notebook.add(self.world_clock_tab_frame, text=' World Clock ')
         self.notebook.add(self.calendar_tab_frame, text=' Calendar ')
+        self.notebook.add(self.timers_tab_frame, text=' Timers ')
         
         self.create_alarm_tab_widgets(self.alarm_tab_frame)
-        self.create_world_clock_tab_widgets(self.world_clock_tab_frame)
-        self.create_calendar_tab_widgets(self.calendar_tab_frame)
+        # The World Clock, Calendar and Timers tabs are built the first time they are shown.
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         self.bottom_frame = ttk.Frame(self.root, padding="10 5")
         self.bottom_frame.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=(0, 10))
@@ -311,33 +3668,41 @@ class AlarmClockApp:
         self.edit_button.pack(side=tk.LEFT, padx=5)
         self.delete_button = ttk.Button(buttons_frame, text="Delete Selected", state=tk.DISABLED, style='Secondary.TButton', command=self.delete_selected_alarm)
         self.delete_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Import...", style='Secondary.TButton', command=self.import_alarms_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Export...", style='Secondary.TButton', command=self.export_alarms_dialog).pack(side=tk.LEFT, padx=5)
+        
+        # Bulk actions apply to every selected row (Ctrl/Shift-click to select several)
+        bulk_frame = ttk.Frame(parent_frame)
+        bulk_frame.pack(pady=(0, 5), fill=tk.X)
+        ttk.Label(bulk_frame, text="With selected:").pack(side=tk.LEFT, padx=5)
+        self.bulk_buttons = (
+            ttk.Button(bulk_frame, text="Enable", state=tk.DISABLED, command=lambda: self.enable_selected_alarms(True)),
+            ttk.Button(bulk_frame, text="Disable", state=tk.DISABLED, style='Secondary.TButton', command=lambda: self.enable_selected_alarms(False)),
+            ttk.Button(bulk_frame, text=f"-{BULK_SHIFT_MINUTES} min", state=tk.DISABLED, style='Secondary.TButton', command=lambda: self.shift_selected_alarms(-BULK_SHIFT_MINUTES)),
+            ttk.Button(bulk_frame, text=f"+{BULK_SHIFT_MINUTES} min", state=tk.DISABLED, style='Secondary.TButton', command=lambda: self.shift_selected_alarms(BULK_SHIFT_MINUTES)),
+            ttk.Button(bulk_frame, text="Snooze", state=tk.DISABLED, style='Secondary.TButton', command=self.snooze_selected_alarms),
+            ttk.Button(bulk_frame, text="Group...", state=tk.DISABLED, style='Secondary.TButton', command=self.group_selected_alarms),
+        )
+        for button in self.bulk_buttons:
+            button.pack(side=tk.LEFT, padx=5)
+        self.group_schedule_button = ttk.Button(bulk_frame, text="Group Schedule...", state=tk.DISABLED, style='Secondary.TButton', command=self.schedule_selected_group)
+        self.group_schedule_button.pack(side=tk.LEFT, padx=5)
         
         # Right side - date picker
         date_frame = ttk.Frame(top_controls_frame)
         date_frame.pack(side=tk.RIGHT, padx=5)
         ttk.Label(date_frame, text="Filter by date:").pack(side=tk.LEFT, padx=(0, 5))
         self.alarm_date_var = tk.StringVar(value="")
-        self.alarm_date_picker = DateEntry(
-            date_frame, 
-            width=12,
-            background=self.ACCENT_COLOR, 
-            foreground=self.ACCENT_FG,
-            normalbackground=self.FRAME_BG, 
-            normalforeground=self.TEXT_COLOR,
-            selectbackground=self.ACCENT_COLOR, 
-            selectforeground=self.ACCENT_FG,
-            borderwidth=2, 
-            date_pattern='yyyy-mm-dd', 
-            textvariable=self.alarm_date_var
-        )
-        self.alarm_date_picker.pack(side=tk.LEFT)
-        ttk.Button(date_frame, text="Clear", command=self.clear_alarm_date_filter, style='Secondary.TButton', width=5).pack(side=tk.LEFT, padx=5)
+        self.alarm_date_frame = date_frame
+        self.alarm_date_clear_button = ttk.Button(date_frame, text="Clear", command=self.clear_alarm_date_filter, style='Secondary.TButton', width=5)
+        self.alarm_date_clear_button.pack(side=tk.LEFT, padx=5)
         self.alarm_date_var.trace_add("write", self.on_alarm_date_change)
         
         tree_frame = ttk.Frame(parent_frame)
         tree_frame.pack(expand=True, fill=tk.BOTH)
         cols = ("time", "label", "recurrence", "sound", "enabled")
-        self.alarm_tree = ttk.Treeview(tree_frame, columns=cols, show='headings', selectmode='browse')
+        self.alarm_tree = ttk.Treeview(tree_frame, columns=cols, show='tree headings', selectmode='extended')
+        self.alarm_tree.column("#0", width=28, stretch=False)
         self.alarm_tree.heading("time", text="Time")
         self.alarm_tree.heading("label", text="Label")
         self.alarm_tree.heading("recurrence", text="Repeats")
@@ -355,9 +3720,63 @@ class AlarmClockApp:
         self.alarm_tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
         
         self.alarm_tree.bind('<<TreeviewSelect>>', self.on_alarm_select)
+        self.alarm_tree.bind('<<TreeviewOpen>>', lambda e: self._on_group_toggle(collapsed=False))
+        self.alarm_tree.bind('<<TreeviewClose>>', lambda e: self._on_group_toggle(collapsed=True))
+        self.alarm_tree.tag_configure("group", font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'))
         self.alarm_tree.tag_configure("ringing", background=self.ERROR_COLOR, foreground='white', font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'))
         self.alarm_tree.tag_configure("disabled", foreground=self.DISABLED_COLOR)
 
+    def create_alarm_date_picker(self):
+        # Built after the first frame: tkcalendar is one of the deferred imports.
+        if hasattr(self, 'alarm_date_picker'):
+            return
+        self.alarm_date_picker = tkcalendar.DateEntry(
+            self.alarm_date_frame, 
+            width=12,
+            borderwidth=2, 
+            date_pattern='yyyy-mm-dd', 
+            textvariable=self.alarm_date_var,
+            **date_entry_theme_options(self.palette)
+        )
+        self.alarm_date_picker.pack(side=tk.LEFT, before=self.alarm_date_clear_button)
+
+    def on_tab_changed(self, event=None):
+        try:
+            selected = self.notebook.nametowidget(self.notebook.select())
+        except (KeyError, tk.TclError):
+            return
+        if selected is self.world_clock_tab_frame:
+            self.ensure_world_clock_tab()
+        elif selected is self.calendar_tab_frame:
+            self.ensure_calendar_tab()
+        elif selected is self.timers_tab_frame:
+            self.ensure_timers_tab()
+
+    def ensure_world_clock_tab(self):
+        if hasattr(self, 'wc_tree'):
+            return
+        with STARTUP_PROFILER.phase('create_world_clock_tab'):
+            if not self.world_clocks_loaded:
+                self.load_world_clocks()
+            self.create_world_clock_tab_widgets(self.world_clock_tab_frame)
+            self.update_world_clocks_display()
+        self.root.after(1000, self._world_clock_refresh_loop)
+
+    def ensure_calendar_tab(self):
+        if hasattr(self, 'calendar'):
+            return
+        with STARTUP_PROFILER.phase('create_calendar_tab'):
+            self.create_calendar_tab_widgets(self.calendar_tab_frame)
+            self.update_calendar_events()
+
+    def ensure_timers_tab(self):
+        if hasattr(self, 'timer_tree'):
+            return
+        with STARTUP_PROFILER.phase('create_timers_tab'):
+            self.create_timers_tab_widgets(self.timers_tab_frame)
+            self.update_timers_display()
+        self.root.after(TIMER_DISPLAY_REFRESH_MS, self._timers_refresh_loop)
+
     def create_world_clock_tab_widgets(self, parent_frame):
         wc_controls_frame = ttk.Frame(parent_frame)
         wc_controls_frame.pack(pady=(5, 10), fill=tk.X)
@@ -396,30 +3815,13 @@ class AlarmClockApp:
                   command=self.add_alarm_from_calendar).pack(side=tk.LEFT)
         
         # Create the calendar with enhanced visibility for events
-        self.calendar = Calendar(
+        self.calendar = tkcalendar.Calendar(
             calendar_container, 
             selectmode='day', 
             showweeknumbers=False, 
             date_pattern='yyyy-mm-dd', 
-            background=self.ACCENT_COLOR, 
-            foreground=self.ACCENT_FG, 
-            headersbackground=self.ACCENT_COLOR, 
-            headersforeground=self.ACCENT_FG, 
-            normalbackground=self.FRAME_BG, 
-            normalforeground=self.TEXT_COLOR, 
-            weekendbackground=self.FRAME_BG, 
-            weekendforeground=self.TEXT_COLOR, 
-            othermonthbackground=self.DISABLED_COLOR, 
-            othermonthforeground=self.TEXT_SECONDARY, 
-            othermonthwebackground=self.DISABLED_COLOR, 
-            othermonthweforeground=self.TEXT_SECONDARY, 
-            selectbackground=self.ACCENT_COLOR, 
-            selectforeground=self.ACCENT_FG, 
-            disabledbackground=self.BG_COLOR, 
-            bordercolor=self.BG_COLOR,
-            # Make sure events are visible with high contrast colors
-            markbackground=self.CAL_BG,
-            markforeground=self.CAL_FG
+            # Events are marked with high contrast colors (cal_bg/cal_fg)
+            **calendar_theme_options(self.palette)
         )
         self.calendar.pack(pady=10, fill="both", expand=True)
         self.calendar.bind("<<CalendarSelected>>", self.on_calendar_select)
@@ -435,6 +3837,66 @@ class AlarmClockApp:
         parent_frame.bind("<Configure>", lambda e: self.calendar_info_label.config(wraplength=e.width-20))
         self.calendar.tag_config(CALENDAR_EVENT_TAG, background=self.CAL_BG, foreground=self.CAL_FG)
 
+    def create_timers_tab_widgets(self, parent_frame):
+        timer_controls = ttk.Frame(parent_frame)
+        timer_controls.pack(pady=(5, 5), fill=tk.X)
+        ttk.Label(timer_controls, text="Duration:").pack(side=tk.LEFT, padx=(5, 2))
+        self.timer_duration_var = tk.StringVar(value="5m")
+        duration_entry = ttk.Entry(timer_controls, textvariable=self.timer_duration_var, width=9)
+        duration_entry.pack(side=tk.LEFT, padx=(0, 5))
+        duration_entry.bind('<Return>', lambda e: self.start_timer_from_entry())
+        ttk.Label(timer_controls, text="Label:").pack(side=tk.LEFT, padx=(5, 2))
+        self.timer_label_var = tk.StringVar()
+        ttk.Entry(timer_controls, textvariable=self.timer_label_var, width=14).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(timer_controls, text="Sound:").pack(side=tk.LEFT, padx=(5, 2))
+        sound_names = self.sound_catalog.display_names()
+        self.timer_sound_var = tk.StringVar(value=sound_names[0] if sound_names else "")
+        ttk.Combobox(timer_controls, textvariable=self.timer_sound_var, values=sound_names, state='readonly', width=16).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(timer_controls, text="Start Timer", command=self.start_timer_from_entry).pack(side=tk.LEFT, padx=5)
+        
+        timer_actions = ttk.Frame(parent_frame)
+        timer_actions.pack(pady=(0, 5), fill=tk.X)
+        self.timer_buttons = (
+            ttk.Button(timer_actions, text="Pause/Resume", state=tk.DISABLED, command=self.toggle_selected_timers),
+            ttk.Button(timer_actions, text="Restart", state=tk.DISABLED, style='Secondary.TButton', command=self.restart_selected_timers),
+            ttk.Button(timer_actions, text="Remove", state=tk.DISABLED, style='Secondary.TButton', command=self.remove_selected_timers),
+        )
+        for button in self.timer_buttons:
+            button.pack(side=tk.LEFT, padx=5)
+        
+        timer_tree_frame = ttk.Frame(parent_frame)
+        timer_tree_frame.pack(expand=True, fill=tk.BOTH)
+        self.timer_tree = ttk.Treeview(timer_tree_frame, columns=("label", "remaining", "duration", "state"), show='headings', selectmode='extended', height=6)
+        self.timer_tree.heading("label", text="Label")
+        self.timer_tree.heading("remaining", text="Remaining")
+        self.timer_tree.heading("duration", text="Duration")
+        self.timer_tree.heading("state", text="State")
+        self.timer_tree.column("label", width=200)
+        self.timer_tree.column("remaining", width=110, anchor=tk.CENTER)
+        self.timer_tree.column("duration", width=110, anchor=tk.CENTER)
+        self.timer_tree.column("state", width=90, anchor=tk.CENTER)
+        timer_scrollbar = ttk.Scrollbar(timer_tree_frame, orient=tk.VERTICAL, command=self.timer_tree.yview)
+        self.timer_tree.configure(yscrollcommand=timer_scrollbar.set)
+        timer_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.timer_tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        self.timer_tree.bind('<<TreeviewSelect>>', self.on_timer_select)
+        self.timer_tree.tag_configure("ringing", background=self.ERROR_COLOR, foreground='white', font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'))
+        self.timer_tree.tag_configure("paused", foreground=self.DISABLED_COLOR)
+        
+        stopwatch_frame = ttk.LabelFrame(parent_frame, text="Stopwatch", padding="10")
+        stopwatch_frame.pack(pady=(10, 0), fill=tk.X)
+        self.stopwatch_var = tk.StringVar(value=format_duration(0, hundredths=True))
+        ttk.Label(stopwatch_frame, textvariable=self.stopwatch_var, style='Status.TLabel', width=12).pack(side=tk.LEFT, padx=5)
+        self.stopwatch_button = ttk.Button(stopwatch_frame, text="Start", command=self.toggle_stopwatch, width=8)
+        self.stopwatch_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(stopwatch_frame, text="Lap", style='Secondary.TButton', command=self.stopwatch_lap, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Button(stopwatch_frame, text="Reset", style='Secondary.TButton', command=self.reset_stopwatch, width=6).pack(side=tk.LEFT, padx=5)
+        self.lap_tree = ttk.Treeview(stopwatch_frame, columns=("lap", "split", "total"), show='headings', height=4)
+        for column, heading in (("lap", "Lap"), ("split", "Split"), ("total", "Total")):
+            self.lap_tree.heading(column, text=heading)
+            self.lap_tree.column(column, width=80, anchor=tk.CENTER)
+        self.lap_tree.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+
     # --- Settings Management ---
     def load_settings(self):
         try:
@@ -459,15 +3921,13 @@ class AlarmClockApp:
             self.settings['snooze_minutes'] = self.snooze_duration_var.get()
             self.settings['theme_mode'] = self.theme_mode.get()
             self.settings['compact_mode'] = self.compact_mode.get()
-            
-            with open(SETTINGS_FILE, 'w') as f: 
-                json.dump(self.settings, f, indent=4)
-                print(f"Saved settings: {self.settings}")
+            self.persistence.submit(SETTINGS_FILE, self.settings)
         except Exception as e: 
             print(f"Error saving settings: {e}")
             
     def on_volume_change(self, *args):
         print(f"Volume changed: {self.volume_var.get():.2f}")
+        self.audio.set_target_volume(self.volume_var.get())
         self.save_settings()
         
     def on_snooze_change(self, *args):
@@ -484,34 +3944,11 @@ class AlarmClockApp:
         self.save_settings()
         
     def on_theme_change(self, *args):
-        print(f"Theme changed: {self.theme_mode.get()}")
-        self.root.configure(bg=self.BG_COLOR)
+        start = time.perf_counter()
         self.setup_styles()
-        self.apply_theme_to_widgets(self.root)
-        try: 
-            self.calendar.configure(
-                background=self.ACCENT_COLOR, 
-                foreground=self.ACCENT_FG, 
-                headersbackground=self.ACCENT_COLOR, 
-                headersforeground=self.ACCENT_FG, 
-                normalbackground=self.FRAME_BG, 
-                normalforeground=self.TEXT_COLOR, 
-                weekendbackground=self.FRAME_BG, 
-                weekendforeground=self.TEXT_COLOR, 
-                othermonthbackground=self.DISABLED_COLOR, 
-                othermonthforeground=self.TEXT_SECONDARY, 
-                othermonthwebackground=self.DISABLED_COLOR, 
-                othermonthweforeground=self.TEXT_SECONDARY, 
-                selectbackground=self.ACCENT_COLOR, 
-                selectforeground=self.ACCENT_FG, 
-                disabledbackground=self.BG_COLOR, 
-                bordercolor=self.BG_COLOR
-            )
-            self.calendar.tag_config(CALENDAR_EVENT_TAG, background=self.CAL_BG, foreground=self.CAL_FG)
-        except AttributeError: 
-            pass
-        except tk.TclError: 
-            pass
+        self.refresh_theme_colors()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Theme changed: {self.theme_mode.get()} ({elapsed_ms:.1f} ms)")
         self.save_settings()
         
     def on_compact_mode_change(self, *args):
@@ -579,33 +4016,25 @@ class AlarmClockApp:
         try:
             if os.path.exists(ALARMS_FILE):
                 with open(ALARMS_FILE, 'r') as f: 
-                    alarms_data = json.load(f)
-                if isinstance(alarms_data, list): 
-                    with self.alarm_lock: 
-                        self.alarms = alarms_data
-                        print(f"Loaded {len(self.alarms)} alarms.")
+                    document = split_alarms_document(json.load(f))
+                if document is not None: 
+                    self.alarm_store.replace_all(document[0], source='load', groups=document[1])
+                    print(f"Loaded {len(self.alarm_store.snapshot())} alarms in {len(document[1])} groups.")
                 else: 
                     print(f"Err: Invalid {ALARMS_FILE}")
-                    self.alarms = []
+                    self.alarm_store.replace_all([], source='load')
             else: 
                 print(f"{ALARMS_FILE} not found.")
-                self.alarms = []
+                self.alarm_store.replace_all([], source='load')
         except Exception as e: 
             print(f"Err loading alarms: {e}")
-            self.alarms = []
+            self.alarm_store.replace_all([], source='load')
             
     def save_alarms(self):
-        try:
-            with self.alarm_lock: 
-                alarms_to_save = list(self.alarms)
-            with open(ALARMS_FILE, 'w') as f: 
-                json.dump(alarms_to_save, f, indent=4)
-                print(f"Saved {len(alarms_to_save)} alarms.")
-        except Exception as e: 
-            print(f"Err saving alarms: {e}")
-            messagebox.showerror("Save Err", f"Could not save alarms: {e}")
+        self.persistence.submit(ALARMS_FILE, alarms_document(self.alarm_store.snapshot()))
             
     def load_world_clocks(self):
+        self.world_clocks_loaded = True
         try:
             if os.path.exists(WORLD_CLOCKS_FILE):
                 with open(WORLD_CLOCKS_FILE, 'r') as f: 
@@ -632,88 +4061,369 @@ class AlarmClockApp:
                   self.world_clocks = []
                   
     def save_world_clocks(self):
+        with self.world_clock_lock: 
+            self.persistence.submit(WORLD_CLOCKS_FILE, self.world_clocks)
+
+    def _on_persistence_error(self, path, error):
+        # Called on the persistence thread; hop onto the Tk loop before touching any UI.
+        if not self.running:
+            return
         try:
-            with self.world_clock_lock: 
-                clocks_to_save = list(self.world_clocks)
-            with open(WORLD_CLOCKS_FILE, 'w') as f: 
-                json.dump(clocks_to_save, f, indent=4)
-                print(f"Saved {len(clocks_to_save)} world clocks.")
-        except Exception as e: 
-            print(f"Err saving world clocks: {e}")
-            messagebox.showerror("Save Err", f"Could not save clocks: {e}")
+            self.root.after(0, lambda: messagebox.showerror("Save Err", f"Could not save {os.path.basename(path)}: {error}", parent=self.root))
+        except (tk.TclError, RuntimeError):
+            pass
 
-    # --- Alarm Data Management ---
-    def add_alarm(self, alarm_data):
-        with self.alarm_lock: 
-            alarm_data['id'] = str(uuid.uuid4())
-            alarm_data.setdefault('enabled', True)
-            alarm_data.setdefault('snooze_until', None)
-            alarm_data.setdefault('last_triggered_day', None)
-            self.alarms.append(alarm_data)
+    # --- External Reload ---
+    def _on_alarms_file_changed(self, path):
+        # Runs on the watcher thread: parse here, merge on the Tk loop.
+        try:
+            with open(path, 'r') as f:
+                document = split_alarms_document(json.load(f))
+        except Exception as e:
+            print(f"Ignoring unreadable external {ALARMS_FILE}: {e}")
+            return
+        if document is None:
+            print(f"Ignoring external {ALARMS_FILE}: not a list of alarms")
+            return
+        try:
+            self.root.after(0, lambda: self.merge_external_alarms(*document))
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def merge_external_alarms(self, alarms_data, groups_data=()):
+        assigned_ids = False
+        incoming = {}
+        for alarm in alarms_data:
+            if not alarm.get('id'):
+                alarm['id'] = str(uuid.uuid4())
+                assigned_ids = True
+            alarm.setdefault('enabled', True)
+            alarm.setdefault('snooze_until', None)
+            alarm.setdefault('last_triggered_day', None)
+            incoming[alarm['id']] = FrozenAlarm(alarm)
+
+        def _merge(alarms):
+            current = {a.get('id'): a for a in alarms}
+            added = [aid for aid in incoming if aid not in current]
+            removed = [aid for aid in current if aid not in incoming]
+            changed = [aid for aid in incoming if aid in current and incoming[aid] != current[aid]]
+            if added or removed or changed:
+                # Unchanged alarms keep their existing objects; only the differences are swapped in.
+                replaced = set(added).union(changed)
+                alarms[:] = [incoming[aid] if aid in replaced else current[aid] for aid in incoming]
+            return added, removed, changed
+
+        incoming_groups = [FrozenAlarm(g) for g in groups_data]
+        def _merge_groups(groups):
+            if list(groups) != incoming_groups:
+                groups[:] = incoming_groups
+                return True
+            return False
+
+        with self.alarm_store.batch(source='external'):
+            added, removed, changed = self.alarm_store.modify(_merge)
+            groups_changed = self.alarm_store.modify_groups(_merge_groups)
+
+        if not (added or removed or changed or groups_changed):
+            return
+        print(f"Merged external alarms: +{len(added)} -{len(removed)} ~{len(changed)}{' (groups changed)' if groups_changed else ''}")
+        stopped = [aid for aid in removed + changed if aid in self.ringing_alarms]
+        for alarm_id in stopped:
+            self._stop_sound(alarm_id)
+        if stopped:
+            self.update_ringing_controls()
+        if assigned_ids:
+            self.save_alarms()
+
+    def _on_exclusion_calendars_changed(self, path=None):
+        # Watcher thread (or warm-up); only files whose signature moved are re-read.
+        if not EXCLUSION_CALENDARS.refresh():
+            return
+        for calendar_path in EXCLUSION_CALENDARS.paths():
+            # The directory watch sees files come and go; edits in place need a watch on the file.
+            if calendar_path not in self._watched_calendar_files:
+                self._watched_calendar_files.add(calendar_path)
+                self.file_watcher.watch(calendar_path, self._on_exclusion_calendars_changed)
+        try:
+            self.root.after(0, self._refresh_alarm_views)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _refresh_alarm_views(self):
+        self.next_fires.rebuild(self.alarm_store.snapshot(), CLOCK.now())
+        self.update_next_alarm_display()
         self.update_alarm_list_display()
         self.update_calendar_events()
-        self.save_alarms()
+
+    def _on_sound_dir_changed(self, path):
+        # Watcher thread; the catalog only re-lists directories whose mtime moved.
+        self.sound_catalog.refresh()
+
+    def _on_world_clocks_file_changed(self, path):
+        try:
+            with open(path, 'r') as f:
+                clocks_data = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable external {WORLD_CLOCKS_FILE}: {e}")
+            return
+        if not isinstance(clocks_data, list):
+            print(f"Ignoring external {WORLD_CLOCKS_FILE}: not a list")
+            return
+        valid_clocks = [tz for tz in clocks_data if isinstance(tz, str) and tz in pytz.all_timezones_set]
+        with self.world_clock_lock:
+            added = set(valid_clocks) - set(self.world_clocks)
+            removed = set(self.world_clocks) - set(valid_clocks)
+            if added or removed:
+                self.world_clocks = valid_clocks
+        if added or removed:
+            # The world clock view refreshes every second, so it picks up the new list on its own.
+            print(f"Merged external world clocks: +{len(added)} -{len(removed)}")
+
+    # --- Alarm Data Management ---
+    def add_alarm(self, alarm_data):
+        alarm_data['id'] = str(uuid.uuid4())
+        alarm_data.setdefault('enabled', True)
+        alarm_data.setdefault('snooze_until', None)
+        alarm_data.setdefault('last_triggered_day', None)
+        self.alarm_store.add(alarm_data)
         
     def update_alarm(self, alarm_id, updated_data):
-        with self.alarm_lock:
-            for i, alarm in enumerate(self.alarms):
+        def _update(alarms):
+            for i, alarm in enumerate(alarms):
                 if alarm.get('id') == alarm_id: 
-                    orig = {'id': alarm.get('id')}
-                    
                     # Check if this is an edit to a future time
                     old_hour, old_minute = alarm.get('hour', 0), alarm.get('minute', 0)
                     new_hour, new_minute = updated_data.get('hour', 0), updated_data.get('minute', 0)
                     
                     # Reset alarm state when time or date is changed
                     reset_state = (old_hour != new_hour or old_minute != new_minute or 
-                                  alarm.get('recurrence_type') != updated_data.get('recurrence_type') or
-                                  alarm.get('specific_date') != updated_data.get('specific_date'))
+                                  _recurrence_key(alarm) != _recurrence_key(updated_data))
                     
                     # Update the alarm with new data
-                    self.alarms[i] = updated_data
-                    self.alarms[i].update(orig)
+                    new_alarm = dict(updated_data)
+                    new_alarm['id'] = alarm.get('id')
                     
                     # Reset alarm state if time or date changed
                     if reset_state:
-                        self.alarms[i]['snooze_until'] = None
-                        self.alarms[i]['last_triggered_day'] = None
-                        print(f"Reset alarm state for {alarm_id} due to time/date change")
+                        new_alarm['snooze_until'] = None
+                        new_alarm['last_triggered_day'] = None
                     
-                    self.alarms[i].setdefault('enabled', True)
-                    print(f"Updated {alarm_id}")
-                    break
-            else: 
-                print(f"Err: Cannot find {alarm_id}")
-                return
+                    new_alarm.setdefault('enabled', True)
+                    if alarm.get('group'):
+                        new_alarm.setdefault('group', alarm.get('group'))
+                    alarms[i] = new_alarm
+                    return True, reset_state
+            return False, False
+            
+        found, reset_state = self.alarm_store.modify(_update)
+        if not found: 
+            print(f"Err: Cannot find {alarm_id}")
+            return
+        if reset_state:
+            print(f"Reset alarm state for {alarm_id} due to time/date change")
+        print(f"Updated {alarm_id}")
                 
         # Stop any currently ringing alarm that was edited
         if alarm_id in self.ringing_alarms: 
             print(f"Stopping edited {alarm_id}")
             self._stop_sound(alarm_id)
             self.update_ringing_ui()
-            
-        self.update_alarm_list_display()
-        self.update_calendar_events()
-        self.save_alarms()
+        
+    def add_alarms_batch(self, alarms):
+        """Add many alarms in one store transaction, so the list, calendar and file are updated once."""
+        for alarm_data in alarms:
+            alarm_data['id'] = str(uuid.uuid4())
+            alarm_data.setdefault('enabled', True)
+            alarm_data.setdefault('snooze_until', None)
+            alarm_data.setdefault('last_triggered_day', None)
+        if not alarms:
+            return
+        self.alarm_store.modify(lambda current: current.extend(alarms))
         
     def delete_alarm(self, alarm_id):
-         with self.alarm_lock:
-            if alarm_id in self.ringing_alarms: 
+         self.delete_alarms([alarm_id])
+         
+    def delete_alarms(self, alarm_ids):
+        ringing = [aid for aid in alarm_ids if aid in self.ringing_alarms]
+        for alarm_id in ringing:
+            self._stop_sound(alarm_id)
+        removed = self.alarm_store.remove(alarm_ids)
+        print(f"Deleted {removed} alarm(s)")
+        if ringing:
+            self.update_ringing_ui()
+        
+    def set_alarms_enabled(self, alarm_ids, enabled):
+        ids = set(alarm_ids)
+        changes = {'enabled': enabled} if enabled else {'enabled': False, 'snooze_until': None}
+        self.alarm_store.update_alarms(ids, lambda alarm: with_alarm_fields(alarm, changes) if alarm.get('enabled') != enabled else None)
+        if not enabled:
+            ringing = [aid for aid in ids if aid in self.ringing_alarms]
+            for alarm_id in ringing:
                 self._stop_sound(alarm_id)
-            self.alarms = [a for a in self.alarms if a.get('id') != alarm_id]
-         self.update_alarm_list_display()
-         self.update_calendar_events()
-         self.edit_button.config(state=tk.DISABLED)
-         self.delete_button.config(state=tk.DISABLED)
-         self.save_alarms()
+            if ringing:
+                self.update_ringing_ui()
+                
+    def shift_alarms(self, alarm_ids, minutes):
+        ids = set(alarm_ids)
+        self.alarm_store.update_alarms(ids, lambda alarm: shift_alarm_time(alarm, minutes))
+        print(f"Shifted {len(ids)} alarm(s) by {minutes:+d} min")
+         
+    def snooze_alarms(self, alarm_ids, minutes):
+        snooze_until_ts = (CLOCK.now() + datetime.timedelta(minutes=minutes)).timestamp()
+        def _snooze(alarm):
+            if not alarm.get('enabled'):
+                return None
+            changes = {'snooze_until': snooze_until_ts}
+            if alarm_rule(alarm).is_single:
+                changes['last_triggered_day'] = None
+            return with_alarm_fields(alarm, changes)
+        snoozed = self.alarm_store.update_alarms(alarm_ids, _snooze)
+        ringing = [aid for aid in snoozed if aid in self.ringing_alarms]
+        for alarm_id in ringing:
+            self._stop_sound(alarm_id)
+        if ringing:
+            self.update_ringing_ui()
+        print(f"Snoozed {len(snoozed)} alarm(s) for {minutes}m")
+        
+    # --- Alarm Groups ---
+    def set_group_enabled(self, group_id, enabled):
+        # The group index lists the members, so only they are visited.
+        self.set_alarms_enabled(self.alarm_store.snapshot().members(group_id), enabled)
+        
+    def snooze_group(self, group_id, minutes):
+        self.snooze_alarms(self.alarm_store.snapshot().members(group_id), minutes)
+        
+    def set_group_schedule(self, group_id, weekdays):
+        def _schedule(groups):
+            for i, group in enumerate(groups):
+                if group.get('id') == group_id:
+                    groups[i] = with_alarm_fields(group, {'weekdays': sorted(weekdays)})
+        self.alarm_store.modify_groups(_schedule)
+        
+    def assign_alarms_to_group(self, alarm_ids, name):
+        """Move alarms into the group called name, creating it if needed; a blank name removes them from their groups."""
+        name = name.strip()
+        existing = next((g for g in self.alarm_store.snapshot().groups if g.get('name') == name), None)
+        group_id = existing.get('id') if existing else (str(uuid.uuid4()) if name else None)
+        with self.alarm_store.batch():
+            if name and not existing:
+                self.alarm_store.modify_groups(lambda groups: groups.append({'id': group_id, 'name': name, 'weekdays': [], 'collapsed': False}))
+            self.alarm_store.update_alarms(alarm_ids, lambda alarm: with_alarm_fields(alarm, {'group': group_id}) if alarm.get('group') != group_id else None)
+            used = self.alarm_store.modify(lambda alarms: {a.get('group') for a in alarms})
+            self.alarm_store.modify_groups(lambda groups: groups.__setitem__(slice(None), [g for g in groups if g.get('id') in used]))
+            
+    def _on_group_toggle(self, collapsed):
+        # Tk sends these for the focus item before it opens or closes. The state is saved without rebuilding the list.
+        iid = self.alarm_tree.focus()
+        if not iid.startswith(GROUP_IID_PREFIX):
+            return
+        group_id = iid[len(GROUP_IID_PREFIX):]
+        def _toggle(groups):
+            for i, group in enumerate(groups):
+                if group.get('id') == group_id and bool(group.get('collapsed')) != collapsed:
+                    groups[i] = with_alarm_fields(group, {'collapsed': collapsed})
+        self.alarm_store.modify_groups(_toggle, source='collapse')
+        
+    def selected_group_ids(self):
+        try:
+            return [iid[len(GROUP_IID_PREFIX):] for iid in self.alarm_tree.selection() if iid.startswith(GROUP_IID_PREFIX)]
+        except (tk.TclError, AttributeError):
+            return []
+        
+    def selected_alarm_ids(self):
+        """Selected alarms, with a selected group standing for all of its members."""
+        try:
+            selection = self.alarm_tree.selection()
+        except (tk.TclError, AttributeError):
+            return []
+        snapshot = self.alarm_store.snapshot()
+        ids = []
+        for iid in selection:
+            if iid.startswith(GROUP_IID_PREFIX):
+                ids.extend(snapshot.members(iid[len(GROUP_IID_PREFIX):]))
+            else:
+                ids.append(iid)
+        return list(dict.fromkeys(ids))
+        
+    def group_selected_alarms(self):
+        alarm_ids = self.selected_alarm_ids()
+        if not alarm_ids:
+            return
+        names = sorted(g.get('name', '') for g in self.alarm_store.snapshot().groups)
+        prompt = "Group name (blank to remove from groups):" + (f"\nExisting: {', '.join(names)}" if names else "")
+        name = simpledialog.askstring("Group Alarms", prompt, parent=self.root)
+        if name is not None:
+            self.assign_alarms_to_group(alarm_ids, name)
+            
+    def schedule_selected_group(self):
+        group_ids = self.selected_group_ids()
+        if len(group_ids) != 1:
+            return
+        group = self.alarm_store.snapshot().groups_by_id.get(group_ids[0])
+        current = ", ".join(DAY_NAMES[d] for d in group.get('weekdays', ()))
+        text = simpledialog.askstring("Group Schedule", f"Days the alarms in '{group.get('name')}' may ring\n(e.g. Mon-Fri or Sat, Sun; blank for every day):", initialvalue=current, parent=self.root)
+        if text is None:
+            return
+        try:
+            weekdays = parse_weekdays(text)
+        except AlarmImportError as e:
+            return messagebox.showerror("Group Schedule", str(e), parent=self.root)
+        self.set_group_schedule(group_ids[0], weekdays)
+        
+    def snooze_selected_alarms(self):
+        alarm_ids = self.selected_alarm_ids()
+        if alarm_ids:
+            try:
+                minutes = max(1, self.snooze_duration_var.get())
+            except tk.TclError:
+                minutes = DEFAULT_SNOOZE_MINUTES
+            self.snooze_alarms(alarm_ids, minutes)
          
     def delete_selected_alarm(self):
-        selected_item = self.alarm_tree.focus()
-        if not selected_item: 
+        alarm_ids = self.selected_alarm_ids()
+        if not alarm_ids: 
             return messagebox.showwarning("No Selection", "Select alarm.")
-        alarm_id = self.alarm_tree.item(selected_item, 'values')[-1]
-        if messagebox.askyesno("Confirm Deletion", f"Delete alarm '{self.alarm_tree.item(selected_item, 'values')[1]}'?"): 
-            self.delete_alarm(alarm_id)
+        if len(alarm_ids) == 1 and self.alarm_tree.exists(alarm_ids[0]):
+            prompt = f"Delete alarm '{self.alarm_tree.item(alarm_ids[0], 'values')[1]}'?"
+        else:
+            prompt = f"Delete {len(alarm_ids)} selected alarms?"
+        if messagebox.askyesno("Confirm Deletion", prompt): 
+            self.delete_alarms(alarm_ids)
+            
+    def enable_selected_alarms(self, enabled=True):
+        alarm_ids = self.selected_alarm_ids()
+        if alarm_ids:
+            self.set_alarms_enabled(alarm_ids, enabled)
+            
+    def shift_selected_alarms(self, minutes):
+        alarm_ids = self.selected_alarm_ids()
+        if alarm_ids:
+            self.shift_alarms(alarm_ids, minutes)
+            
+    def _on_alarms_changed(self, changes):
+        # Called once per store transaction, on whichever thread wrote it.
+        if self.next_fires.apply(changes, CLOCK.now()):
+            try:
+                self.root.after(0, self.update_next_alarm_display)
+            except (tk.TclError, RuntimeError):
+                pass
+        if changes.source in ('load', 'scheduler'):
+            return
+        if threading.current_thread() != threading.main_thread():
+            try:
+                self.root.after(0, lambda: self._on_alarms_changed(changes))
+            except (tk.TclError, RuntimeError):
+                pass
+            return
+        if hasattr(self, 'alarm_tree') and changes.source != 'collapse':
+            if changes.groups_changed or len(changes.ids()) > ALARM_CHANGESET_FULL_REFRESH:
+                self.update_alarm_list_display()
+                self.update_calendar_events()
+            else:
+                self.refresh_alarm_rows(changes.added + changes.changed, changes.removed)
+                self.refresh_calendar_alarms(changes.ids())
+        if changes.source != 'external':
+            self.save_alarms()
             
     def clear_alarm_date_filter(self):
         self.alarm_date_var.set("")
@@ -731,88 +4441,154 @@ class AlarmClockApp:
             return
         
         selected_iid = self.alarm_tree.focus()
+        selection = self.alarm_tree.selection()
         try:
             for item in self.alarm_tree.get_children(): 
                 self.alarm_tree.delete(item)
+            self._alarm_row_keys.clear()
                 
             # Get filter date if set
             filter_date = self.alarm_date_var.get() if hasattr(self, 'alarm_date_var') else ""
                 
-            with self.alarm_lock:
-                # First sort alarms by time
-                sorted_alarms = sorted(self.alarms, key=lambda x: (x.get('hour', 0), x.get('minute', 0)))
-                
-                # Apply date filter if set
-                if filter_date:
-                    filtered_alarms = []
-                    for alarm in sorted_alarms:
-                        # Include alarms with matching specific date
-                        if alarm.get('recurrence_type') == RECURRENCE_SPECIFIC_DATE and alarm.get('specific_date') == filter_date:
-                            filtered_alarms.append(alarm)
-                            continue
-                            
-                        # For recurring alarms, check if they occur on the filter date
-                        filter_date_obj = datetime.datetime.strptime(filter_date, "%Y-%m-%d").date()
-                        weekday = filter_date_obj.weekday()
-                        
-                        if alarm.get('recurrence_type') == RECURRENCE_DAILY:
-                            filtered_alarms.append(alarm)
-                        elif alarm.get('recurrence_type') == RECURRENCE_WEEKDAYS and weekday in WEEKDAYS:
-                            filtered_alarms.append(alarm)
-                        elif alarm.get('recurrence_type') == RECURRENCE_WEEKENDS and weekday in WEEKENDS:
-                            filtered_alarms.append(alarm)
-                        elif alarm.get('recurrence_type') == "Specific Days" and weekday in alarm.get('recurrence_days', []):
-                            filtered_alarms.append(alarm)
-                    
-                    # Use filtered alarms
-                    sorted_alarms = filtered_alarms
-                for alarm in sorted_alarms:
-                    alarm_id = alarm.get('id', '')
-                    hour, minute = alarm.get('hour', 0), alarm.get('minute', 0)
-                    label = alarm.get('label', 'No Label')
-                    sound_path = alarm.get('sound_file', '')
-                    sound_display = os.path.basename(sound_path) if sound_path and not sound_path.startswith("builtin:") else (sound_path.split(":", 1)[1].replace('_', ' ') if sound_path else "None")
-                    enabled = alarm.get('enabled', False)
-                    snooze_until_ts = alarm.get('snooze_until')
-                    is_snoozed = False
-                    
-                    if snooze_until_ts: 
-                        snooze_until_dt = datetime.datetime.fromtimestamp(snooze_until_ts)
-                        is_snoozed = snooze_until_dt > datetime.datetime.now()
-                        
-                    display_time = format_alarm_time(hour, minute, self.time_format.get())
-                    display_recurrence = get_recurrence_display(alarm)
-                    display_enabled = "Yes" if enabled else "No"
-                    tags = ["disabled"] if not enabled else []
-                    current_label = label
-                    
-                    if alarm_id in self.ringing_alarms: 
-                        tags.append("ringing")
-                    if is_snoozed: 
-                        current_label += f" (Snoozed until {snooze_until_dt.strftime('%H:%M')})"
-                        
-                    values = (display_time, current_label, display_recurrence, sound_display, display_enabled, alarm_id)
-                    self.alarm_tree.insert('', tk.END, iid=alarm_id, values=values, tags=tuple(tags))
+            # Groups come first as collapsible nodes, then alarms sorted by time
+            snapshot = self.alarm_store.snapshot()
+            for group in sorted(snapshot.groups, key=lambda g: g.get('name', '').lower()):
+                self.alarm_tree.insert('', tk.END, iid=GROUP_IID_PREFIX + group.get('id'), open=not group.get('collapsed'), values=self._group_row(group, snapshot), tags=("group",))
+            sorted_alarms = sorted(snapshot, key=self._alarm_sort_key)
+            for alarm in sorted_alarms:
+                if not self._alarm_matches_filter(alarm, filter_date):
+                    continue
+                values, tags = self._alarm_row(alarm)
+                self.alarm_tree.insert(self._alarm_parent(alarm, snapshot), tk.END, iid=alarm.get('id', ''), values=values, tags=tags)
+                self._alarm_row_keys[alarm.get('id', '')] = self._alarm_sort_key(alarm)
                     
+            kept = [iid for iid in selection if self.alarm_tree.exists(iid)]
             if selected_iid and self.alarm_tree.exists(selected_iid): 
                 self.alarm_tree.focus(selected_iid)
-                self.alarm_tree.selection_set(selected_iid)
+            if kept:
+                self.alarm_tree.selection_set(kept)
             else: 
                 self.on_alarm_select()
         except tk.TclError: 
             pass
+
+    def refresh_alarm_rows(self, alarm_ids, removed_ids=()):
+        """Update only the given rows of the alarm list, keeping it sorted, filtered and selected."""
+        try:
+            focus = self.alarm_tree.focus()
+            selection = self.alarm_tree.selection()
+            snapshot = self.alarm_store.snapshot()
+            touched_parents = set()
+            for alarm_id in list(removed_ids) + list(alarm_ids):
+                if self.alarm_tree.exists(alarm_id):
+                    touched_parents.add(self.alarm_tree.parent(alarm_id))
+                    self.alarm_tree.delete(alarm_id)
+                self._alarm_row_keys.pop(alarm_id, None)
+                
+            filter_date = self.alarm_date_var.get() if hasattr(self, 'alarm_date_var') else ""
+            for alarm_id in alarm_ids:
+                alarm = snapshot.by_id.get(alarm_id)
+                if alarm is None or not self._alarm_matches_filter(alarm, filter_date):
+                    continue
+                key = self._alarm_sort_key(alarm)
+                parent = self._alarm_parent(alarm, snapshot)
+                touched_parents.add(parent)
+                children = self.alarm_tree.get_children(parent)
+                # Group nodes sit ahead of the top-level alarms and have no sort key
+                rows = [c for c in children if c in self._alarm_row_keys]
+                index = len(children) - len(rows) + bisect.bisect_right([self._alarm_row_keys[c] for c in rows], key)
+                values, tags = self._alarm_row(alarm)
+                self.alarm_tree.insert(parent, index, iid=alarm_id, values=values, tags=tags)
+                self._alarm_row_keys[alarm_id] = key
+                
+            for parent in touched_parents:
+                group = snapshot.groups_by_id.get(parent[len(GROUP_IID_PREFIX):]) if parent else None
+                if group is not None and self.alarm_tree.exists(parent):
+                    self.alarm_tree.item(parent, values=self._group_row(group, snapshot))
+                
+            kept = [iid for iid in selection if self.alarm_tree.exists(iid)]
+            if focus and self.alarm_tree.exists(focus):
+                self.alarm_tree.focus(focus)
+            # Re-inserted rows drop out of the selection, so restore it.
+            if selection:
+                self.alarm_tree.selection_set(kept)
+            self.on_alarm_select()
+        except tk.TclError:
+            pass
+
+    @staticmethod
+    def _alarm_parent(alarm, snapshot):
+        group = snapshot.group_of(alarm)
+        return GROUP_IID_PREFIX + group.get('id') if group is not None else ''
+
+    def _group_row(self, group, snapshot):
+        members = [snapshot.by_id[aid] for aid in snapshot.members(group.get('id'))]
+        enabled = sum(1 for alarm in members if alarm.get('enabled'))
+        weekdays = tuple(group.get('weekdays', ()))
+        schedule = {(): "Every day", tuple(WEEKDAYS): "Weekdays", tuple(WEEKENDS): "Weekends", tuple(range(7)): "Every day"}.get(weekdays) or ", ".join(DAY_NAMES[d] for d in weekdays)
+        return ("", f"{group.get('name', 'Group')} ({len(members)})", schedule, "", f"{enabled}/{len(members)}", GROUP_IID_PREFIX + group.get('id'))
+
+    @staticmethod
+    def _alarm_sort_key(alarm):
+        return (alarm.get('hour', 0), alarm.get('minute', 0))
+
+    def _alarm_matches_filter(self, alarm, filter_date):
+        if not filter_date:
+            return True
+        try:
+            filter_day = datetime.datetime.strptime(filter_date, "%Y-%m-%d").date()
+        except ValueError:
+            return True
+        # A plain Once alarm has no date, so it never matches a date filter
+        rule = alarm_rule(alarm)
+        return not rule.floating and rule.occurs_on(filter_day) and not alarm_excluded_on(alarm, filter_day, self.alarm_store.snapshot().group_of(alarm))
+
+    def _alarm_row(self, alarm):
+        alarm_id = alarm.get('id', '')
+        hour, minute = alarm.get('hour', 0), alarm.get('minute', 0)
+        label = alarm.get('label', 'No Label')
+        sound_path = alarm.get('sound_file', '')
+        sound_display = os.path.basename(sound_path) if sound_path and not sound_path.startswith(("builtin:", "user:")) else (sound_path.split(":", 1)[1].replace('_', ' ') if sound_path else "None")
+        enabled = alarm.get('enabled', False)
+        snooze_until_ts = alarm.get('snooze_until')
+        is_snoozed = False
+        
+        if snooze_until_ts: 
+            snooze_until_dt = datetime.datetime.fromtimestamp(snooze_until_ts)
+            is_snoozed = snooze_until_dt > CLOCK.now()
+            
+        display_time = format_alarm_time(hour, minute, self.time_format.get())
+        display_recurrence = get_recurrence_display(alarm)
+        if alarm.get('exclusion_calendars'):
+            display_recurrence += f", except {', '.join(alarm['exclusion_calendars'])}"
+        display_enabled = "Yes" if enabled else "No"
+        tags = ["disabled"] if not enabled else []
+        current_label = label
+        
+        if alarm_id in self.ringing_alarms: 
+            tags.append("ringing")
+        if is_snoozed: 
+            current_label += f" (Snoozed until {snooze_until_dt.strftime('%H:%M')})"
+            
+        values = (display_time, current_label, display_recurrence, sound_display, display_enabled, alarm_id)
+        return values, tuple(tags)
             
     def on_alarm_select(self, event=None):
         try: 
-            state = tk.NORMAL if self.alarm_tree.focus() else tk.DISABLED
-            self.edit_button.config(state=state)
-            self.delete_button.config(state=state)
+            selection = self.alarm_tree.selection()
+            groups = [iid for iid in selection if iid.startswith(GROUP_IID_PREFIX)]
+            self.edit_button.config(state=tk.NORMAL if len(selection) == 1 and not groups else tk.DISABLED)
+            for button in (self.delete_button,) + self.bulk_buttons:
+                button.config(state=tk.NORMAL if selection else tk.DISABLED)
+            self.group_schedule_button.config(state=tk.NORMAL if len(selection) == 1 and groups else tk.DISABLED)
         except tk.TclError: 
             pass
 
     # --- World Clock Management ---
     def add_timezone_dialog(self):
-        dialog = TimezoneDialog(self.root, "Add Timezone", pytz.common_timezones, current_theme=self.theme_mode.get())
+        with self.world_clock_lock:
+            existing = list(self.world_clocks)
+        dialog = TimezoneDialog(self.root, "Add Timezone", get_timezone_index(), current_theme=self.theme_mode.get(), exclude=existing)
         if dialog.result:
             tz_name = dialog.result
             with self.world_clock_lock:
@@ -839,7 +4615,7 @@ class AlarmClockApp:
              self.save_world_clocks()
              
     def update_world_clocks_display(self):
-        if not self.running: 
+        if not self.running or not hasattr(self, 'wc_tree'): 
             return
             
         if threading.current_thread() != threading.main_thread():
@@ -878,12 +4654,17 @@ class AlarmClockApp:
                 self.on_world_clock_select()
         except tk.TclError: 
             pass
-            
-        if self.root and self.root.winfo_exists():
-             try: 
-                 self.root.after(1000, self.update_world_clocks_display)
-             except tk.TclError: 
-                 pass
+
+    def _world_clock_refresh_loop(self):
+        if not self.running:
+            return
+        try:
+            # Only redraw while the tab is actually on screen.
+            if self.notebook.select() == str(self.world_clock_tab_frame) and self.root.winfo_viewable():
+                self.update_world_clocks_display()
+            self.root.after(1000, self._world_clock_refresh_loop)
+        except tk.TclError:
+            pass
                  
     def on_world_clock_select(self, event=None):
         try: 
@@ -906,55 +4687,16 @@ class AlarmClockApp:
                  
              # Clear all existing calendar events
              self.calendar.calevent_remove('all')
-             events_by_date = defaultdict(list)
-             today = datetime.date.today()
-             lookahead_days = 60
-             relevant_dates = set()
+             self._calendar_event_ids.clear()
+             today = CLOCK.today()
              
-             with self.alarm_lock:
-                 for alarm in self.alarms:
-                     if not alarm.get('enabled'): 
-                         continue
-                         
-                     alarm_info = f"{format_alarm_time(alarm.get('hour',0), alarm.get('minute',0), self.time_format.get())} - {alarm.get('label', 'Alarm')}"
-                     rec_type = alarm.get('recurrence_type')
-                     spec_date_str = alarm.get('specific_date')
-                     
-                     # Handle specific date alarms
-                     if rec_type == RECURRENCE_SPECIFIC_DATE and spec_date_str:
-                         try: 
-                             alarm_date = datetime.datetime.strptime(spec_date_str, "%Y-%m-%d").date()
-                             if alarm_date >= today: 
-                                 events_by_date[alarm_date].append(alarm_info)
-                                 relevant_dates.add(alarm_date)
-                         except ValueError: 
-                             continue
-                     # Handle one-time alarms that haven't triggered yet
-                     elif rec_type == RECURRENCE_ONCE:
-                         # For one-time alarms, add them to today if they haven't triggered yet
-                         if not alarm.get('last_triggered_day'):
-                             events_by_date[today].append(alarm_info)
-                             relevant_dates.add(today)
-                     # Handle recurring alarms
-                     else:
-                         days_to_check = set(range(7)) if rec_type == RECURRENCE_DAILY else (set(WEEKDAYS) if rec_type == RECURRENCE_WEEKDAYS else (set(WEEKENDS) if rec_type == RECURRENCE_WEEKENDS else (set(alarm.get('recurrence_days',[])) if rec_type == "Specific Days" else set())))
-                         if days_to_check:
-                             for i in range(lookahead_days): 
-                                 check_date = today + datetime.timedelta(days=i)
-                                 if check_date.weekday() in days_to_check: 
-                                     events_by_date[check_date].append(alarm_info)
-                                     relevant_dates.add(check_date)
-                                     
-             # Create calendar events for each relevant date
-             for date_obj in relevant_dates: 
-                 # Use a more visible text for the event
-                 event_text = ", ".join(events_by_date[date_obj])
-                 event_id = self.calendar.calevent_create(date_obj, text=event_text, tags=[CALENDAR_EVENT_TAG])
+             for alarm in self.alarm_store.snapshot():
+                 self._add_calendar_events(alarm, today)
                  
-                 # Mark the date to make it visually distinct
-                 self.calendar.tag_config(CALENDAR_EVENT_TAG, background=self.CAL_BG, foreground=self.CAL_FG)
-                 
-             print(f"Updated calendar: {len(relevant_dates)} dates with {sum(len(events) for events in events_by_date.values())} alarms.")
+             # Mark the dates to make them visually distinct
+             self.calendar.tag_config(CALENDAR_EVENT_TAG, background=self.CAL_BG, foreground=self.CAL_FG)
+             event_count = sum(len(ids) for ids in self._calendar_event_ids.values())
+             print(f"Updated calendar: {event_count} events for {len(self._calendar_event_ids)} alarms.")
              
              # Force calendar to redraw to show the events
              self.calendar.update_idletasks()
@@ -962,6 +4704,41 @@ class AlarmClockApp:
             pass
         except Exception as e: 
             print(f"Error updating calendar: {e}")
+
+    def refresh_calendar_alarms(self, alarm_ids):
+        """Replace the calendar events of the given alarms without touching the others."""
+        try:
+            if not hasattr(self, 'calendar'):
+                return
+            by_id = self.alarm_store.snapshot().by_id
+            today = CLOCK.today()
+            for alarm_id in alarm_ids:
+                for event_id in self._calendar_event_ids.pop(alarm_id, []):
+                    self.calendar.calevent_remove(event_id)
+                if alarm_id in by_id:
+                    self._add_calendar_events(by_id[alarm_id], today)
+        except tk.TclError:
+            pass
+        except Exception as e:
+            print(f"Error refreshing calendar: {e}")
+
+    def _add_calendar_events(self, alarm, today, lookahead_days=60):
+        if not alarm.get('enabled'): 
+            return
+            
+        alarm_info = f"{format_alarm_time(alarm.get('hour',0), alarm.get('minute',0), self.time_format.get())} - {alarm.get('label', 'Alarm')}"
+        rule = alarm_rule(alarm)
+        if rule.floating:
+            # A plain Once alarm shows on today until it has fired
+            event_dates = [] if alarm.get('last_triggered_day') else [today]
+        else:
+            group = self.alarm_store.snapshot().group_of(alarm)
+            event_dates = [d for d in rule.between(today, today + datetime.timedelta(days=lookahead_days - 1)) if not alarm_excluded_on(alarm, d, group)]
+                        
+        alarm_id = alarm.get('id')
+        for date_obj in event_dates:
+            event_id = self.calendar.calevent_create(date_obj, text=alarm_info, tags=[CALENDAR_EVENT_TAG])
+            self._calendar_event_ids[alarm_id].append(event_id)
             
     def on_calendar_select(self, event=None):
         try:
@@ -969,29 +4746,14 @@ class AlarmClockApp:
             selected_date = datetime.datetime.strptime(selected_date_str, "%Y-%m-%d").date()
             alarms_on_date = []
             
-            with self.alarm_lock:
-                 for alarm in self.alarms:
-                     if not alarm.get('enabled'): 
-                         continue
-                         
-                     alarm_info = f"{format_alarm_time(alarm.get('hour',0), alarm.get('minute',0), self.time_format.get())} - {alarm.get('label', 'Alarm')}"
-                     rec_type = alarm.get('recurrence_type')
-                     spec_date_str = alarm.get('specific_date')
-                     matches = False
+            snapshot = self.alarm_store.snapshot()
+            for alarm in snapshot:
+                 if not alarm.get('enabled'): 
+                     continue
                      
-                     if rec_type == RECURRENCE_SPECIFIC_DATE and spec_date_str == selected_date_str: 
-                         matches = True
-                     elif rec_type == RECURRENCE_DAILY: 
-                         matches = True
-                     elif rec_type == RECURRENCE_WEEKDAYS and selected_date.weekday() in WEEKDAYS: 
-                         matches = True
-                     elif rec_type == RECURRENCE_WEEKENDS and selected_date.weekday() in WEEKENDS: 
-                         matches = True
-                     elif rec_type == "Specific Days" and selected_date.weekday() in alarm.get('recurrence_days', []): 
-                         matches = True
-                         
-                     if matches: 
-                         alarms_on_date.append(alarm_info)
+                 rule = alarm_rule(alarm)
+                 if not rule.floating and rule.occurs_on(selected_date) and not alarm_excluded_on(alarm, selected_date, snapshot.group_of(alarm)): 
+                     alarms_on_date.append(f"{format_alarm_time(alarm.get('hour',0), alarm.get('minute',0), self.time_format.get())} - {alarm.get('label', 'Alarm')}")
                          
             info_text = f"Alarms for {selected_date.strftime('%a, %b %d')}:\n- " + "\n- ".join(alarms_on_date) if alarms_on_date else f"No alarms for {selected_date.strftime('%a, %b %d')}."
             self.calendar_info_label.config(text=info_text)
@@ -1005,6 +4767,80 @@ class AlarmClockApp:
         except Exception as e: 
             print(f"Err calendar select: {e}")
 
+    # --- Bulk Import/Export ---
+    def import_alarms_dialog(self):
+        path = filedialog.askopenfilename(
+            title="Import Alarms", 
+            filetypes=[("Alarm Files", "*.csv *.ics"), ("CSV", "*.csv"), ("iCalendar", "*.ics"), ("All Files", "*.*")]
+        )
+        if path:
+            threading.Thread(target=self._import_alarms_worker, args=(path,), daemon=True).start()
+            
+    def _import_alarms_worker(self, path):
+        # Parsing and validation stream through the file off the Tk thread; the insert is one batch.
+        alarms, errors = [], []
+        row_name = "Line" if path.lower().endswith(".ics") else "Row"
+        start = time.perf_counter()
+        try:
+            for row_number, alarm, error in iter_alarm_imports(path):
+                if error:
+                    errors.append(f"{row_name} {row_number}: {error}")
+                else:
+                    alarms.append(alarm)
+        except (OSError, UnicodeDecodeError, csv.Error, AlarmImportError) as e:
+            errors.append(f"Import stopped: {e}")
+        print(f"Parsed {len(alarms)} alarms from {path} with {len(errors)} errors in {(time.perf_counter() - start) * 1000:.0f} ms")
+        try:
+            self.root.after(0, lambda: self._finish_alarm_import(path, alarms, errors))
+        except (tk.TclError, RuntimeError):
+            pass
+            
+    def _finish_alarm_import(self, path, alarms, errors):
+        self.add_alarms_batch(alarms)
+        summary = f"Imported {len(alarms)} alarms from {os.path.basename(path)}."
+        if errors:
+            shown = "\n".join(errors[:MAX_IMPORT_ERRORS_SHOWN])
+            more = f"\n...and {len(errors) - MAX_IMPORT_ERRORS_SHOWN} more." if len(errors) > MAX_IMPORT_ERRORS_SHOWN else ""
+            messagebox.showwarning("Import Alarms", f"{summary}\n{len(errors)} rows were skipped:\n{shown}{more}", parent=self.root)
+        else:
+            messagebox.showinfo("Import Alarms", summary, parent=self.root)
+            
+    def export_alarms_dialog(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Alarms", 
+            defaultextension=".csv", 
+            filetypes=[("CSV", "*.csv"), ("iCalendar", "*.ics")]
+        )
+        if not path: 
+            return
+        days = None
+        if messagebox.askyesno("Export Alarms", "Export each upcoming occurrence instead of the alarm definitions?", parent=self.root):
+            days = simpledialog.askinteger("Export Occurrences", "Number of days from today:", initialvalue=DEFAULT_EXPORT_DAYS, minvalue=1, maxvalue=3660, parent=self.root)
+            if not days: 
+                return
+        fmt = "ics" if path.lower().endswith(".ics") else "csv"
+        threading.Thread(target=self._export_alarms_worker, args=(path, fmt, self.alarm_store.snapshot(), days), daemon=True).start()
+        
+    def _export_alarms_worker(self, path, fmt, alarms, days):
+        # Rows are generated and written one at a time, so large ranges never sit in memory.
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                if days:
+                    now = CLOCK.now()
+                    count = write_occurrences(iter_occurrences(alarms, now.date(), now.date() + datetime.timedelta(days=days - 1), not_before=now, group_of=alarms.group_of), f, fmt)
+                    message = f"Exported {count} occurrences over {days} days to {os.path.basename(path)}."
+                else:
+                    count = write_alarms(alarms, f, fmt)
+                    message = f"Exported {count} alarms to {os.path.basename(path)}."
+            show = lambda: messagebox.showinfo("Export Alarms", message, parent=self.root)
+        except OSError as e:
+            error_text = f"Could not export: {e}"
+            show = lambda: messagebox.showerror("Export Alarms", error_text, parent=self.root)
+        try:
+            self.root.after(0, show)
+        except (tk.TclError, RuntimeError):
+            pass
+
     # --- Add/Edit Alarm Dialog ---
     def add_alarm_from_calendar(self):
         """Add a new alarm using the currently selected date in the calendar"""
@@ -1018,7 +4854,9 @@ class AlarmClockApp:
             AlarmDialog(self.root, "Add New Alarm", self.add_alarm, 
                        time_format=self.time_format.get(), 
                        initial_data=initial_data,
-                       current_theme=self.theme_mode.get())
+                       current_theme=self.theme_mode.get(),
+                       sound_prepare_callback=self.prepare_sound,
+                       sound_import_callback=self.sound_importer.import_files, sound_catalog=self.sound_catalog)
         
     def open_add_alarm_dialog(self, use_date=True):
         """Open dialog to add a new alarm
@@ -1035,7 +4873,7 @@ class AlarmClockApp:
                 current_date = self.calendar.get_date()
             else:
                 # Default to tomorrow
-                current_date = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+                current_date = (CLOCK.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
                 
             # Create initial data with the date
             initial_data = {
@@ -1045,29 +4883,33 @@ class AlarmClockApp:
             AlarmDialog(self.root, "Add New Alarm", self.add_alarm, 
                        time_format=self.time_format.get(),
                        initial_data=initial_data,
-                       current_theme=self.theme_mode.get())
+                       current_theme=self.theme_mode.get(),
+                       sound_prepare_callback=self.prepare_sound,
+                       sound_import_callback=self.sound_importer.import_files, sound_catalog=self.sound_catalog)
         else:
             # Standard alarm without date
             AlarmDialog(self.root, "Add New Alarm", self.add_alarm, 
                        time_format=self.time_format.get(), 
-                       current_theme=self.theme_mode.get())
+                       current_theme=self.theme_mode.get(),
+                       sound_prepare_callback=self.prepare_sound,
+                       sound_import_callback=self.sound_importer.import_files, sound_catalog=self.sound_catalog)
         
     def open_edit_alarm_dialog(self):
         selected_iid = self.alarm_tree.focus()
         if not selected_iid: 
             return messagebox.showwarning("No Selection", "Select alarm.")
             
-        with self.alarm_lock: 
-            alarm_data = next((a for a in self.alarms if a.get('id') == selected_iid), None)
+        alarm_data = self.alarm_store.get(selected_iid)
             
         if alarm_data: 
-            AlarmDialog(self.root, "Edit Alarm", self.update_alarm, time_format=self.time_format.get(), initial_data=alarm_data.copy(), current_theme=self.theme_mode.get())
+            AlarmDialog(self.root, "Edit Alarm", self.update_alarm, time_format=self.time_format.get(), initial_data=alarm_data.copy(), current_theme=self.theme_mode.get(), sound_prepare_callback=self.prepare_sound, sound_import_callback=self.sound_importer.import_files, sound_catalog=self.sound_catalog)
         else: 
             messagebox.showerror("Error", "Alarm data not found.")
 
     # --- Core Clock and Alarm Logic ---
     def time_format_changed(self):
         self.update_local_clock_display_only()
+        self.update_next_alarm_display()
         self.update_alarm_list_display()
         self.update_world_clocks_display()
         
@@ -1075,7 +4917,7 @@ class AlarmClockApp:
         if not self.running: 
             return
             
-        now = datetime.datetime.now()
+        now = CLOCK.now()
         try: 
             fmt = "%I:%M:%S %p" if self.time_format.get() == "12h" else "%H:%M:%S"
             self.current_time_var.set(now.strftime(fmt))
@@ -1091,76 +4933,133 @@ class AlarmClockApp:
     def update_local_clock_display_only(self): 
         self.update_local_clock()
         
+    # --- Next Alarm Countdown ---
+    def _next_alarm_tick(self):
+        # The countdown is shown in whole minutes, so it only needs redrawing on the minute.
+        if not self.running:
+            return
+        self.update_next_alarm_display()
+        try:
+            self.root.after(int((60 - CLOCK.now().second) * 1000), self._next_alarm_tick)
+        except tk.TclError:
+            pass
+
+    def update_next_alarm_display(self):
+        now = CLOCK.now()
+        snapshot = self.alarm_store.snapshot()
+        entries = []
+        for fire, alarm_id in self.next_fires.upcoming(now):
+            alarm = snapshot.get(alarm_id)
+            if alarm:
+                when = format_alarm_time(fire.hour, fire.minute, self.time_format.get())
+                if fire.date() != now.date():
+                    when = f"{fire.strftime('%a')} {when}"
+                label = alarm.get('label') or "Alarm"
+                entries.append((alarm_id, f"{when} {label} (in {format_countdown(fire - now)})"))
+        text = f"Next alarm: {entries[0][1]}" if entries else "No upcoming alarms"
+        self.next_alarm_var.set(text)
+        if self.tray_icon:
+            try:
+                self.tray_icon.title = f"{NOTIFICATION_APP_NAME} - {text}"
+                if entries != self._tray_upcoming:
+                    self._tray_upcoming = entries
+                    self.tray_icon.update_menu()
+            except Exception as e:
+                print(f"Tray update error: {e}")
+        self._tray_upcoming = entries
+
+    def snooze_upcoming_alarm(self, alarm_id, minutes):
+        """Push an alarm's next ring back by minutes, before it has started ringing."""
+        now = CLOCK.now()
+        snapshot = self.alarm_store.snapshot()
+        alarm = snapshot.get(alarm_id)
+        fire = next_fire_time(alarm, now, snapshot.group_of(alarm)) if alarm else None
+        if fire is None:
+            return
+        snooze_until = fire + datetime.timedelta(minutes=minutes)
+        self.alarm_store.update_fields({alarm_id: {'snooze_until': snooze_until.timestamp()}})
+        self.notifications.submit('Alarm Snoozed', f"'{alarm.get('label') or 'Alarm'}' moved to {snooze_until.strftime('%H:%M')}", timeout=5)
+
+    def skip_next_occurrence(self, alarm_id):
+        """Skip an alarm's next ring. Repeating alarms gain an exclusion date; one-off alarms are disabled."""
+        now = CLOCK.now()
+        snapshot = self.alarm_store.snapshot()
+        alarm = snapshot.get(alarm_id)
+        fire = next_fire_time(alarm, now, snapshot.group_of(alarm)) if alarm else None
+        if fire is None:
+            return
+        snooze_until_ts = alarm.get('snooze_until')
+        if snooze_until_ts and datetime.datetime.fromtimestamp(snooze_until_ts) > now:
+            changes = {'snooze_until': None}
+        elif alarm_rule(alarm).is_single:
+            changes = {'enabled': False}
+        else:
+            recurrence = dict(alarm.get('recurrence') or {})
+            # Past exclusion dates no longer matter, so skipping daily does not grow the list.
+            today = now.strftime("%Y-%m-%d")
+            exdates = {d for d in recurrence.get('exdates', ()) if d >= today}
+            exdates.add(fire.strftime("%Y-%m-%d"))
+            recurrence['exdates'] = sorted(exdates)
+            changes = {'recurrence': recurrence}
+        self.alarm_store.update_fields({alarm_id: changes})
+        print(f"Skipped {alarm_id} at {fire:%Y-%m-%d %H:%M}")
+
     def check_alarm_loop(self):
          while self.running:
-            now = datetime.datetime.now()
-            current_day_index = now.weekday()
-            current_date_str = now.strftime("%Y-%m-%d")
-            alarms_to_trigger, alarms_to_unsnooze = [], []
-            
-            with self.alarm_lock:
-                for alarm in self.alarms:
-                    alarm_id = alarm.get('id')
-                    snooze_until_ts = alarm.get('snooze_until')
-                    
-                    if not alarm.get('enabled') or alarm_id in self.ringing_alarms: 
-                        continue
-                        
-                    if snooze_until_ts and now < datetime.datetime.fromtimestamp(snooze_until_ts): 
-                        continue
-                    elif snooze_until_ts: 
-                        alarms_to_unsnooze.append(alarm_id)
-                        alarm['snooze_until'] = None
-                        
-                    alarm_hour, alarm_minute = alarm.get('hour', -1), alarm.get('minute', -1)
-                    if now.hour != alarm_hour or now.minute != alarm_minute or now.second != 0: 
-                        continue
-                        
-                    recurrence_type = alarm.get('recurrence_type', RECURRENCE_ONCE)
-                    last_triggered = alarm.get('last_triggered_day')
-                    specific_date = alarm.get('specific_date')
-                    
-                    should_trigger = (recurrence_type == RECURRENCE_SPECIFIC_DATE and specific_date == current_date_str and last_triggered != current_date_str) or \
-                                     (recurrence_type == RECURRENCE_ONCE and not specific_date and last_triggered != current_date_str) or \
-                                     (recurrence_type == RECURRENCE_DAILY) or \
-                                     (recurrence_type == RECURRENCE_WEEKDAYS and current_day_index in WEEKDAYS) or \
-                                     (recurrence_type == RECURRENCE_WEEKENDS and current_day_index in WEEKENDS) or \
-                                     (recurrence_type == "Specific Days" and current_day_index in alarm.get('recurrence_days', []))
-                                     
-                    if last_triggered == current_date_str and recurrence_type in [RECURRENCE_ONCE, RECURRENCE_SPECIFIC_DATE]: 
-                        should_trigger = False
-                        
-                    if should_trigger: 
-                        alarms_to_trigger.append(alarm_id)
-                        alarm['last_triggered_day'] = current_date_str
+            now = CLOCK.now()
+            # Scan a lock-free snapshot; state changes are published in one store write afterwards.
+            snapshot = self.alarm_store.snapshot()
+            alarms_to_trigger, alarms_to_unsnooze, state_changes = scheduler_pass(snapshot, now, snapshot.group_of, self.ringing_alarms)
+            if state_changes:
+                self.alarm_store.update_fields(state_changes, source='scheduler')
                         
             if alarms_to_trigger or alarms_to_unsnooze:
-                ids_to_action = list(set(alarms_to_trigger + alarms_to_unsnooze))
+                ids_to_action = list(dict.fromkeys(alarms_to_trigger + alarms_to_unsnooze))
                 if self.root and self.root.winfo_exists():
                     try: 
                         self.root.after(0, lambda ids=ids_to_action: self.trigger_multiple_alarms(ids))
                     except tk.TclError: 
                         pass
                         
-            time.sleep(0.5)
+            if time.monotonic() - self._last_preload_scan >= PRELOAD_SCAN_INTERVAL_S:
+                self._last_preload_scan = time.monotonic()
+                self.preload_upcoming_sounds(now)
+                self.release_audio_if_idle()
+            # Edits wake the scan early so a changed alarm is seen without waiting out the tick.
+            self.alarm_store.wait_for_change(0.5)
+
+    def preload_upcoming_sounds(self, now):
+        window_s = self.settings.get('sound_preload_seconds', DEFAULT_SOUND_PRELOAD_SECONDS)
+        if window_s <= 0:
+            return
+        # The scan runs every PRELOAD_SCAN_INTERVAL_S, so look that much further ahead.
+        window = datetime.timedelta(seconds=window_s + PRELOAD_SCAN_INTERVAL_S)
+        alarms = self.alarm_store.snapshot()
+        upcoming = [alarm for alarm in alarms if alarm.get('id') not in self.ringing_alarms and upcoming_fire_time(alarm, now, window, alarms.group_of(alarm))]
+        if upcoming and self.ensure_audio():
+            for alarm in upcoming:
+                self.sound_preloader.request(alarm.get('sound_file'))
 
     def trigger_multiple_alarms(self, alarm_ids):
         if not self.root or not self.root.winfo_exists(): 
             return
             
         first_newly_ringing_id = None
-        with self.alarm_lock:
-             for alarm_id in alarm_ids:
-                 alarm_data = next((a for a in self.alarms if a.get('id') == alarm_id), None)
-                 if alarm_id not in self.ringing_alarms and alarm_data and alarm_data.get('enabled'):
-                    sound_identifier = alarm_data.get('sound_file')
-                    channel, fade_job = self._play_sound_with_fade(sound_identifier)
-                    if channel is not None: 
-                        self.ringing_alarms[alarm_id] = {'channel': channel, 'fade_job': fade_job}
-                        first_newly_ringing_id = first_newly_ringing_id or alarm_id
-                    else: 
-                        print(f"Failed sound for alarm {alarm_id}")
-                    self.send_notification(alarm_data)
+        to_notify = []
+        snapshot = self.alarm_store.snapshot()
+        for alarm_id in alarm_ids:
+            alarm_data = snapshot.get(alarm_id)
+            if alarm_id not in self.ringing_alarms and alarm_data and alarm_data.get('enabled'):
+                sound_identifier = alarm_data.get('sound_file')
+                voice_key = self._play_sound_with_fade(alarm_id, sound_identifier, alarm_data.get('priority', PRIORITY_NORMAL))
+                if voice_key is not None: 
+                    self.ringing_alarms[alarm_id] = {'voice': voice_key}
+                    first_newly_ringing_id = first_newly_ringing_id or alarm_id
+                else: 
+                    print(f"Failed sound for alarm {alarm_id}")
+                to_notify.append(alarm_data)
+        for alarm_data in to_notify:
+            self.send_notification(alarm_data)
                     
         try: 
             self.update_ringing_ui()
@@ -1175,138 +5074,170 @@ class AlarmClockApp:
         if not identifier: 
             return None
             
-        if identifier.startswith("builtin:"):
-             sound_name = identifier.split(":", 1)[1]
-             path = resource_path(os.path.join(DEFAULT_SOUNDS_DIR, sound_name))
-             if not os.path.exists(path): 
-                 print(f"Built-in sound missing: {path}")
-                 return None
-             return path
+        path = self.sound_catalog.resolve(identifier)
+        if path:
+            return path
+        if identifier.startswith(("builtin:", "user:")):
+             print(f"Sound not in catalog: {identifier}")
+             return None
+        # Custom files outside the catalogued folders are checked directly.
         elif os.path.exists(identifier): 
             return identifier
         else: 
             print(f"Sound path missing: {identifier}")
             return None
 
-    def _play_sound_with_fade(self, sound_identifier):
+    # --- Audio Subsystem Lifecycle ---
+    def ensure_audio(self):
+        """Open the mixer if it isn't already. Safe to call from any thread; returns False if audio is unavailable."""
+        with self._audio_lock:
+            self._audio_last_used = time.monotonic()
+            if pygame.mixer.get_init():
+                return True
+            try:
+                start = time.perf_counter()
+                frequency, sample_format, channels = MIXER_FORMAT
+                pygame.mixer.init(frequency=frequency, size=sample_format, channels=channels, buffer=MIXER_BUFFER)
+                pygame.mixer.set_num_channels(INITIAL_MIXER_CHANNELS)
+                print(f"Mixer OK in {(time.perf_counter() - start) * 1000:.0f} ms. Ch: {pygame.mixer.get_num_channels()}")
+                return True
+            except pygame.error as e:
+                print(f"Mixer init fail: {e}")
+                if not self._audio_error_reported:
+                    self._audio_error_reported = True
+                    try:
+                        self.root.after(0, lambda: messagebox.showerror("Audio Error", f"Mixer init fail: {e}\nSounds off."))
+                    except (tk.TclError, RuntimeError):
+                        pass
+                return False
+
+    def release_audio_if_idle(self):
+        idle_seconds = self.settings.get('audio_idle_seconds', DEFAULT_AUDIO_IDLE_SECONDS)
+        if idle_seconds <= 0:
+            return
+        with self._audio_lock:
+            if not pygame.mixer.get_init() or self.ringing_alarms or self.audio.active_count() or MusicStream.in_use:
+                return
+            if time.monotonic() - self._audio_last_used < idle_seconds:
+                return
+            print(f"Releasing idle mixer. Sound cache: {self.sound_cache.stats()}")
+            # Decoded Sounds are tied to the open mixer, so they go with it.
+            self.sound_cache.clear()
+            self.channel_manager.reset()
+            pygame.mixer.quit()
+
+    def prepare_sound(self, sound_identifier):
+        """Transcode a newly chosen sound into the normalized store on a background thread."""
+        def worker():
+            try:
+                sound_path = self._resolve_sound_path(sound_identifier)
+                if not sound_path or not self.ensure_audio():
+                    return
+                threshold_bytes = self.settings.get('streaming_threshold_mb', DEFAULT_STREAMING_THRESHOLD_MB) * 1024 * 1024
+                if os.path.getsize(sound_path) < threshold_bytes:
+                    self.normalized_sounds.normalize(sound_path)
+            except Exception as e:
+                print(f"Sound prepare error {sound_identifier}: {e}")
+        threading.Thread(target=worker, name="SoundNormalizer", daemon=True).start()
+
+    def _play_sound_with_fade(self, alarm_id, sound_identifier, priority=PRIORITY_NORMAL):
         sound_path = self._resolve_sound_path(sound_identifier)
-        if not sound_path or not pygame.mixer.get_init(): 
-            return None, None
+        if not sound_path or not self.ensure_audio(): 
+            return None
             
         target_volume = self.volume_var.get()
+        escalate_ms = ESCALATE_DURATION_MS if self.settings.get('escalate_volume', False) else 0
         try:
-            sound = pygame.mixer.Sound(sound_path)
-            channel = pygame.mixer.find_channel(True)
-            if channel: 
-                print(f"Starting {sound_path} on {channel} with fade...")
-                channel.set_volume(0)
-                channel.play(sound, loops=-1)
-                fade_job_id = self._schedule_fade_in(channel, target_volume, FADE_IN_DURATION_MS, FADE_IN_STEPS)
-                return channel, fade_job_id
-            else: 
+            threshold_bytes = self.settings.get('streaming_threshold_mb', DEFAULT_STREAMING_THRESHOLD_MB) * 1024 * 1024
+            stream = os.path.getsize(sound_path) >= threshold_bytes
+            pcm_path = None
+            if stream and not WavStream.supports(sound_path):
+                if not MusicStream.in_use:
+                    print(f"Streaming {sound_path} via music stream with fade...")
+                    voice_key = f"music:{alarm_id}"
+                    self.audio.start_voice(voice_key, MusicStream(sound_path), target_volume, FADE_IN_DURATION_MS, escalate_ms)
+                    return voice_key
+                pcm_path = self.normalized_sounds.pcm_path_for(sound_path)
+                if pcm_path is None:
+                    # Decoding the whole file would defeat streaming, so ring with the fallback sound.
+                    print(f"Music stream busy and no normalized copy of {sound_path}; using {FALLBACK_SOUND}")
+                    if sound_identifier == FALLBACK_SOUND:
+                        return None
+                    return self._play_sound_with_fade(alarm_id, FALLBACK_SOUND, priority)
+                
+            allocation = self.channel_manager.acquire(alarm_id, sound_path, priority)
+            if allocation is None: 
                 print("No free channels.")
-                return None, None
+                return None
+            voice_key, channel, shared, evicted_voice = allocation
+            if shared:
+                print(f"Sharing {voice_key} already playing {sound_path}")
+                return voice_key
+            if evicted_voice:
+                self._silence_voice(evicted_voice)
+                
+            try:
+                if pcm_path:
+                    print(f"Streaming normalized {sound_path} on {voice_key} with fade...")
+                    output = PcmStream(pcm_path, channel)
+                elif stream and WavStream.supports(sound_path):
+                    print(f"Streaming {sound_path} on {voice_key} with fade...")
+                    output = WavStream(sound_path, channel)
+                else:
+                    sound = self.sound_cache.get(sound_path)
+                    print(f"Starting {sound_path} on {voice_key} with fade...")
+                    channel.set_volume(0)
+                    channel.play(sound, loops=-1)
+                    output = channel
+            except Exception:
+                self.channel_manager.release(alarm_id)
+                raise
+            self.audio.start_voice(voice_key, output, target_volume, FADE_IN_DURATION_MS, escalate_ms)
+            return voice_key
         except Exception as e: 
+            # No modal here: this runs as the alarm rings, so fall back to the default sound and say why.
             print(f"Sound prepare error {sound_path}: {e}")
-            messagebox.showerror("Sound Error", f"Could not play:\n{os.path.basename(sound_path)}\n{e}")
-            return None, None
+            if sound_identifier == FALLBACK_SOUND:
+                return None
+            self.notifications.submit("Sound Error", f"Could not play {os.path.basename(sound_path)}: {e}. Using the default sound.", timeout=10)
+            return self._play_sound_with_fade(alarm_id, FALLBACK_SOUND, priority)
 
-    # FIXED: This method has been corrected to avoid modifying dictionary during iteration
-    def _schedule_fade_in(self, channel, target_volume, duration_ms, steps):
-        if not self.root or not self.root.winfo_exists(): 
-            return None
-            
-        step_delay = max(1, duration_ms // steps)
-        volume_step = target_volume / steps
-        current_step = 0
-        
-        def fade_step(current_step):
-            try:
-                if not self.running or not channel.get_busy():
-                    print(f"Fade cancelled for {channel}")
-                    return
-                current_step += 1
-                next_volume = min(volume_step * current_step, target_volume)
-                channel.set_volume(next_volume)
-                
-                if current_step < steps:
-                    job_id = self.root.after(step_delay, lambda cs=current_step: fade_step(cs))
-                    # Update fade job in ringing_alarms without modifying during iteration
-                    for alarm_id, info in list(self.ringing_alarms.items()):
-                        if info.get('channel') == channel:
-                            self.ringing_alarms[alarm_id]['fade_job'] = job_id
-                            break  # Found it, stop loop
-                else:
-                    print(f"Fade complete for {channel}")
-                    # Update fade job completion in ringing_alarms
-                    for alarm_id, info in list(self.ringing_alarms.items()):
-                        if info.get('channel') == channel:
-                            self.ringing_alarms[alarm_id]['fade_job'] = None
-                            break  # Found it, stop loop
-            except tk.TclError:
-                print("Error during fade step (window closed?).")
-            except Exception as e:
-                print(f"Unexpected error in fade_step: {e}")
-        
-        # Start fade
-        try:
-            initial_job_id = self.root.after(step_delay, lambda: fade_step(0))
-            return initial_job_id
-        except tk.TclError:
-            print("Error scheduling initial fade step (window closed?).")
-            return None
+    def _silence_voice(self, voice_key):
+        # The channel was reassigned; the alarms that used it stay ringing (UI and snooze) but go quiet.
+        self.audio.stop_voice(voice_key)
+        for ring_info in self.ringing_alarms.values():
+            if ring_info.get('voice') == voice_key:
+                ring_info['voice'] = None
 
-    # FIXED: This method has been corrected to add better error handling
-    def _stop_sound(self, alarm_id):
+    def _stop_sound(self, alarm_id, fade=True):
         if alarm_id in self.ringing_alarms:
             ring_info = self.ringing_alarms.pop(alarm_id)
-            channel = ring_info.get('channel')
-            fade_job_id = ring_info.get('fade_job')
-            
-            if fade_job_id and self.root and self.root.winfo_exists():
-                try:
-                    self.root.after_cancel(fade_job_id)
-                    print(f"Cancelled fade job {fade_job_id}")
-                except tk.TclError:
-                    # Job might already be invalid or window closing
-                    print(f"Ignoring TclError cancelling fade job {fade_job_id}")
-                except Exception as e:
-                    # Catch other potential errors during cancellation
-                    print(f"Error cancelling fade job {fade_job_id}: {e}")
-            
-            if channel and channel.get_busy():
-                print(f"Stopping sound on {channel}")
-                try:
-                    channel.stop()
-                except Exception as e:
-                    print(f"Error stopping channel: {e}")
+            voice_key = ring_info.get('voice')
+            if voice_key and not voice_key.startswith("music:"):
+                voice_key = self.channel_manager.release(alarm_id)
+            if voice_key:
+                fade_out_ms = self.settings.get('fade_out_ms', DEFAULT_FADE_OUT_MS) if fade else 0
+                self.audio.stop_voice(voice_key, fade_out_ms)
                     
             if self.currently_handled_ringing_id == alarm_id:
                 self.currently_handled_ringing_id = next(iter(self.ringing_alarms.keys()), None)
 
     def send_notification(self, alarm_data):
-        try: 
-            # Get current time for the notification
-            now = datetime.datetime.now()
-            current_time = format_alarm_time(now.hour, now.minute, self.time_format.get())
-            
-            # Get alarm details
-            alarm_time = format_alarm_time(alarm_data.get('hour',0), alarm_data.get('minute',0), self.time_format.get())
-            label = alarm_data.get('label', '')
-            
-            # Create notification message with current time
-            message = f"Alarm {alarm_time}" + (f": {label}" if label else "")
-            title = f"ALARM! ({current_time})"
-            
-            notification.notify(
-                title=title, 
-                message=message, 
-                app_name='Enhanced Alarm Clock', 
-                app_icon=self.icon_path, 
-                timeout=15
-            )
-        except Exception as e: 
-            print(f"Notify error: {e}")
+        # Get current time for the notification
+        now = CLOCK.now()
+        current_time = format_alarm_time(now.hour, now.minute, self.time_format.get())
+        
+        # Get alarm details
+        alarm_time = format_alarm_time(alarm_data.get('hour',0), alarm_data.get('minute',0), self.time_format.get())
+        label = alarm_data.get('label', '')
+        
+        # Create notification message with current time
+        message = f"Alarm {alarm_time}" + (f": {label}" if label else "")
+        title = f"ALARM! ({current_time})"
+        
+        # Alarms firing together are merged into a single summary notification
+        summarize = lambda items: (f"{len(items)} ALARMS! ({current_time})", "\n".join(i['message'] for i in items))
+        self.notifications.submit(title, message, timeout=15, coalesce_key='alarm', summarize=summarize)
 
     def update_ringing_ui(self):
         if threading.current_thread() != threading.main_thread():
@@ -1320,7 +5251,9 @@ class AlarmClockApp:
             self.update_alarm_list_display()
         except tk.TclError: 
             pass
-            
+        self.update_ringing_controls()
+
+    def update_ringing_controls(self):
         try:
             if self.ringing_alarms:
                 if not self.ringing_controls_frame.winfo_ismapped(): 
@@ -1328,9 +5261,10 @@ class AlarmClockApp:
                 first_ringing_id = self.currently_handled_ringing_id
                 status_text = "ALARMS RINGING!"
                 
-                if first_ringing_id:
-                     with self.alarm_lock: 
-                         alarm_data = next((a for a in self.alarms if a.get('id') == first_ringing_id), None)
+                if first_ringing_id in self.timers:
+                     status_text = f"TIMER: {self.timers[first_ringing_id]['label']}"
+                elif first_ringing_id:
+                     alarm_data = self.alarm_store.get(first_ringing_id)
                      if alarm_data: 
                          d_time = format_alarm_time(alarm_data.get('hour',0), alarm_data.get('minute',0), self.time_format.get())
                          d_label = alarm_data.get('label','')
@@ -1360,35 +5294,25 @@ class AlarmClockApp:
             print("Error getting snooze duration, using default.")
             snooze_minutes = DEFAULT_SNOOZE_MINUTES
             
+        if alarm_id.startswith(TIMER_ID_PREFIX):
+            return self.stop_timer_ring(alarm_id, snooze_minutes)
         print(f"Snoozing {alarm_id} for {snooze_minutes}m")
-        snooze_until = datetime.datetime.now() + datetime.timedelta(minutes=snooze_minutes)
+        snooze_until = CLOCK.now() + datetime.timedelta(minutes=snooze_minutes)
         snooze_until_ts = snooze_until.timestamp()
         
-        with self.alarm_lock:
-             for alarm in self.alarms:
-                 if alarm.get('id') == alarm_id: 
-                     # Set snooze timestamp
-                     alarm['snooze_until'] = snooze_until_ts
-                     # Reset last_triggered_day to ensure it will trigger again after snooze
-                     if alarm.get('recurrence_type') in [RECURRENCE_ONCE, RECURRENCE_SPECIFIC_DATE]:
-                         alarm['last_triggered_day'] = None
-                     break
-             self._stop_sound(alarm_id)
+        alarm = self.alarm_store.get(alarm_id)
+        if alarm:
+            # Set snooze timestamp
+            changes = {'snooze_until': snooze_until_ts}
+            # Reset last_triggered_day to ensure it will trigger again after snooze
+            if alarm_rule(alarm).is_single:
+                changes['last_triggered_day'] = None
+            self.alarm_store.update_fields({alarm_id: changes})
+        self._stop_sound(alarm_id)
              
         # Show notification about snooze
-        try:
-            snooze_time = snooze_until.strftime("%H:%M")
-            notification.notify(
-                title='Alarm Snoozed', 
-                message=f"Alarm snoozed until {snooze_time}", 
-                app_name='Enhanced Alarm Clock', 
-                app_icon=self.icon_path, 
-                timeout=5
-            )
-        except Exception as e:
-            print(f"Snooze notification error: {e}")
-             
-        self.save_alarms()
+        snooze_time = snooze_until.strftime("%H:%M")
+        self.notifications.submit('Alarm Snoozed', f"Alarm snoozed until {snooze_time}", timeout=5)
         self.update_ringing_ui()
 
     def stop_current_alarm(self):
@@ -1397,30 +5321,229 @@ class AlarmClockApp:
             return
             
         print(f"Stopping {alarm_id}")
-        with self.alarm_lock:
-             for alarm in self.alarms:
-                if alarm.get('id') == alarm_id: 
-                    alarm['snooze_until'] = None
-                    break
-             self._stop_sound(alarm_id)
-             
-        self.save_alarms()
+        if alarm_id.startswith(TIMER_ID_PREFIX):
+            return self.stop_timer_ring(alarm_id)
+        alarm = self.alarm_store.get(alarm_id)
+        if alarm:
+            self.alarm_store.update_fields({alarm_id: dismissal_changes(alarm)})
+        self._stop_sound(alarm_id)
+        self.update_ringing_ui()
+
+    # --- Countdown Timers ---
+    def start_timer(self, seconds, label="", sound_file=None):
+        timer_id = TIMER_ID_PREFIX + uuid.uuid4().hex[:8]
+        self.timers[timer_id] = {'id': timer_id, 'label': label, 'duration': seconds, 'remaining': seconds,
+                                 'deadline': None, 'handle': None, 'state': 'paused', 'sound_file': sound_file}
+        self._arm_timer(timer_id, seconds)
+        return timer_id
+
+    def start_timer_from_entry(self):
+        try:
+            seconds = parse_duration(self.timer_duration_var.get())
+        except ValueError as e:
+            return messagebox.showerror("Timer", str(e), parent=self.root)
+        entry = self.sound_catalog.lookup_display(self.timer_sound_var.get())
+        label = self.timer_label_var.get().strip() or f"{format_duration(seconds)} timer"
+        self.start_timer(seconds, label, entry.identifier if entry else None)
+
+    def _arm_timer(self, timer_id, seconds):
+        timer = self.timers[timer_id]
+        self.timer_engine.start()
+        if timer['handle'] is not None:
+            self.timer_engine.cancel(timer['handle'])
+        timer['deadline'] = time.monotonic() + seconds
+        timer['handle'] = self.timer_engine.schedule(seconds, lambda: self._on_timer_due(timer_id))
+        timer['state'] = 'running'
+        self.update_timers_display()
+
+    def _on_timer_due(self, timer_id):
+        # Runs on the engine thread at the deadline; sound and UI belong to Tk.
+        try:
+            self.root.after(0, lambda: self._fire_timer(timer_id))
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _fire_timer(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if not timer or timer['state'] != 'running':
+            return
+        timer.update(state='ringing', handle=None, remaining=0)
+        # Timers ring like alarms, so the ringing controls, fades and channel limits apply to them too.
+        self.ringing_alarms[timer_id] = {'voice': self._play_sound_with_fade(timer_id, timer['sound_file'])}
+        self.currently_handled_ringing_id = self.currently_handled_ringing_id or timer_id
+        summarize = lambda items: (f"{len(items)} TIMERS DONE", "\n".join(i['message'] for i in items))
+        self.notifications.submit("TIMER DONE", f"{timer['label']} ({format_duration(timer['duration'])})", timeout=15, coalesce_key='timer', summarize=summarize)
+        self.update_ringing_ui()
+        self.update_timers_display()
+        self.show_window()
+
+    def pause_timer(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if timer and timer['state'] == 'running':
+            self.timer_engine.cancel(timer['handle'])
+            timer.update(state='paused', handle=None, remaining=max(0.0, timer['deadline'] - time.monotonic()))
+            self.update_timers_display()
+
+    def resume_timer(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if timer and timer['state'] == 'paused':
+            self._arm_timer(timer_id, timer['remaining'])
+
+    def restart_timer(self, timer_id):
+        if timer_id in self.ringing_alarms:
+            self._stop_sound(timer_id)
+            self.update_ringing_ui()
+        if timer_id in self.timers:
+            self._arm_timer(timer_id, self.timers[timer_id]['duration'])
+
+    def remove_timer(self, timer_id):
+        timer = self.timers.pop(timer_id, None)
+        if timer and timer['handle'] is not None:
+            self.timer_engine.cancel(timer['handle'])
+        if timer_id in self.ringing_alarms:
+            self._stop_sound(timer_id)
+            self.update_ringing_ui()
+        self.update_timers_display()
+
+    def stop_timer_ring(self, timer_id, snooze_minutes=None):
+        self._stop_sound(timer_id)
+        timer = self.timers.get(timer_id)
+        if timer and snooze_minutes:
+            self._arm_timer(timer_id, snooze_minutes * 60)
+        elif timer:
+            timer['state'] = 'done'
+            self.update_timers_display()
         self.update_ringing_ui()
 
+    def selected_timer_ids(self):
+        try:
+            return [iid for iid in self.timer_tree.selection() if iid in self.timers]
+        except (tk.TclError, AttributeError):
+            return []
+
+    def toggle_selected_timers(self):
+        for timer_id in self.selected_timer_ids():
+            if self.timers[timer_id]['state'] == 'running':
+                self.pause_timer(timer_id)
+            else:
+                self.resume_timer(timer_id)
+
+    def restart_selected_timers(self):
+        for timer_id in self.selected_timer_ids():
+            self.restart_timer(timer_id)
+
+    def remove_selected_timers(self):
+        for timer_id in self.selected_timer_ids():
+            self.remove_timer(timer_id)
+
+    def on_timer_select(self, event=None):
+        state = tk.NORMAL if self.selected_timer_ids() else tk.DISABLED
+        for button in self.timer_buttons:
+            button.config(state=state)
+
+    def update_timers_display(self):
+        if not hasattr(self, 'timer_tree'):
+            return
+        now = time.monotonic()
+        try:
+            for iid in self.timer_tree.get_children():
+                if iid not in self.timers:
+                    self.timer_tree.delete(iid)
+            for timer_id, timer in self.timers.items():
+                remaining = timer['deadline'] - now if timer['state'] == 'running' else timer['remaining']
+                values = (timer['label'], format_duration(remaining), format_duration(timer['duration']), timer['state'].capitalize())
+                tags = (timer['state'],) if timer['state'] in ('ringing', 'paused') else ()
+                if self.timer_tree.exists(timer_id):
+                    self.timer_tree.item(timer_id, values=values, tags=tags)
+                else:
+                    self.timer_tree.insert("", tk.END, iid=timer_id, values=values, tags=tags)
+            self.on_timer_select()
+        except tk.TclError:
+            pass
+
+    def _timers_refresh_loop(self):
+        # Only the display polls; timers fire from the engine at their deadlines.
+        if not self.running:
+            return
+        try:
+            if self.notebook.select() == str(self.timers_tab_frame) and self.root.winfo_viewable():
+                if any(t['state'] == 'running' for t in self.timers.values()):
+                    self.update_timers_display()
+                if self._stopwatch_started is not None:
+                    self.stopwatch_var.set(format_duration(self.stopwatch_elapsed(), hundredths=True))
+            self.root.after(TIMER_DISPLAY_REFRESH_MS, self._timers_refresh_loop)
+        except tk.TclError:
+            pass
+
+    # --- Stopwatch ---
+    def stopwatch_elapsed(self):
+        running = time.monotonic() - self._stopwatch_started if self._stopwatch_started is not None else 0.0
+        return self._stopwatch_elapsed + running
+
+    def toggle_stopwatch(self):
+        if self._stopwatch_started is None:
+            self._stopwatch_started = time.monotonic()
+            self.stopwatch_button.config(text="Stop")
+        else:
+            self._stopwatch_elapsed = self.stopwatch_elapsed()
+            self._stopwatch_started = None
+            self.stopwatch_button.config(text="Start")
+        self.stopwatch_var.set(format_duration(self.stopwatch_elapsed(), hundredths=True))
+
+    def stopwatch_lap(self):
+        if self._stopwatch_started is None:
+            return
+        total = self.stopwatch_elapsed()
+        split = total - (self._stopwatch_laps[-1] if self._stopwatch_laps else 0.0)
+        self._stopwatch_laps.append(total)
+        self.lap_tree.insert("", 0, values=(len(self._stopwatch_laps), format_duration(split, hundredths=True), format_duration(total, hundredths=True)))
+
+    def reset_stopwatch(self):
+        self._stopwatch_started = None
+        self._stopwatch_elapsed = 0.0
+        self._stopwatch_laps = []
+        self.stopwatch_button.config(text="Start")
+        self.stopwatch_var.set(format_duration(0, hundredths=True))
+        self.lap_tree.delete(*self.lap_tree.get_children())
+
     # --- System Tray & Window Management ---
     def setup_tray_icon(self):
         try: 
             image = Image.open(self.icon_path)
             menu = (
                 pystray.MenuItem('Show', self.show_window, default=True),
+                pystray.MenuItem('Upcoming', pystray.Menu(self._tray_upcoming_items)),
                 pystray.MenuItem('Quit', self.quit_application)
             )
             self.tray_icon = pystray.Icon("alarm_clock", image, "Enhanced Alarm Clock", menu)
+            self.update_next_alarm_display()
             self.tray_thread = threading.Thread(target=self.run_tray_icon, daemon=True)
             self.tray_thread.start()
         except Exception as e: 
             print(f"Tray setup error: {e}")
             
+    def _tray_upcoming_items(self):
+        # Built by pystray on its own thread from the list cached by update_next_alarm_display.
+        if not self._tray_upcoming:
+            return (pystray.MenuItem('No upcoming alarms', None, enabled=False),)
+        minutes = max(1, self.settings.get('snooze_minutes', DEFAULT_SNOOZE_MINUTES))
+        return tuple(
+            pystray.MenuItem(text, pystray.Menu(
+                pystray.MenuItem(f'Snooze {minutes} min', self._tray_action(self.snooze_upcoming_alarm, alarm_id, minutes)),
+                pystray.MenuItem('Skip', self._tray_action(self.skip_next_occurrence, alarm_id)),
+            ))
+            for alarm_id, text in self._tray_upcoming
+        )
+
+    def _tray_action(self, fn, *args):
+        # Tray callbacks run on the tray thread; hand the work to Tk.
+        def action():
+            try:
+                self.root.after(0, lambda: fn(*args))
+            except (tk.TclError, RuntimeError):
+                pass
+        return action
+
     def run_tray_icon(self):
         if self.tray_icon: 
             print("Starting tray...")
@@ -1445,16 +5568,7 @@ class AlarmClockApp:
     def hide_to_tray(self):
          if self.root and self.root.winfo_exists(): 
              self.root.withdraw()
-         try: 
-             notification.notify(
-                 title='Clock Minimized',
-                 message='Running in system tray.',
-                 app_name='Enhanced Alarm Clock',
-                 app_icon=self.icon_path,
-                 timeout=5
-             )
-         except Exception as e: 
-             print(f"Hide notify error: {e}")
+         self.notifications.submit('Clock Minimized', 'Running in system tray.', timeout=5)
 
     # FIXED: This method has been corrected to handle errors better during shutdown
     def quit_application(self):
@@ -1471,18 +5585,32 @@ class AlarmClockApp:
             except Exception as e:
                 print(f"Error stopping tray: {e}")
         
+        # Stop watching for external edits
+        self.file_watcher.stop()
+        self.timer_engine.stop()
+        print(f"Timer engine stats: {self.timer_engine.stats()}")
+        
         # Stop all sounds
         print("Stopping sounds...")
         try:
-            with self.alarm_lock:
-                ringing_ids = list(self.ringing_alarms.keys())
-                for aid in ringing_ids:
-                    self._stop_sound(aid)
+            for aid in list(self.ringing_alarms.keys()):
+                self._stop_sound(aid, fade=False)
+            self.audio.shutdown()
         except Exception as e:
             print(f"Error stopping sounds: {e}")
         
+        self.notifications.stop()
+        print(f"Notification stats: {self.notifications.stats()}")
+        
         # Quit pygame
         print("Quitting pygame...")
+        self.sound_preloader.stop()
+        self.sound_importer.shutdown()
+        print(f"Sound cache stats: {self.sound_cache.stats()}")
+        print(f"Channel stats: {self.channel_manager.stats()}")
+        print(f"Alarm store stats: {self.alarm_store.stats()}")
+        print(f"Next-fire index stats: {self.next_fires.stats()}")
+        self.sound_cache.clear()
         try:
             if pygame.mixer.get_init():
                 pygame.mixer.quit()
@@ -1499,6 +5627,9 @@ class AlarmClockApp:
             self.save_world_clocks()
         except Exception as e:
             print(f"Error during final save: {e}")
+        if not self.persistence.stop(PERSISTENCE_FLUSH_TIMEOUT_S):
+            print("Warning: pending writes did not finish before shutdown.")
+        print(f"Persistence stats: {self.persistence.stats()}")
         
         # Destroy window
         print("Destroying window...")
@@ -1522,27 +5653,31 @@ class AlarmClockApp:
 # --- Alarm Add/Edit Dialog Window ---
 class AlarmDialog(tk.Toplevel):
     BUILTIN_SOUNDS_PREFIX = "builtin:"
+    USER_SOUNDS_PREFIX = "user:"
     BROWSE_OPTION = "<Browse for file...>"
+    IMPORT_FOLDER_OPTION = "<Import folder...>"
 
-    def __init__(self, parent, title, save_callback, time_format="12h", initial_data=None, current_theme='light'):
+    def __init__(self, parent, title, save_callback, time_format="12h", initial_data=None, current_theme='light', sound_prepare_callback=None, sound_import_callback=None, sound_catalog=None):
         super().__init__(parent)
         self.transient(parent)
         self.grab_set()
         self.title(title)
-        self.geometry("480x450")
+        self.geometry("480x530")
         self.resizable(False, False)
 
-        # Store theme colors locally
-        self.BG_COLOR = D_COLOR_BACKGROUND if current_theme == 'dark' else L_COLOR_BACKGROUND
-        self.FRAME_BG = D_COLOR_FRAME_BG if current_theme == 'dark' else L_COLOR_FRAME_BG
-        self.TEXT_COLOR = D_COLOR_TEXT if current_theme == 'dark' else L_COLOR_TEXT
-        self.ACCENT_COLOR = D_COLOR_ACCENT if current_theme == 'dark' else L_COLOR_ACCENT
-        self.ACCENT_FG = D_COLOR_ACCENT_FG # Assumed same for both
-        self.TEXT_SECONDARY = D_COLOR_TEXT_SECONDARY if current_theme == 'dark' else L_COLOR_TEXT_SECONDARY
-
-        self.configure(bg=self.BG_COLOR) # Apply background
+        # ttk styles are shared with the main window, which has already applied the active theme set
+        self.palette = theme_palette(current_theme)
+        self.configure(bg=self.palette['bg']) # Apply background
 
         self.save_callback = save_callback
+        self.sound_prepare_callback = sound_prepare_callback
+        self.sound_import_callback = sound_import_callback
+        if sound_catalog is None:
+            sound_catalog = SoundCatalog(default_sound_sources())
+            sound_catalog.refresh()
+        self.sound_catalog = sound_catalog
+        self.import_status_var = tk.StringVar()
+        self.pending_import_path = None
         self.initial_data = initial_data or {}
         self.result = None
         self.time_format = time_format
@@ -1555,47 +5690,37 @@ class AlarmDialog(tk.Toplevel):
         self.recurrence_type_var = tk.StringVar(value=self.initial_data.get('recurrence_type', RECURRENCE_ONCE))
         self.day_vars = {i: tk.BooleanVar(value=(i in self.initial_data.get('recurrence_days', []))) for i in range(7)}
         self.specific_date_var = tk.StringVar(value=self.initial_data.get('specific_date', ''))
-
-        # Setup styles *locally* using the stored theme colors
-        self.style = ttk.Style(self)
-        self.style.configure('.', background=self.BG_COLOR, foreground=self.TEXT_COLOR, fieldbackground=self.FRAME_BG)
-        self.style.configure('TFrame', background=self.BG_COLOR)
-        self.style.configure('TLabel', background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('TCheckbutton', background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('TRadiobutton', background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        self.style.configure('TButton', font=(FONT_FAMILY_UI, FONT_SIZE_BASE, 'bold'), padding=(8, 5), background=self.ACCENT_COLOR, foreground=self.ACCENT_FG)
-        self.style.configure('Secondary.TButton', background=self.TEXT_SECONDARY, foreground=self.ACCENT_FG)
-        self.style.map('TCombobox', fieldbackground=[('readonly', self.FRAME_BG)])
-        self.style.map('TCombobox', selectbackground=[('readonly', self.FRAME_BG)])
-        self.style.map('TCombobox', selectforeground=[('readonly', self.TEXT_COLOR)])
-        self.style.configure('TSpinbox', fieldbackground=self.FRAME_BG, foreground=self.TEXT_COLOR, arrowcolor=self.TEXT_COLOR)
+        spec = self.initial_data.get('recurrence') or {}
+        today_str = CLOCK.today().strftime("%Y-%m-%d")
+        self.interval_var = tk.StringVar(value=str(spec.get('interval', 1)))
+        self.unit_var = tk.StringVar(value={FREQ_DAILY: "days", FREQ_MONTHLY: "months"}.get(spec.get('freq'), "weeks"))
+        self.monthly_mode_var = tk.StringVar(value="nth" if spec.get('nth') else "day")
+        self.monthday_var = tk.StringVar(value=str(spec.get('monthday') or int((spec.get('start') or today_str)[8:10])))
+        nth = spec.get('nth') or (1, 0)
+        self.nth_var = tk.StringVar(value=ORDINAL_NAMES.get(nth[0], "1st"))
+        self.nth_day_var = tk.StringVar(value=DAY_NAMES[nth[1]])
+        self.start_date_var = tk.StringVar(value=spec.get('start') or today_str)
+        self.end_mode_var = tk.StringVar(value="On date" if spec.get('until') else ("After N times" if spec.get('count') else "Never"))
+        self.end_value_var = tk.StringVar(value=spec.get('until') or str(spec.get('count') or ""))
+        self.exdates_var = tk.StringVar(value=", ".join(spec.get('exdates', ())))
+        chosen = list(self.initial_data.get('exclusion_calendars', []))
+        # Names whose calendar file is missing right now stay listed so saving does not drop them.
+        self.exclusion_vars = {name: tk.BooleanVar(value=name in chosen) for name in sorted(set(EXCLUSION_CALENDARS.names()) | set(chosen))}
+        self.priority_var = tk.StringVar(value=PRIORITY_NAMES.get(self.initial_data.get('priority', PRIORITY_NORMAL), "Normal"))
 
         self.create_dialog_widgets()
         self.populate_initial_data()
         self.wait_window(self)
 
     def get_available_sounds(self):
-        sounds = [self.BROWSE_OPTION]
-        try: 
-            sounds_path = resource_path(DEFAULT_SOUNDS_DIR)
-            if os.path.isdir(sounds_path): 
-                sounds.extend([fname.rsplit('.', 1)[0].replace('_', ' ') for fname in os.listdir(sounds_path) if fname.lower().endswith((".wav", ".ogg", ".mp3"))])
-        except Exception as e: 
-            print(f"Sound scan error: {e}")
-        return sounds
+        return [self.BROWSE_OPTION, self.IMPORT_FOLDER_OPTION] + self.sound_catalog.display_names()
         
     def map_display_to_internal_sound(self, display_name):
-        if display_name == self.BROWSE_OPTION: 
+        if display_name in (self.BROWSE_OPTION, self.IMPORT_FOLDER_OPTION): 
             return None
-        try: 
-            sounds_path = resource_path(DEFAULT_SOUNDS_DIR)
-            if os.path.isdir(sounds_path):
-                for fname in os.listdir(sounds_path):
-                    if fname.lower().endswith((".wav", ".ogg", ".mp3")):
-                        if fname.rsplit('.', 1)[0].replace('_', ' ') == display_name: 
-                            return f"{self.BUILTIN_SOUNDS_PREFIX}{fname}"
-        except Exception as e: 
-            print(f"Sound map error {display_name}: {e}")
+        entry = self.sound_catalog.lookup_display(display_name)
+        if entry:
+            return entry.identifier
         print(f"Warn: Cannot map {display_name}.")
         return None
 
@@ -1638,9 +5763,19 @@ class AlarmDialog(tk.Toplevel):
         self.sound_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.sound_combo.bind("<<ComboboxSelected>>", self.on_sound_select)
         
+        import_frame = ttk.Frame(main_frame)
+        import_frame.pack(fill=tk.X)
+        self.import_progress = ttk.Progressbar(import_frame, orient=tk.HORIZONTAL, mode='determinate', length=120)
+        ttk.Label(import_frame, textvariable=self.import_status_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        priority_frame = ttk.Frame(main_frame)
+        priority_frame.pack(pady=5, fill=tk.X)
+        ttk.Label(priority_frame, text="Priority:").pack(side=tk.LEFT, padx=(0,5))
+        ttk.Combobox(priority_frame, textvariable=self.priority_var, values=list(PRIORITY_NAMES.values()), state='readonly', width=10).pack(side=tk.LEFT)
+        
         recur_frame = ttk.LabelFrame(main_frame, text="Recurrence", padding="10")
         recur_frame.pack(pady=10, fill=tk.X)
-        recur_options = [RECURRENCE_ONCE, RECURRENCE_DAILY, RECURRENCE_WEEKDAYS, RECURRENCE_WEEKENDS, "Specific Days", RECURRENCE_SPECIFIC_DATE]
+        recur_options = [RECURRENCE_ONCE, RECURRENCE_DAILY, RECURRENCE_WEEKDAYS, RECURRENCE_WEEKENDS, "Specific Days", RECURRENCE_SPECIFIC_DATE, RECURRENCE_CUSTOM]
         option_frame = ttk.Frame(recur_frame)
         option_frame.pack(fill=tk.X)
         self.recur_combobox = ttk.Combobox(option_frame, textvariable=self.recurrence_type_var, values=recur_options, state='readonly')
@@ -1655,21 +5790,51 @@ class AlarmDialog(tk.Toplevel):
         ttk.Label(self.date_frame, text="Date:").pack(side=tk.LEFT, padx=(0,5))
         
         # Apply theme colors to DateEntry
-        self.date_entry = DateEntry(
+        self.date_entry = tkcalendar.DateEntry(
             self.date_frame, 
             width=12,
-            background=self.ACCENT_COLOR, 
-            foreground=self.ACCENT_FG, # Header
-            normalbackground=self.FRAME_BG, 
-            normalforeground=self.TEXT_COLOR, # Normal days
-            selectbackground=self.ACCENT_COLOR, 
-            selectforeground=self.ACCENT_FG, # Selected day
             borderwidth=2, 
             date_pattern='yyyy-mm-dd', 
-            textvariable=self.specific_date_var
+            textvariable=self.specific_date_var,
+            **date_entry_theme_options(self.palette)
         )
         self.date_entry.pack(side=tk.LEFT)
         
+        # Custom rules: every N days/weeks/months, with optional start, end and skipped dates
+        self.custom_frame = ttk.Frame(recur_frame)
+        ttk.Label(self.custom_frame, text="Every").pack(side=tk.LEFT, padx=(0,5))
+        ttk.Spinbox(self.custom_frame, from_=1, to=99, width=3, textvariable=self.interval_var).pack(side=tk.LEFT)
+        unit_combo = ttk.Combobox(self.custom_frame, textvariable=self.unit_var, values=["days", "weeks", "months"], state='readonly', width=8)
+        unit_combo.pack(side=tk.LEFT, padx=5)
+        unit_combo.bind("<<ComboboxSelected>>", self.on_recurrence_change)
+        
+        self.monthly_frame = ttk.Frame(recur_frame)
+        ttk.Radiobutton(self.monthly_frame, text="On day", variable=self.monthly_mode_var, value="day").pack(side=tk.LEFT)
+        ttk.Spinbox(self.monthly_frame, from_=-1, to=31, width=3, textvariable=self.monthday_var).pack(side=tk.LEFT, padx=(2,10))
+        ttk.Radiobutton(self.monthly_frame, text="On the", variable=self.monthly_mode_var, value="nth").pack(side=tk.LEFT)
+        ttk.Combobox(self.monthly_frame, textvariable=self.nth_var, values=list(ORDINAL_NAMES.values()), state='readonly', width=5).pack(side=tk.LEFT, padx=2)
+        ttk.Combobox(self.monthly_frame, textvariable=self.nth_day_var, values=DAY_NAMES, state='readonly', width=5).pack(side=tk.LEFT, padx=2)
+        
+        self.limits_frame = ttk.Frame(recur_frame)
+        start_row = ttk.Frame(self.limits_frame)
+        start_row.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(start_row, text="Starts:").pack(side=tk.LEFT, padx=(0,5))
+        tkcalendar.DateEntry(start_row, width=12, borderwidth=2, date_pattern='yyyy-mm-dd', textvariable=self.start_date_var, **date_entry_theme_options(self.palette)).pack(side=tk.LEFT)
+        ttk.Label(start_row, text="Ends:").pack(side=tk.LEFT, padx=(10,5))
+        ttk.Combobox(start_row, textvariable=self.end_mode_var, values=["Never", "On date", "After N times"], state='readonly', width=12).pack(side=tk.LEFT)
+        ttk.Entry(start_row, textvariable=self.end_value_var, width=11).pack(side=tk.LEFT, padx=5)
+        skip_row = ttk.Frame(self.limits_frame)
+        skip_row.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(skip_row, text="Skip dates:").pack(side=tk.LEFT, padx=(0,5))
+        ttk.Entry(skip_row, textvariable=self.exdates_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        if self.exclusion_vars:
+            exclusion_frame = ttk.Frame(main_frame)
+            exclusion_frame.pack(fill=tk.X)
+            ttk.Label(exclusion_frame, text="Skip days in:").pack(side=tk.LEFT, padx=(0,5))
+            for name, var in self.exclusion_vars.items():
+                ttk.Checkbutton(exclusion_frame, text=name, variable=var).pack(side=tk.LEFT, padx=3)
+        
         ttk.Checkbutton(main_frame, text="Enable this alarm", variable=self.enabled_var).pack(pady=5, anchor=tk.W)
         
         button_frame = ttk.Frame(main_frame)
@@ -1683,7 +5848,7 @@ class AlarmDialog(tk.Toplevel):
 
     def populate_initial_data(self):
         if not self.initial_data:
-            now = datetime.datetime.now() + datetime.timedelta(minutes=1)
+            now = CLOCK.now() + datetime.timedelta(minutes=1)
             
             # Set hour based on time format
             if self.time_format == "12h":
@@ -1699,10 +5864,10 @@ class AlarmDialog(tk.Toplevel):
                 
             self.minute_var.set(f"{now.minute:02}")
             available = self.get_available_sounds()
-            default_sound = available[1] if len(available) > 1 else self.BROWSE_OPTION
+            default_sound = available[2] if len(available) > 2 else self.BROWSE_OPTION
             self.sound_selection_var.set(default_sound)
             self.sound_filepath = self.map_display_to_internal_sound(default_sound) if default_sound != self.BROWSE_OPTION else None
-            self.specific_date_var.set((datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+            self.specific_date_var.set((CLOCK.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
             return
             
         self.hour_var.set(f"{self.initial_data.get('hour', 0):02}")
@@ -1710,20 +5875,17 @@ class AlarmDialog(tk.Toplevel):
         self.label_var.set(self.initial_data.get('label', ''))
         self.enabled_var.set(self.initial_data.get('enabled', True))
         self.recurrence_type_var.set(self.initial_data.get('recurrence_type', RECURRENCE_ONCE))
-        self.specific_date_var.set(self.initial_data.get('specific_date', (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")))
+        self.specific_date_var.set(self.initial_data.get('specific_date', (CLOCK.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")))
         
         self.sound_filepath = self.initial_data.get('sound_file')
         if self.sound_filepath:
-             if self.sound_filepath.startswith(self.BUILTIN_SOUNDS_PREFIX):
-                 fname = self.sound_filepath.split(":", 1)[1]
-                 dname = fname.rsplit('.', 1)[0].replace('_', ' ')
-                 available_display_names = [s for s in self.get_available_sounds() if s != self.BROWSE_OPTION]
-                 if dname in available_display_names: 
-                     self.sound_selection_var.set(dname)
-                 else: 
-                     print(f"Warn: Saved sound '{dname}' not found.")
-                     self.sound_selection_var.set(self.BROWSE_OPTION)
-                     self.sound_filepath = None
+             entry = self.sound_catalog.get(self.sound_filepath)
+             if entry:
+                 self.sound_selection_var.set(entry.display_name)
+             elif self.sound_filepath.startswith((self.BUILTIN_SOUNDS_PREFIX, self.USER_SOUNDS_PREFIX)):
+                 print(f"Warn: Saved sound '{self.sound_filepath}' not found.")
+                 self.sound_selection_var.set(self.BROWSE_OPTION)
+                 self.sound_filepath = None
              else: # Custom file
                  if os.path.exists(self.sound_filepath): 
                      self.sound_selection_var.set(f"Custom: {os.path.basename(self.sound_filepath)}")
@@ -1736,37 +5898,85 @@ class AlarmDialog(tk.Toplevel):
             self.sound_filepath = None
             
         rec_days = self.initial_data.get('recurrence_days', [])
+        if self.initial_data.get('recurrence_type') == RECURRENCE_CUSTOM:
+            rec_days = (self.initial_data.get('recurrence') or {}).get('weekdays', [])
         for i in range(7):
             self.day_vars[i].set(i in rec_days)
         self.on_recurrence_change()
 
     def on_recurrence_change(self, event=None):
         selected_type = self.recurrence_type_var.get()
-        show_days = selected_type == "Specific Days"
-        show_date = selected_type == RECURRENCE_SPECIFIC_DATE
-        
-        # Handle days frame visibility
-        if show_days and not self.days_frame.winfo_ismapped():
-            self.days_frame.pack(fill=tk.X, pady=(5, 0))
-        elif not show_days and self.days_frame.winfo_ismapped():
-            self.days_frame.pack_forget()
-            
-        # Handle date frame visibility - always show for Specific Date
-        if show_date and not self.date_frame.winfo_ismapped():
-            self.date_frame.pack(fill=tk.X, pady=(5, 0))
-        elif not show_date and self.date_frame.winfo_ismapped():
-            self.date_frame.pack_forget()
+        custom = selected_type == RECURRENCE_CUSTOM
+        shown = {
+            self.custom_frame: custom,
+            self.days_frame: selected_type == "Specific Days" or (custom and self.unit_var.get() == "weeks"),
+            self.monthly_frame: custom and self.unit_var.get() == "months",
+            self.date_frame: selected_type == RECURRENCE_SPECIFIC_DATE,
+            self.limits_frame: custom,
+        }
+        # Re-pack in a fixed order so the rows stay in place as options come and go
+        for frame in shown:
+            frame.pack_forget()
+        for frame, visible in shown.items():
+            if visible:
+                frame.pack(fill=tk.X, pady=(5, 0))
+        self.geometry(f"480x{530 + (110 if custom else 0) + (30 if self.exclusion_vars else 0)}")
             
         # Force update to ensure the UI reflects the current state
         self.update_idletasks()
             
+    def custom_recurrence(self):
+        """Build the 'recurrence' spec from the Custom fields, raising ValueError with a readable message."""
+        def parse_date(text, what):
+            try:
+                return datetime.datetime.strptime(text.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"{what} must be a date like 2025-01-31.")
+        freq = {"days": FREQ_DAILY, "weeks": FREQ_WEEKLY, "months": FREQ_MONTHLY}[self.unit_var.get()]
+        spec = {'freq': freq, 'start': parse_date(self.start_date_var.get(), "Start")}
+        interval = int(self.interval_var.get())
+        if interval < 1:
+            raise ValueError("Repeat every must be at least 1.")
+        if interval > 1:
+            spec['interval'] = interval
+        if freq == FREQ_WEEKLY:
+            spec['weekdays'] = [i for i, var in self.day_vars.items() if var.get()]
+            if not spec['weekdays']:
+                raise ValueError("Select at least one day.")
+        elif freq == FREQ_MONTHLY:
+            if self.monthly_mode_var.get() == "nth":
+                ordinal = next(n for n, name in ORDINAL_NAMES.items() if name == self.nth_var.get())
+                spec['nth'] = [ordinal, DAY_NAMES.index(self.nth_day_var.get())]
+            else:
+                monthday = int(self.monthday_var.get())
+                if not (1 <= monthday <= 31 or monthday == -1):
+                    raise ValueError("Day of month must be 1-31, or -1 for the last day.")
+                spec['monthday'] = monthday
+        end_mode = self.end_mode_var.get()
+        if end_mode == "On date":
+            spec['until'] = parse_date(self.end_value_var.get(), "End date")
+        elif end_mode == "After N times":
+            spec['count'] = int(self.end_value_var.get())
+            if spec['count'] < 1:
+                raise ValueError("Number of times must be at least 1.")
+        exdates = [parse_date(d, "Skip dates") for d in self.exdates_var.get().replace(";", ",").split(",") if d.strip()]
+        if exdates:
+            spec['exdates'] = sorted(set(exdates))
+        return spec
+            
     def on_sound_select(self, event=None):
         selection = self.sound_selection_var.get()
         if selection == self.BROWSE_OPTION: 
             self.browse_sound_file()
+        elif selection == self.IMPORT_FOLDER_OPTION:
+            self.import_sound_folder()
         else: 
             self.sound_filepath = self.map_display_to_internal_sound(selection)
             print(f"Selected sound: {self.sound_filepath}")
+            entry = self.sound_catalog.get(self.sound_filepath)
+            self.import_status_var.set(entry.describe() if entry else "")
+            if self.sound_filepath and self.sound_prepare_callback:
+                self.sound_prepare_callback(self.sound_filepath)
             
     def browse_sound_file(self):
         filepath = filedialog.askopenfilename(
@@ -1778,12 +5988,94 @@ class AlarmDialog(tk.Toplevel):
                 self.sound_filepath = filepath
                 self.sound_selection_var.set(f"Custom: {os.path.basename(filepath)}")
                 print(f"Selected custom: {self.sound_filepath}")
+                if self.sound_import_callback:
+                    # Validate (and normalize) up front so a broken file is caught now, not at ring time.
+                    self.pending_import_path = filepath
+                    self._start_import_progress(1, f"Checking {os.path.basename(filepath)}...")
+                    self.sound_import_callback([filepath], self.on_sound_imported)
+                elif self.sound_prepare_callback:
+                    self.sound_prepare_callback(filepath)
             else: 
                 messagebox.showerror("Invalid File", "Not valid file.", parent=self)
                 self.sound_selection_var.set(self.BROWSE_OPTION)
                 self.sound_filepath = None
         elif self.sound_filepath is None: 
             self.sound_selection_var.set(self.BROWSE_OPTION)
+
+    def import_sound_folder(self):
+        folder = filedialog.askdirectory(title="Import Alarm Sounds From Folder", parent=self)
+        if not folder or not self.sound_import_callback:
+            self._restore_sound_selection()
+            return
+        paths = [os.path.join(folder, fname) for fname in sorted(os.listdir(folder)) if fname.lower().endswith(SOUND_FILE_EXTENSIONS)]
+        if not paths:
+            messagebox.showinfo("Import Sounds", "No audio files found in that folder.", parent=self)
+            self._restore_sound_selection()
+            return
+        self.bulk_import_failures = []
+        self._start_import_progress(len(paths), f"Importing {len(paths)} sounds...")
+        self.sound_import_callback(paths, self.on_bulk_sound_imported, copy_to=USER_SOUNDS_DIR)
+        self._restore_sound_selection()
+
+    def _restore_sound_selection(self):
+        entry = self.sound_catalog.get(self.sound_filepath) if self.sound_filepath else None
+        if self.sound_filepath is None:
+            self.sound_selection_var.set(self.BROWSE_OPTION)
+        elif entry:
+            self.sound_selection_var.set(entry.display_name)
+        else:
+            self.sound_selection_var.set(f"Custom: {os.path.basename(self.sound_filepath)}")
+
+    def _start_import_progress(self, total, status):
+        self.import_progress.configure(maximum=total, value=0)
+        self.import_progress.pack(side=tk.RIGHT, padx=(5, 0))
+        self.import_status_var.set(status)
+
+    def _finish_import_progress(self, status):
+        self.import_progress.pack_forget()
+        self.import_status_var.set(status)
+
+    @staticmethod
+    def _describe_sound(result):
+        minutes, seconds = divmod(int(round(result.get('duration', 0))), 60)
+        text = f"{minutes}:{seconds:02}"
+        if result.get('peak'):
+            text += f", peak {20 * math.log10(result['peak']):.1f} dBFS"
+        return text
+
+    def on_sound_imported(self, result, done, total):
+        try:
+            if not self.winfo_exists() or result['path'] != self.pending_import_path:
+                return
+            self.pending_import_path = None
+            if result['ok']:
+                self._finish_import_progress(f"OK: {self._describe_sound(result)}")
+            else:
+                self._finish_import_progress("")
+                messagebox.showerror("Invalid Sound", f"Cannot use {os.path.basename(result['path'])}:\n{result['error']}", parent=self)
+                if self.sound_filepath == result['path']:
+                    self.sound_filepath = None
+                    self.sound_selection_var.set(self.BROWSE_OPTION)
+        except tk.TclError:
+            pass
+
+    def on_bulk_sound_imported(self, result, done, total):
+        try:
+            if not self.winfo_exists():
+                return
+            if not result['ok']:
+                self.bulk_import_failures.append(f"{os.path.basename(result['path'])}: {result['error']}")
+            self.import_progress.configure(value=done)
+            self.import_status_var.set(f"Imported {done}/{total}...")
+            if done < total:
+                return
+            self.sound_catalog.refresh()
+            self.sound_combo.configure(values=self.get_available_sounds())
+            self._finish_import_progress(f"Imported {total - len(self.bulk_import_failures)} of {total} sounds.")
+            if self.bulk_import_failures:
+                messagebox.showwarning("Some Sounds Rejected", "\n".join(self.bulk_import_failures), parent=self)
+        except tk.TclError:
+            pass
             
     def save(self):
         try:
@@ -1814,10 +6106,16 @@ class AlarmDialog(tk.Toplevel):
             recurrence_days = []
             specific_date = None
             
+            recurrence = None
             if recurrence_type == "Specific Days": 
                 recurrence_days = [i for i, var in self.day_vars.items() if var.get()]
             elif recurrence_type == RECURRENCE_SPECIFIC_DATE: 
                 specific_date = self.specific_date_var.get()
+            elif recurrence_type == RECURRENCE_CUSTOM:
+                recurrence = self.custom_recurrence()
+            elif recurrence_type == self.initial_data.get('recurrence_type') and self.initial_data.get('recurrence'):
+                # Keep skipped dates and other rule limits set elsewhere
+                recurrence = self.initial_data['recurrence'].copy()
                 
             sound_file = self.sound_filepath
             if enabled and not sound_file: 
@@ -1832,8 +6130,16 @@ class AlarmDialog(tk.Toplevel):
                 'enabled': enabled, 
                 'recurrence_type': recurrence_type, 
                 'recurrence_days': recurrence_days, 
-                'specific_date': specific_date
+                'specific_date': specific_date,
+                'priority': next((p for p, name in PRIORITY_NAMES.items() if name == self.priority_var.get()), PRIORITY_NORMAL)
             }
+            exclusion_calendars = [name for name, var in self.exclusion_vars.items() if var.get()]
+            if exclusion_calendars:
+                self.result['exclusion_calendars'] = exclusion_calendars
+            if recurrence:
+                self.result['recurrence'] = recurrence
+                if recurrence_type == RECURRENCE_CUSTOM and alarm_rule(self.result).next_on_or_after(CLOCK.today()) is None:
+                    raise ValueError("This rule has no dates from today on.")
             
             alarm_id = self.initial_data.get('id') if self.initial_data else None
             if alarm_id: 
@@ -1850,62 +6156,136 @@ class AlarmDialog(tk.Toplevel):
 
 # --- Timezone Selection Dialog ---
 class TimezoneDialog(tk.Toplevel):
-      def __init__(self, parent, title, timezone_list, current_theme='light'):
+      def __init__(self, parent, title, timezone_index, current_theme='light', exclude=()):
         super().__init__(parent)
         self.transient(parent)
         self.grab_set()
         self.title(title)
-        self.geometry("350x150")
+        self.geometry("420x380")
         self.resizable(False, False)
 
-        # Store theme colors locally
-        self.BG_COLOR = D_COLOR_BACKGROUND if current_theme == 'dark' else L_COLOR_BACKGROUND
-        self.FRAME_BG = D_COLOR_FRAME_BG if current_theme == 'dark' else L_COLOR_FRAME_BG
-        self.TEXT_COLOR = D_COLOR_TEXT if current_theme == 'dark' else L_COLOR_TEXT
-        self.ACCENT_COLOR = D_COLOR_ACCENT if current_theme == 'dark' else L_COLOR_ACCENT
-        self.ACCENT_FG = D_COLOR_ACCENT_FG
-        self.TEXT_SECONDARY = D_COLOR_TEXT_SECONDARY if current_theme == 'dark' else L_COLOR_TEXT_SECONDARY
-
-        self.configure(bg=self.BG_COLOR) # Apply background
+        # ttk styles are shared with the main window, which has already applied the active theme set
+        self.palette = theme_palette(current_theme)
+        self.configure(bg=self.palette['bg']) # Apply background
 
         self.result = None
-        self.timezone_list = sorted(timezone_list)
-        self.selected_tz = tk.StringVar()
-
-        # Setup styles locally using the stored theme colors
-        style = ttk.Style(self)
-        style.configure('.', background=self.BG_COLOR, foreground=self.TEXT_COLOR)
-        style.configure('TFrame', background=self.BG_COLOR)
-        style.configure('TLabel', background=self.BG_COLOR)
-        style.configure('TButton', font=(FONT_FAMILY_UI, FONT_SIZE_BASE), padding=(8, 5), background=self.ACCENT_COLOR, foreground=self.ACCENT_FG)
-        style.configure('Secondary.TButton', background=self.TEXT_SECONDARY, foreground=self.ACCENT_FG)
-        style.map('TCombobox', fieldbackground=[('readonly', self.FRAME_BG)])
-        style.map('TCombobox', selectbackground=[('readonly', self.FRAME_BG)])
-        style.map('TCombobox', selectforeground=[('readonly', self.TEXT_COLOR)])
+        self.timezone_index = timezone_index
+        self.exclude = set(exclude)
+        self.results = []
+        self.search_var = tk.StringVar()
+        self.status_var = tk.StringVar()
 
         # Widgets
-        ttk.Label(self, text="Select a timezone:").pack(pady=(10, 5))
-        combo = ttk.Combobox(self, textvariable=self.selected_tz, values=self.timezone_list, state='readonly', width=40)
-        combo.pack(pady=5, padx=15, fill=tk.X)
-        if self.timezone_list: 
-            combo.current(0)
+        ttk.Label(self, text="Search by city, country, region or abbreviation:").pack(pady=(10, 5), padx=15, anchor=tk.W)
+        self.search_entry = ttk.Entry(self, textvariable=self.search_var)
+        self.search_entry.pack(padx=15, fill=tk.X)
+        list_frame = ttk.Frame(self)
+        list_frame.pack(pady=5, padx=15, fill=tk.BOTH, expand=True)
+        self.result_list = tk.Listbox(
+            list_frame, 
+            activestyle='none', 
+            exportselection=False, 
+            background=self.palette['frame_bg'], 
+            foreground=self.palette['text'], 
+            selectbackground=self.palette['accent'], 
+            selectforeground=self.palette['accent_fg'], 
+            highlightthickness=0, 
+            borderwidth=0
+        )
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.result_list.yview)
+        self.result_list.configure(yscrollcommand=scrollbar.set)
+        self.result_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        ttk.Label(self, textvariable=self.status_var, style='CalendarDate.TLabel').pack(padx=15, anchor=tk.W)
         button_frame = ttk.Frame(self)
         button_frame.pack(pady=10)
         ttk.Button(button_frame, text="Add", command=self.add).pack(side=tk.LEFT, padx=10)
         ttk.Button(button_frame, text="Cancel", command=self.destroy, style='Secondary.TButton').pack(side=tk.LEFT, padx=10)
+        
+        self.search_var.trace_add("write", self.on_search_change)
+        self.search_entry.bind("<Return>", self.add)
+        self.search_entry.bind("<Down>", self.focus_results)
+        self.result_list.bind("<Return>", self.add)
+        self.result_list.bind("<Double-Button-1>", self.add)
+        self.on_search_change()
+        self.search_entry.focus_set()
         self.wait_window(self)
 
-      def add(self): 
-          self.result = self.selected_tz.get()
+      def on_search_change(self, *args):
+          start = time.perf_counter()
+          query = self.search_var.get()
+          # Fetch a few extra so zones that are already shown don't shrink the list.
+          self.results = [z for z in self.timezone_index.search(query, limit=TIMEZONE_SEARCH_LIMIT + len(self.exclude)) if z not in self.exclude][:TIMEZONE_SEARCH_LIMIT]
+          self.result_list.delete(0, tk.END)
+          if self.results:
+              self.result_list.insert(tk.END, *(self.timezone_index.describe(zone) for zone in self.results))
+              self.result_list.selection_set(0)
+          elapsed_ms = (time.perf_counter() - start) * 1000
+          if query.strip():
+              self.status_var.set(f"{len(self.results)} matches ({elapsed_ms:.1f} ms)")
+          else:
+              self.status_var.set(f"{len(self.timezone_index.zones)} time zones")
+
+      def focus_results(self, event=None):
+          if self.results:
+              self.result_list.focus_set()
+              self.result_list.selection_clear(0, tk.END)
+              self.result_list.selection_set(0)
+              self.result_list.activate(0)
+          return "break"
+
+      def add(self, event=None): 
+          selection = self.result_list.curselection()
+          if not selection:
+              return
+          self.result = self.results[selection[0]]
           self.destroy()
 
 
+# --- Theme Switch Benchmark ---
+def benchmark_theme_switch(app, rounds=THEME_BENCHMARK_ROUNDS, widget_count=THEME_BENCHMARK_WIDGETS):
+    """Toggle the theme repeatedly with a large extra widget tree on screen and print switch latencies."""
+    original_mode = app.theme_mode.get()
+    window = tk.Toplevel(app.root)
+    window.title("Theme benchmark")
+    columns = 20
+    widget_types = (ttk.Label, ttk.Button, ttk.Checkbutton, ttk.Entry)
+    for i in range(widget_count):
+        frame = ttk.Frame(window)
+        frame.grid(row=i // columns, column=i % columns)
+        widget = widget_types[i % len(widget_types)](frame)
+        if isinstance(widget, (ttk.Label, ttk.Button, ttk.Checkbutton)):
+            widget.configure(text=str(i))
+        widget.pack()
+    app.root.update()
+    
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        app.theme_mode.set('dark' if app.theme_mode.get() == 'light' else 'light')
+        app.root.update_idletasks()
+        timings.append((time.perf_counter() - start) * 1000)
+    app.theme_mode.set(original_mode)
+    window.destroy()
+    
+    timings.sort()
+    print(f"Theme switch over {rounds} rounds with {widget_count} extra widgets: "
+          f"min {timings[0]:.1f} ms, median {timings[len(timings) // 2]:.1f} ms, max {timings[-1]:.1f} ms")
+    return timings
+
 # --- Main Execution ---
 if __name__ == "__main__":
-    root = tk.Tk()
+    multiprocessing.freeze_support() # Sound import workers re-launch the frozen executable
+    if "--simulate" in sys.argv:
+        sys.exit(run_simulation(sys.argv[1:]))
+    with STARTUP_PROFILER.phase('tk.Tk'):
+        root = tk.Tk()
     app = None
     try:
-        app = AlarmClockApp(root)
+        with STARTUP_PROFILER.phase('AlarmClockApp.__init__'):
+            app = AlarmClockApp(root)
+        if "--benchmark-theme" in sys.argv:
+            root.after(500, lambda: (benchmark_theme_switch(app), app.quit_application()))
         root.mainloop()
     except KeyboardInterrupt:
         print("Keyboard interrupt, quitting.")
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+
+import alarm_clock as ac
+
+
+class FakeStream:
+    def __init__(self, busy=True, pump_error=None):
+        self.busy = busy
+        self.pump_error = pump_error
+        self.stopped = 0
+
+    def pump(self):
+        if self.pump_error:
+            raise self.pump_error
+
+    def set_volume(self, volume):
+        pass
+
+    def get_busy(self):
+        return self.busy
+
+    def stop(self):
+        self.stopped += 1
+
+
+class AudioControllerTests(unittest.TestCase):
+    def setUp(self):
+        self.audio = ac.AudioController()
+
+    def tearDown(self):
+        self.audio.shutdown()
+
+    def test_finished_stream_is_stopped(self):
+        stream = FakeStream(busy=False)
+        self.audio.start_voice("music:a", stream, 0.5)
+        self.audio._tick(time.monotonic())
+        self.assertEqual(self.audio.active_count(), 0)
+        self.assertEqual(stream.stopped, 1)
+
+    def test_failing_stream_is_stopped(self):
+        stream = FakeStream(pump_error=OSError("disk gone"))
+        self.audio.start_voice("ch0", stream, 0.5)
+        self.audio._tick(time.monotonic())
+        self.assertEqual(self.audio.active_count(), 0)
+        self.assertEqual(stream.stopped, 1)
+
+    def test_stop_voice_stops_idle_stream(self):
+        stream = FakeStream(busy=False)
+        self.audio.start_voice("music:a", stream, 0.5)
+        self.audio.stop_voice("music:a", fade_out_ms=500)
+        self.assertEqual(stream.stopped, 1)
+
+
+class PcmStreamTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        frequency, sample_format, channels = ac.MIXER_FORMAT
+        try:
+            ac.pygame.mixer.init(frequency=frequency, size=sample_format, channels=channels)
+        except ac.pygame.error as e:
+            raise unittest.SkipTest(f"no mixer: {e}")
+
+    @classmethod
+    def tearDownClass(cls):
+        ac.pygame.mixer.quit()
+
+    def test_reads_chunks_and_closes(self):
+        frequency, _, channels = ac.pygame.mixer.get_init()
+        frame_bytes = channels * 2
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "long.pcm")
+            with open(path, 'wb') as f:
+                f.write(bytes(int(frequency * 2.5) * frame_bytes))
+            stream = ac.PcmStream(path, ac.pygame.mixer.Channel(0), loops=0)
+            # One chunk is playing and one queued; only the last half second is left to read.
+            self.assertEqual(len(stream._next_chunk().get_raw()), int(frequency * 0.5) * frame_bytes)
+            self.assertIsNone(stream._next_chunk())
+            stream.stop()
+            self.assertTrue(stream._wav._file.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
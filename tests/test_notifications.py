@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+import alarm_clock as ac
+
+
+class FailingBackend(ac.NotificationBackend):
+    def notify(self, title, message, timeout):
+        raise RuntimeError("no notification daemon")
+
+
+class BlockingBackend(ac.NotificationBackend):
+    def __init__(self):
+        self.release = threading.Event()
+        self.sent = []
+
+    def notify(self, title, message, timeout):
+        self.release.wait(5)
+        self.sent.append(title)
+
+
+class NotificationDispatcherTests(unittest.TestCase):
+    def test_backend_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ac.NotificationBackend()
+
+    def test_slow_backend_does_not_block_submit(self):
+        backend = ac.StubNotificationBackend(delay_s=0.2)
+        dispatcher = ac.NotificationDispatcher(backend, coalesce_seconds=0)
+        started = time.monotonic()
+        for i in range(3):
+            self.assertTrue(dispatcher.submit(f"T{i}", "m"))
+        self.assertLess(time.monotonic() - started, 0.1)
+        dispatcher.stop(timeout=2)
+        self.assertEqual([title for title, _, _ in backend.sent], ["T0", "T1", "T2"])
+        self.assertEqual(dispatcher.stats()['sent'], 3)
+
+    def test_same_key_is_coalesced(self):
+        backend = ac.StubNotificationBackend()
+        dispatcher = ac.NotificationDispatcher(backend, coalesce_seconds=0.2)
+        summarize = lambda items: (f"{len(items)} ALARMS", "\n".join(i['message'] for i in items))
+        dispatcher.submit("ALARM", "a", timeout=5, coalesce_key='alarm', summarize=summarize)
+        dispatcher.submit("ALARM", "b", timeout=15, coalesce_key='alarm', summarize=summarize)
+        dispatcher.submit("Other", "c")
+        dispatcher.stop(timeout=2)
+        # The unrelated notification is not held back by the alarm batch's window.
+        self.assertEqual(backend.sent, [("Other", "c", 5), ("2 ALARMS", "a\nb", 15)])
+        self.assertEqual(dispatcher.stats()['coalesced'], 1)
+
+    def test_interleaved_keys_are_coalesced_separately(self):
+        backend = ac.StubNotificationBackend()
+        dispatcher = ac.NotificationDispatcher(backend, coalesce_seconds=0.3)
+        dispatcher.submit("A", "a1", coalesce_key='a')
+        for i in range(3):
+            dispatcher.submit("B", f"b{i}", coalesce_key='b')
+        time.sleep(0.5)
+        self.assertEqual(backend.sent, [("A", "a1", 5), ("B", "b0\nb1\nb2", 5)])
+        dispatcher.stop(timeout=2)
+        self.assertEqual(dispatcher.stats()['coalesced'], 2)
+
+    def test_pending_items_count_towards_limit(self):
+        dispatcher = ac.NotificationDispatcher(ac.StubNotificationBackend(), max_queue=3, coalesce_seconds=5)
+        results = [dispatcher.submit("T", str(i), coalesce_key=i % 2) for i in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(dispatcher.stats()['queue_depth'], 3)
+        dispatcher.stop(timeout=2)
+
+    def test_full_queue_drops(self):
+        backend = BlockingBackend()
+        dispatcher = ac.NotificationDispatcher(backend, max_queue=2, coalesce_seconds=0)
+        results = [dispatcher.submit(f"T{i}", "m") for i in range(6)]
+        self.assertIn(False, results)
+        dropped = dispatcher.stats()['dropped']
+        self.assertEqual(dropped, results.count(False))
+        backend.release.set()
+        dispatcher.stop(timeout=2)
+        self.assertEqual(len(backend.sent), 6 - dropped)
+
+    def test_backend_errors_are_counted(self):
+        dispatcher = ac.NotificationDispatcher(FailingBackend(), coalesce_seconds=0)
+        dispatcher.submit("T", "m")
+        dispatcher.stop(timeout=2)
+        self.assertEqual(dispatcher.stats()['errors'], 1)
+        self.assertEqual(dispatcher.stats()['sent'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import datetime
+import unittest
+
+import alarm_clock as ac
+
+D = datetime.date
+
+
+def custom(**spec):
+    return ac.alarm_rule({'recurrence_type': ac.RECURRENCE_CUSTOM, 'recurrence': spec})
+
+
+class RecurrenceRuleTests(unittest.TestCase):
+    def test_nth_weekday(self):
+        rule = custom(freq='monthly', start='2026-01-01', nth=[2, 1])  # 2nd Tuesday
+        self.assertEqual(list(rule.between(D(2026, 1, 1), D(2026, 3, 31))), [D(2026, 1, 13), D(2026, 2, 10), D(2026, 3, 10)])
+        last = custom(freq='monthly', start='2026-01-01', nth=[-1, 4])  # last Friday
+        self.assertEqual(list(last.between(D(2026, 1, 1), D(2026, 2, 28))), [D(2026, 1, 30), D(2026, 2, 27)])
+
+    def test_monthday_31_skips_short_months(self):
+        rule = custom(freq='monthly', start='2026-01-31', monthday=31)
+        self.assertEqual(list(rule.between(D(2026, 1, 1), D(2026, 5, 31))), [D(2026, 1, 31), D(2026, 3, 31), D(2026, 5, 31)])
+
+    def test_last_day_of_month(self):
+        rule = custom(freq='monthly', start='2028-01-01', monthday=-1)
+        self.assertEqual(list(rule.between(D(2028, 1, 1), D(2028, 3, 31))), [D(2028, 1, 31), D(2028, 2, 29), D(2028, 3, 31)])
+
+    def test_interval_over_skipped_months(self):
+        # Every 2 months on the 31st: Jan, Mar, May, Jul are 31 long; Sep and Nov are not.
+        rule = custom(freq='monthly', start='2026-07-31', monthday=31, interval=2)
+        self.assertEqual(rule.next_on_or_after(D(2026, 8, 1)), D(2027, 1, 31))
+
+    def test_count(self):
+        rule = custom(freq='weekly', start='2026-10-19', weekdays=[0, 2], count=3)
+        self.assertEqual(list(rule.between(D(2026, 10, 1), D(2026, 12, 31))), [D(2026, 10, 19), D(2026, 10, 21), D(2026, 10, 26)])
+        self.assertIn("3 times", rule.describe())
+
+    def test_monthly_count(self):
+        rule = custom(freq='monthly', start='2026-01-31', monthday=31, count=4)
+        self.assertEqual(list(rule.between(D(2026, 1, 1), D(2027, 12, 31))), [D(2026, 1, 31), D(2026, 3, 31), D(2026, 5, 31), D(2026, 7, 31)])
+        # 400 years from 2028 hold 97 leap days (2100, 2200 and 2300 are skipped), so the 100th is 3 leap years later.
+        leap = custom(freq='monthly', start='2028-02-01', monthday=29, interval=12, count=100)
+        self.assertEqual(leap._last, D(2436, 2, 29))
+        fifth = custom(freq='monthly', start='2026-01-01', nth=[5, 4], count=3)  # 5th Friday
+        self.assertEqual(list(fifth.between(D(2026, 1, 1), D(2026, 12, 31))), [D(2026, 1, 30), D(2026, 5, 29), D(2026, 7, 31)])
+
+    def test_count_without_start_is_rejected(self):
+        rule = custom(freq='weekly', weekdays=[0], count=3)
+        self.assertEqual(rule.freq, ac.FREQ_NEVER)
+        self.assertIsNone(rule.next_on_or_after(D(2026, 10, 19)))
+
+    def test_until(self):
+        rule = custom(freq='daily', start='2026-10-19', interval=3, until='2026-10-28')
+        self.assertEqual(list(rule.between(D(2026, 10, 1), D(2026, 12, 31))), [D(2026, 10, 19), D(2026, 10, 22), D(2026, 10, 25), D(2026, 10, 28)])
+
+    def test_exdates(self):
+        rule = custom(freq='daily', start='2026-10-19', count=4, exdates=['2026-10-20', '2026-10-21'])
+        self.assertEqual(list(rule.between(D(2026, 10, 1), D(2026, 12, 31))), [D(2026, 10, 19), D(2026, 10, 22)])
+        plain = ac.alarm_rule({'recurrence_type': ac.RECURRENCE_DAILY, 'recurrence': {'exdates': ['2026-10-20']}})
+        self.assertEqual(plain.next_on_or_after(D(2026, 10, 20)), D(2026, 10, 21))
+
+    def test_recurrence_key_ignores_rule_cache(self):
+        alarm = {'recurrence_type': ac.RECURRENCE_CUSTOM, 'recurrence': {'freq': 'weekly', 'weekdays': [0, 2]}}
+        key = ac._recurrence_key(alarm)
+        ac._compile_rule.cache_clear()
+        self.assertEqual(ac._recurrence_key(dict(alarm, recurrence={'weekdays': (0, 2), 'freq': 'weekly'})), key)
+        self.assertNotEqual(ac._recurrence_key(dict(alarm, recurrence={'freq': 'weekly', 'weekdays': [0]})), key)
+
+
+class RRuleImportTests(unittest.TestCase):
+    def setUp(self):
+        self.previous = ac.set_clock(ac.VirtualClock(datetime.datetime(2026, 10, 19, 12, 0)))
+
+    def tearDown(self):
+        ac.set_clock(self.previous)
+
+    def test_started_rule_becomes_plain_type(self):
+        self.assertEqual(ac.recurrence_spec_from_rrule("FREQ=DAILY", D(2026, 1, 1)), (ac.RECURRENCE_DAILY, [], {}))
+
+    def test_future_start_is_kept(self):
+        for rrule in ("FREQ=DAILY", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"):
+            rec_type, days, spec = ac.recurrence_spec_from_rrule(rrule, D(2027, 3, 1))
+            self.assertEqual(rec_type, ac.RECURRENCE_CUSTOM)
+            alarm = {'recurrence_type': rec_type, 'recurrence_days': days, 'recurrence': spec}
+            self.assertEqual(ac.alarm_rule(alarm).next_on_or_after(D(2026, 10, 19)), D(2027, 3, 1))
+
+    def test_csv_rrule_with_future_date(self):
+        alarm = ac.parse_csv_alarm({'time': '07:00', 'recurrence': 'custom', 'rrule': 'FREQ=DAILY', 'date': '2027-03-01'})
+        self.assertEqual(ac.alarm_rule(alarm).next_on_or_after(D(2026, 10, 19)), D(2027, 3, 1))
+
+    def test_multiple_monthly_byday_rejected(self):
+        with self.assertRaises(ac.AlarmImportError):
+            ac.recurrence_spec_from_rrule("FREQ=MONTHLY;BYDAY=1MO,3MO", D(2026, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
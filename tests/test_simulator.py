@@ -0,0 +1,42 @@
+import datetime
+import unittest
+
+import alarm_clock as ac
+
+
+def alarm(alarm_id, **fields):
+    data = {'id': alarm_id, 'hour': 7, 'minute': 30, 'enabled': True, 'label': alarm_id,
+            'recurrence_type': ac.RECURRENCE_ONCE, 'recurrence_days': []}
+    data.update(fields)
+    return data
+
+
+def triggers(alarms, days=8):
+    start = datetime.datetime(2026, 10, 19)
+    simulator = ac.FiringSimulator(alarms, start=start)
+    return [(when, a['id']) for when, event, a in simulator.run(start + datetime.timedelta(days=days)) if event == 'trigger'], simulator
+
+
+class FiringSimulatorTests(unittest.TestCase):
+    def test_once_alarm_rings_once(self):
+        fired, simulator = triggers([alarm('once')])
+        self.assertEqual(fired, [(datetime.datetime(2026, 10, 19, 7, 30), 'once')])
+        self.assertFalse(simulator.store.get('once')['enabled'])
+
+    def test_specific_date_rings_once(self):
+        fired, simulator = triggers([alarm('dated', recurrence_type=ac.RECURRENCE_SPECIFIC_DATE, specific_date='2026-10-22')])
+        self.assertEqual(fired, [(datetime.datetime(2026, 10, 22, 7, 30), 'dated')])
+        self.assertFalse(simulator.store.get('dated')['enabled'])
+
+    def test_daily_alarm_stays_enabled(self):
+        fired, simulator = triggers([alarm('daily', recurrence_type=ac.RECURRENCE_DAILY)])
+        self.assertEqual(len(fired), 8)
+        self.assertTrue(simulator.store.get('daily')['enabled'])
+
+    def test_dismissal_matches_stop(self):
+        self.assertEqual(ac.dismissal_changes(alarm('once')), {'snooze_until': None, 'enabled': False})
+        self.assertEqual(ac.dismissal_changes(alarm('daily', recurrence_type=ac.RECURRENCE_DAILY)), {'snooze_until': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
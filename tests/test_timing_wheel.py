@@ -0,0 +1,104 @@
+import random
+import unittest
+
+import alarm_clock as ac
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TimingWheelTests(unittest.TestCase):
+    def make_wheel(self, **kwargs):
+        self.clock = FakeClock()
+        return ac.TimingWheel(clock=self.clock, **kwargs)
+
+    def run_until(self, wheel, end):
+        """Drive the wheel the way TimerEngine does, returning (fire time, deadline) pairs."""
+        fired = []
+        while True:
+            deadline = wheel.next_deadline()
+            if deadline is None or deadline > end:
+                return fired
+            self.clock.now = max(self.clock.now, deadline)
+            fired.extend((self.clock.now, timer.deadline) for timer in wheel.advance())
+
+    def assert_on_time(self, fired, tick_s):
+        for fired_at, deadline in fired:
+            self.assertGreaterEqual(fired_at, deadline)
+            self.assertLessEqual(fired_at - deadline, tick_s + 1e-9)
+
+    def test_cascades_through_levels(self):
+        wheel = self.make_wheel(slot_bits=2, levels=3)
+        deadlines = [self.clock.now + d for d in (0.003, 0.04, 0.2, 0.31, 1.7)]
+        for deadline in deadlines:
+            wheel.schedule(deadline, None)
+        fired = self.run_until(wheel, self.clock.now + 10)
+        self.assertEqual([d for _, d in fired], deadlines)
+        self.assert_on_time(fired, wheel.tick_s)
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel(self):
+        wheel = self.make_wheel(slot_bits=2, levels=3)
+        keep = wheel.schedule(self.clock.now + 0.5, None)
+        drop = wheel.schedule(self.clock.now + 0.5, None)
+        self.clock.now += 0.3
+        wheel.advance()  # drop has cascaded by now; cancel must still find it
+        self.assertTrue(wheel.cancel(drop))
+        self.assertFalse(wheel.cancel(drop))
+        fired = self.run_until(wheel, self.clock.now + 10)
+        self.assertEqual([d for _, d in fired], [keep.deadline])
+
+    def test_beyond_one_turn_is_parked(self):
+        # Two levels of 4 slots span 16 ticks (80 ms); this timer is much further out.
+        wheel = self.make_wheel(slot_bits=2, levels=2)
+        far = self.clock.now + 1.0
+        wheel.schedule(far, None)
+        near = wheel.schedule(self.clock.now + 0.02, None)
+        fired = self.run_until(wheel, self.clock.now + 5)
+        self.assertEqual([d for _, d in fired], [near.deadline, far])
+        self.assert_on_time(fired, wheel.tick_s)
+
+    def test_idle_until_far_timer(self):
+        wheel = self.make_wheel()
+        wheel.schedule(self.clock.now + 2 * 3600, None)
+        wakeups = 0
+        while len(wheel):
+            self.clock.now = max(self.clock.now, wheel.next_deadline())
+            wheel.advance()
+            wakeups += 1
+        # One wake per level cascade, not one every turn of level 0.
+        self.assertLessEqual(wakeups, 4)
+
+    def test_random_schedule_and_cancel(self):
+        rng = random.Random(7)
+        wheel = self.make_wheel(slot_bits=3, levels=3)
+        pending = {}
+        for _ in range(2000):
+            choice = rng.random()
+            if choice < 0.4:
+                timer = wheel.schedule(self.clock.now + rng.choice([0.01, 0.3, 3, 40]) * rng.random(), None)
+                pending[timer] = timer.deadline
+            elif choice < 0.5 and pending:
+                timer = rng.choice(list(pending))
+                self.assertTrue(wheel.cancel(timer))
+                del pending[timer]
+            else:
+                target = self.clock.now + rng.random() * 0.5
+                for fired_at, deadline in self.run_until(wheel, target):
+                    self.assertLessEqual(fired_at - deadline, wheel.tick_s + 1e-9)
+                self.clock.now = max(self.clock.now, target)
+                for timer in wheel.advance():
+                    self.assertLessEqual(self.clock.now - timer.deadline, wheel.tick_s + 1e-9)
+                pending = {t: d for t, d in pending.items() if t.slot is not None}
+            self.assertEqual(len(wheel), len(pending))
+            for deadline in pending.values():
+                self.assertGreater(deadline, self.clock.now - wheel.tick_s)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import datetime
+import unittest
+
+import alarm_clock as ac
+
+
+def alarm(**fields):
+    data = {'id': 'a', 'hour': 12, 'minute': 30, 'enabled': True, 'recurrence_type': ac.RECURRENCE_DAILY, 'recurrence_days': []}
+    data.update(fields)
+    return data
+
+
+class UpcomingFireTimeTests(unittest.TestCase):
+    now = datetime.datetime(2026, 10, 19, 12, 0)
+    window = datetime.timedelta(minutes=2)
+
+    def test_stale_snooze_is_ignored(self):
+        stale = alarm(snooze_until=datetime.datetime(2026, 10, 19, 10, 0).timestamp())
+        self.assertIsNone(ac.upcoming_fire_time(stale, self.now, self.window))
+        self.assertEqual(ac.upcoming_fire_time(stale, self.now, datetime.timedelta(hours=1)), datetime.datetime(2026, 10, 19, 12, 30))
+
+    def test_pending_snooze_is_used(self):
+        snoozed = alarm(snooze_until=datetime.datetime(2026, 10, 19, 12, 1).timestamp())
+        self.assertEqual(ac.upcoming_fire_time(snoozed, self.now, self.window), datetime.datetime(2026, 10, 19, 12, 1))
+        self.assertIsNone(ac.upcoming_fire_time(snoozed, self.now, datetime.timedelta(seconds=30)))
+
+
+if __name__ == "__main__":
+    unittest.main()